@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from actionplans.models import PlanoDeAcao
+from actionplans.services import recalcular_resumo
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os contadores (qtd_*) dos planos de ação a partir dos vínculos. "
+        "Por padrão só os planos cujo qtd_recomendacoes diverge do nº real de vínculos "
+        "(ex.: planos anteriores aos contadores); --all recalcula todos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recalcula todos os planos.")
+
+    def handle(self, *args, **opts):
+        qs = PlanoDeAcao.objects.all()
+        if not opts["all"]:
+            qs = qs.annotate(n_vinculos=Count("planodeacaorecomendacao")).exclude(qtd_recomendacoes=F("n_vinculos"))
+        ids = list(qs.values_list("id", flat=True))
+        for plano_id in ids:
+            recalcular_resumo(plano_id)
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados em {len(ids)} planos."))
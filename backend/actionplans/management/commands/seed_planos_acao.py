@@ -8,6 +8,7 @@ from statistics import mean
 from users.models import CustomUser
 from recommendations.models import Recomendacao
 from actionplans.models import PlanoDeAcao, PlanoDeAcaoRecomendacao
+from actionplans.services import recalcular_resumo
 
 
 PRIO_ORDER = {"alta": 0, "media": 1, "baixa": 2}
@@ -125,6 +126,7 @@ class Command(BaseCommand):
             plano.categoria = ""  # ou: ", ".join(sorted({r.categoria for r in recs if r.categoria}))[:255]
             plano.orcamentoMax = ""  # sem cálculo aqui
             plano.save()
+            recalcular_resumo(plano.id)
 
             self.stdout.write(
                 self.style.SUCCESS(
@@ -17,6 +17,13 @@ class PlanoDeAcao(models.Model):
     submission_id = models.IntegerField(null=True, blank=True)  # ← substitui formularioRespondidoId
     recomendacoes = models.ManyToManyField(Recomendacao, through="PlanoDeAcaoRecomendacao")
 
+    # Contadores mantidos incrementalmente (ver actionplans/services.py)
+    qtd_recomendacoes = models.PositiveIntegerField(default=0)
+    qtd_a_fazer = models.PositiveIntegerField(default=0)
+    qtd_em_progresso = models.PositiveIntegerField(default=0)
+    qtd_finalizado = models.PositiveIntegerField(default=0)
+    qtd_cumpridas = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Plano {self.id} - Cliente: {self.cliente}"
 
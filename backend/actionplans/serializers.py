@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import PlanoDeAcao, PlanoDeAcaoRecomendacao
+from .services import recalcular_resumo
 from recommendations.models import Recomendacao
 from recommendations.serializers import RecomendacaoSerializer
 from users.models import CustomUser
@@ -32,7 +33,15 @@ class PlanoDeAcaoSerializer(serializers.ModelSerializer):
         read_only_fields = ["id","cliente","criado_por","data_criacao","data_atualizacao","recomendacoes"]
 
     def get_recomendacoes(self, obj):
-        vinculos = PlanoDeAcaoRecomendacao.objects.filter(plano=obj).order_by("ordem")
+        # usa os vínculos pré-carregados pela view (ver PLANO_PREFETCH); senão, busca com join
+        vinculos = getattr(obj, "vinculos_ordenados", None)
+        if vinculos is None:
+            vinculos = (
+                PlanoDeAcaoRecomendacao.objects
+                .filter(plano=obj)
+                .select_related("recomendacao")
+                .order_by("ordem")
+            )
         out = []
         for v in vinculos:
             rec = RecomendacaoSerializer(v.recomendacao).data
@@ -58,4 +67,5 @@ class PlanoDeAcaoSerializer(serializers.ModelSerializer):
         )
         for ordem, rec_id in enumerate(rec_ids):
             PlanoDeAcaoRecomendacao.objects.create(plano=plano, recomendacao_id=rec_id, ordem=ordem)
+        recalcular_resumo(plano.id)
         return plano
@@ -0,0 +1,101 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import PlanoDeAcao, PlanoDeAcaoRecomendacao
+
+# status do kanban -> campo contador no PlanoDeAcao
+STATUS_FIELD = {
+    "A Fazer": "qtd_a_fazer",
+    "Em Progresso": "qtd_em_progresso",
+    "Finalizado": "qtd_finalizado",
+}
+COUNTER_FIELDS = ["qtd_recomendacoes", "qtd_cumpridas", *STATUS_FIELD.values()]
+
+
+def _somar(field, n):
+    """F(field) + n sem ficar negativo (contador desatualizado não pode violar o CHECK >= 0)."""
+    expr = F(field) + n
+    return Greatest(expr, Value(0)) if n < 0 else expr
+
+
+def recalcular_resumo(plano_id: int):
+    """Recalcula do zero os contadores de um plano (criação, seeds, correções)."""
+    vinculos = PlanoDeAcaoRecomendacao.objects.filter(plano_id=plano_id)
+    por_status = dict(vinculos.values_list("status").annotate(n=Count("id")))
+    values = {field: por_status.get(st, 0) for st, field in STATUS_FIELD.items()}
+    values["qtd_recomendacoes"] = sum(por_status.values())
+    values["qtd_cumpridas"] = vinculos.filter(recomendacao__cumprida=True).count()
+    PlanoDeAcao.objects.filter(id=plano_id).update(**values)
+
+
+def aplicar_mudancas_status(mudancas):
+    """
+    Aplica deltas de status do kanban.
+    `mudancas`: iterável de (plano_id, status_antigo, status_novo).
+    Faz um UPDATE por plano afetado, com F() para não perder concorrência.
+    """
+    deltas = defaultdict(Counter)
+    for plano_id, antigo, novo in mudancas:
+        if antigo == novo:
+            continue
+        if antigo in STATUS_FIELD:
+            deltas[plano_id][STATUS_FIELD[antigo]] -= 1
+        if novo in STATUS_FIELD:
+            deltas[plano_id][STATUS_FIELD[novo]] += 1
+
+    for plano_id, delta in deltas.items():
+        updates = {field: _somar(field, n) for field, n in delta.items() if n}
+        if updates:
+            PlanoDeAcao.objects.filter(id=plano_id).update(**updates)
+
+
+def aplicar_mudanca_cumprida(recomendacao_id: int, antigo: bool, novo: bool):
+    """Ajusta qtd_cumpridas de todos os planos que contêm a recomendação."""
+    if bool(antigo) == bool(novo):
+        return
+    delta = 1 if novo else -1
+    PlanoDeAcao.objects.filter(planodeacaorecomendacao__recomendacao_id=recomendacao_id).update(
+        qtd_cumpridas=_somar("qtd_cumpridas", delta)
+    )
+
+
+def resumo_planos(planos_qs):
+    """
+    Resumo leve por plano e por cliente, sem carregar recomendações.
+    Vencidas = data_fim já passou, não cumprida e fora de "Finalizado" (calculado na hora,
+    pois depende da data atual).
+    """
+    planos = list(planos_qs.values("id", "cliente_id", "submission_id", *COUNTER_FIELDS))
+    ids = [p["id"] for p in planos]
+
+    vencidas = dict(
+        PlanoDeAcaoRecomendacao.objects
+        .filter(plano_id__in=ids, recomendacao__data_fim__lt=timezone.localdate(), recomendacao__cumprida=False)
+        .exclude(status="Finalizado")
+        .values_list("plano_id")
+        .annotate(n=Count("id"))
+    )
+
+    por_cliente = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS + ["qtd_vencidas", "qtd_planos"], 0))
+    out_planos = []
+    for p in planos:
+        p["qtd_vencidas"] = vencidas.get(p["id"], 0)
+        total = p["qtd_recomendacoes"]
+        p["percentual_cumpridas"] = round(100 * p["qtd_cumpridas"] / total, 2) if total else 0.0
+        out_planos.append(p)
+
+        agg = por_cliente[p["cliente_id"]]
+        agg["qtd_planos"] += 1
+        for field in COUNTER_FIELDS + ["qtd_vencidas"]:
+            agg[field] += p[field]
+
+    clientes = []
+    for cliente_id, agg in por_cliente.items():
+        total = agg["qtd_recomendacoes"]
+        agg["percentual_cumpridas"] = round(100 * agg["qtd_cumpridas"] / total, 2) if total else 0.0
+        clientes.append({"cliente_id": cliente_id, **agg})
+
+    return {"planos": out_planos, "clientes": clientes}
@@ -1,3 +1,170 @@
-from django.test import TestCase
+import itertools
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from frameworks.models import FormTemplate, Framework
+from monitoring.testing import QueryBudgetMixin
+from recommendations.models import Recomendacao
+from responses.models import Submission
+from users.models import CustomUser
+
+from .models import PlanoDeAcao, PlanoDeAcaoRecomendacao
+from .optimizer import Candidata, custo_recomendacao, parse_valor, resolver_mochila
+from .services import recalcular_resumo
+
+
+class PlanoQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """Orçamentos de settings.QUERY_BUDGETS: o nº de queries não pode crescer com a carteira."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = CustomUser.objects.create_user(
+            email="gestor@teste.local", password=None, nome="Gestor", role="gestor",
+        )
+        fw = Framework.objects.create(slug="fw-teste", name="Framework Teste")
+        tpl = FormTemplate.objects.create(name="Template Teste", slug="fw-teste-tpl", framework=fw)
+        hoje = date.today()
+        for i in range(3):
+            cliente = CustomUser.objects.create_user(
+                email=f"cliente-{i}@teste.local", password=None, nome=f"Cliente {i}", role="cliente",
+            )
+            sub = Submission.objects.create(customer=cliente, template=tpl, framework=fw)
+            plano = PlanoDeAcao.objects.create(cliente=cliente, criado_por=cls.gestor, submission_id=sub.id)
+            for k, status in enumerate(["A Fazer", "Em Progresso", "Finalizado"]):
+                rec = Recomendacao.objects.create(
+                    cliente=cliente, submission=sub, analista=cls.gestor,
+                    nome=f"Recomendação {k}", nist=f"PR.AA-0{k + 1}", categoria="Proteger (PR)",
+                    prioridade="media", data_inicio=hoje, data_fim=hoje + timedelta(days=30 * (k + 1)),
+                    meses=k + 1, detalhes="Teste.", investimentos="R$ 0", urgencia="3", gravidade="3",
+                )
+                PlanoDeAcaoRecomendacao.objects.create(plano=plano, recomendacao=rec, ordem=k, status=status)
+            recalcular_resumo(plano.id)
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.gestor)
+
+    def test_lista_de_planos(self):
+        resp = self.client.get(reverse("planodeacao-list-create"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertWithinQueryBudget(resp)
+
+    def test_resumo_de_planos(self):
+        resp = self.client.get(reverse("planodeacao-resumo"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertWithinQueryBudget(resp)
+
+
+class AtualizarKanbanTests(APITestCase):
+    def setUp(self):
+        self.gestor = CustomUser.objects.create_user(
+            email="gestor@teste.local", password=None, nome="Gestor", role="gestor",
+        )
+        cliente = CustomUser.objects.create_user(
+            email="cliente@teste.local", password=None, nome="Cliente", role="cliente",
+        )
+        fw = Framework.objects.create(slug="fw-teste", name="Framework Teste")
+        tpl = FormTemplate.objects.create(name="Template Teste", slug="fw-teste-tpl", framework=fw)
+        sub = Submission.objects.create(customer=cliente, template=tpl, framework=fw)
+        self.plano = PlanoDeAcao.objects.create(cliente=cliente, criado_por=self.gestor, submission_id=sub.id)
+        hoje = date.today()
+        self.recs = []
+        for k in range(2):
+            rec = Recomendacao.objects.create(
+                cliente=cliente, submission=sub, analista=self.gestor,
+                nome=f"Recomendação {k}", nist=f"PR.AA-0{k + 1}", categoria="Proteger (PR)",
+                prioridade="media", data_inicio=hoje, data_fim=hoje + timedelta(days=30),
+                meses=1, detalhes="Teste.", investimentos="R$ 0", urgencia="3", gravidade="3",
+            )
+            PlanoDeAcaoRecomendacao.objects.create(plano=self.plano, recomendacao=rec, ordem=k, status="A Fazer")
+            self.recs.append(rec)
+        recalcular_resumo(self.plano.id)
+        self.client.force_authenticate(user=self.gestor)
+
+    def _mover(self, *itens):
+        dados = [
+            {"plano_id": self.plano.id, "recomendacao_id": self.recs[k].id, "status": st, "ordem": 0}
+            for k, st in itens
+        ]
+        return self.client.post(reverse("kanban-update"), {"dados": dados}, format="json")
+
+    def _contadores(self):
+        self.plano.refresh_from_db()
+        return self.plano.qtd_a_fazer, self.plano.qtd_em_progresso, self.plano.qtd_finalizado
+
+    def test_move_e_atualiza_os_contadores(self):
+        self.assertEqual(self._mover((0, "Em Progresso"), (1, "Finalizado")).status_code, 200)
+        self.assertEqual(self._contadores(), (0, 1, 1))
+
+    def test_status_desconhecido_rejeita_o_lote_inteiro(self):
+        resp = self._mover((0, "Em Progresso"), (1, "Concluído"))
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self._contadores(), (2, 0, 0))
+        self.assertEqual(set(PlanoDeAcaoRecomendacao.objects.values_list("status", flat=True)), {"A Fazer"})
+
+
+def _cand(id, custo, ganho):
+    return Candidata(id=id, nome=f"R{id}", nist="PR.AA-01", funcao="PR", custo=custo, meses=1, risco=0, ganho=ganho)
+
+
+class ParseValorTests(SimpleTestCase):
+    def test_formatos(self):
+        self.assertEqual(parse_valor("R$ 50.000,00"), Decimal("50000.00"))
+        self.assertEqual(parse_valor("1.500"), Decimal("1500"))
+        self.assertEqual(parse_valor("1.234.567"), Decimal("1234567"))
+        self.assertEqual(parse_valor("12.5 mil"), Decimal("12.5"))
+        self.assertEqual(parse_valor(300), Decimal("300"))
+        self.assertIsNone(parse_valor("a combinar"))
+        self.assertIsNone(parse_valor(None))
+
+    @override_settings(PLANO_CUSTO_MES_PADRAO=1000)
+    def test_custo_recomendacao(self):
+        rec = SimpleNamespace(custo_estimado=Decimal("700"), investimentos="R$ 9.000,00", meses=3)
+        self.assertEqual(custo_recomendacao(rec), 700.0)
+        rec.custo_estimado = None
+        self.assertEqual(custo_recomendacao(rec), 9000.0)
+        rec.investimentos = "Licença anual"  # sem valor em R$: cai no custo por mês
+        self.assertEqual(custo_recomendacao(rec), 3000.0)
+
+
+class ResolverMochilaTests(SimpleTestCase):
+    def test_supera_o_guloso(self):
+        # guloso por densidade pega 1+2 (ganho 160); o ótimo é 2+3 (220)
+        itens = [_cand(1, 10, 60), _cand(2, 20, 100), _cand(3, 30, 120)]
+        escolhidos, exato = resolver_mochila(itens, 50)
+        self.assertTrue(exato)
+        self.assertEqual({c.id for c in escolhidos}, {2, 3})
+
+    def test_igual_a_forca_bruta(self):
+        rng = random.Random(7)
+        for _ in range(30):
+            itens = [_cand(i, rng.randint(1, 40), rng.randint(0, 30)) for i in range(10)]
+            capacidade = rng.randint(10, 150)
+            melhor = max(
+                sum(c.ganho for c in combo)
+                for n in range(len(itens) + 1)
+                for combo in itertools.combinations(itens, n)
+                if sum(c.custo for c in combo) <= capacidade
+            )
+            escolhidos, exato = resolver_mochila(itens, capacidade)
+            self.assertTrue(exato)
+            self.assertLessEqual(sum(c.custo for c in escolhidos), capacidade)
+            self.assertAlmostEqual(sum(c.ganho for c in escolhidos), melhor)
+
+    def test_gratis_sem_ganho_e_acima_do_orcamento(self):
+        itens = [_cand(1, 0, 5), _cand(2, 10, 0), _cand(3, 500, 100), _cand(4, 10, 1)]
+        escolhidos, _ = resolver_mochila(itens, 100)
+        self.assertEqual({c.id for c in escolhidos}, {1, 4})
+
+    def test_limite_de_nos_devolve_solucao_viavel(self):
+        rng = random.Random(3)
+        itens = [_cand(i, rng.randint(1, 50), rng.randint(1, 50)) for i in range(40)]
+        escolhidos, exato = resolver_mochila(itens, 300, max_nos=10)
+        self.assertFalse(exato)
+        self.assertLessEqual(sum(c.custo for c in escolhidos), 300)
+        self.assertTrue(escolhidos)
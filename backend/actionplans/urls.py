@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import AtualizarKanbanView, PlanoDeAcaoListCreateView
+from .views import AtualizarKanbanView, OtimizarPlanoView, PlanoDeAcaoListCreateView, PlanoDeAcaoResumoView
 
 urlpatterns = [
     path("", PlanoDeAcaoListCreateView.as_view(), name="planodeacao-list-create"),
     path("kanban/update/", AtualizarKanbanView.as_view(), name="kanban-update"),
+    path("resumo/", PlanoDeAcaoResumoView.as_view(), name="planodeacao-resumo"),
+    path("otimizar/", OtimizarPlanoView.as_view(), name="planodeacao-otimizar"),
 ]
@@ -1,16 +1,29 @@
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from responses.models import Submission
+from users.permissions import can_access_client
+from users.principal import get_principal
 from .models import PlanoDeAcao, PlanoDeAcaoRecomendacao
+from .optimizer import otimizar_plano, parse_valor
 from .serializers import PlanoDeAcaoSerializer
+from .services import aplicar_mudancas_status, resumo_planos
+
+# plano -> vínculos (ordenados) -> recomendação, em 2 queries além da principal
+PLANO_PREFETCH = Prefetch(
+    "planodeacaorecomendacao_set",
+    queryset=PlanoDeAcaoRecomendacao.objects.select_related("recomendacao").order_by("ordem"),
+    to_attr="vinculos_ordenados",
+)
 
 class PlanoDeAcaoListCreateView(generics.ListCreateAPIView):
     serializer_class = PlanoDeAcaoSerializer
 
     def get_queryset(self):
         submission_id = self.request.query_params.get("submission_id")
-        qs = PlanoDeAcao.objects
+        qs = PlanoDeAcao.objects.select_related("cliente", "criado_por").prefetch_related(PLANO_PREFETCH)
         if submission_id:
             qs = qs.filter(submission_id=submission_id)
         return qs
@@ -21,7 +34,12 @@ class PlanoDeAcaoListCreateView(generics.ListCreateAPIView):
         submission_id = dados.get("submission_id")
 
         if getattr(user, "role", None) in ["funcionario", "gestor"]:
-            existente = PlanoDeAcao.objects.filter(criado_por=user, submission_id=submission_id).first()
+            existente = (
+                PlanoDeAcao.objects
+                .select_related("cliente", "criado_por")
+                .filter(criado_por=user, submission_id=submission_id)
+                .first()
+            )
             if existente:
                 serializer = self.get_serializer(existente, data=dados, partial=True)
                 serializer.is_valid(raise_exception=True)
@@ -33,18 +51,103 @@ class PlanoDeAcaoListCreateView(generics.ListCreateAPIView):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+STATUS_KANBAN = {value for value, _ in PlanoDeAcaoRecomendacao.STATUS_CHOICES}
+
+
 class AtualizarKanbanView(APIView):
     def post(self, request):
         dados = request.data.get("dados", [])
+        # valida o lote inteiro antes de aplicar: status desconhecido desconta uma coluna
+        # sem somar em nenhuma e os contadores do plano (qtd_*) divergem
+        if not isinstance(dados, list) or any(
+            not isinstance(item, dict) or item.get("status") not in STATUS_KANBAN
+            for item in dados
+        ):
+            return Response(
+                {"detail": f"Status inválido. Use: {', '.join(sorted(STATUS_KANBAN))}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        mudancas = []
         for item in dados:
             try:
                 rel = PlanoDeAcaoRecomendacao.objects.get(
                     plano_id=item["plano_id"], recomendacao_id=item["recomendacao_id"]
                 )
+                mudancas.append((rel.plano_id, rel.status, item["status"]))
                 rel.status = item["status"]
                 rel.ordem = item["ordem"]
                 rel.data_alteracao = timezone.now()
                 rel.save()
             except PlanoDeAcaoRecomendacao.DoesNotExist:
                 continue
+        aplicar_mudancas_status(mudancas)
         return Response({"detail": "Kanban atualizado com sucesso!"}, status=status.HTTP_200_OK)
+
+class PlanoDeAcaoResumoView(APIView):
+    """
+    GET /api/planos/resumo/?cliente_id=&submission_id=
+
+    Contadores por plano e por cliente (status do kanban, cumpridas, vencidas)
+    sem serializar as recomendações.
+    """
+    def get(self, request):
+        qs = PlanoDeAcao.objects.all()
+        principal = get_principal(request.user)
+        if not principal.is_staff_like:
+            qs = qs.filter(cliente_id__in=principal.client_ids)
+        cliente_id = request.query_params.get("cliente_id")
+        submission_id = request.query_params.get("submission_id")
+        if cliente_id:
+            try:
+                cliente_id = int(cliente_id)
+            except ValueError:
+                return Response({"detail": "cliente_id inválido."}, status=status.HTTP_400_BAD_REQUEST)
+            if not principal.can_access_client(cliente_id):
+                return Response({"detail": "Sem permissão."}, status=status.HTTP_403_FORBIDDEN)
+            qs = qs.filter(cliente_id=cliente_id)
+        if submission_id:
+            qs = qs.filter(submission_id=submission_id)
+        return Response(resumo_planos(qs.order_by("id")), status=status.HTTP_200_OK)
+
+
+class OtimizarPlanoView(APIView):
+    """
+    POST /api/planos/otimizar/
+    {"submission_id": 12, "orcamento": 150000, "horizonte_meses": 6, "alvo": 3}
+    ou {"plano_id": 5} para usar orcamentoMax/prazo/submission de um plano existente.
+
+    Devolve a proposta (recomendações escolhidas e ordenadas + médias projetadas por
+    função); não grava nada — o front cria/atualiza o plano com `recomendacoes_ordem`.
+    """
+    def post(self, request):
+        dados = request.data
+        plano = None
+        if dados.get("plano_id"):
+            plano = PlanoDeAcao.objects.filter(id=dados["plano_id"]).first()
+            if plano is None:
+                return Response({"detail": "Plano não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+        submission_id = dados.get("submission_id") or (plano.submission_id if plano else None)
+        orcamento = parse_valor(dados.get("orcamento") or (plano.orcamentoMax if plano else None))
+        horizonte = dados.get("horizonte_meses") or (parse_valor(plano.prazo) if plano else None)
+        if not submission_id or orcamento is None:
+            return Response(
+                {"detail": "Informe submission_id e orcamento (ou um plano com orcamentoMax)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        submission = Submission.objects.select_related("framework").filter(id=submission_id).first()
+        if submission is None:
+            return Response({"detail": "Submission não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        if not can_access_client(request.user, submission.customer_id):
+            return Response({"detail": "Sem permissão."}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            proposta = otimizar_plano(
+                submission, orcamento,
+                horizonte_meses=int(horizonte) if horizonte else None,
+                alvo=dados.get("alvo"),
+            )
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(proposta, status=status.HTTP_200_OK)
@@ -15,3 +15,11 @@ class AssessmentsConfig(AppConfig):
         except Exception as e:
             # opcional: logar isso
             print(f"[assessments] calculators autoload error: {e}")
+
+        from . import signals  # noqa: F401  (PeerBenchmark ao apagar assessments)
+
+        # imports pesados já no boot (sem banco); caches são montados pelos hooks do gunicorn
+        from django.conf import settings
+        if getattr(settings, "WARMUP_ON_READY", False):
+            from .warmup import preimport
+            preimport()
@@ -0,0 +1,189 @@
+# assessments/benchmark.py
+"""
+Benchmark entre pares: como a média de um cliente em cada função/categoria/controle se
+compara com a dos demais clientes do mesmo framework.
+
+Em vez de varrer os AssessmentBucket de toda a carteira a cada consulta, a distribuição
+fica materializada em PeerBenchmark (uma linha por framework/nível/código) e é ajustada
+por delta: run_assessment tira um retrato das médias antes e depois do cálculo e
+apply_delta remove as antigas e soma as novas, na mesma transação. Apagar um assessment
+desconta as médias dele (assessments/signals.py). `manage.py rebuild_peer_benchmark`
+reconstrói tudo do zero (backfill / cálculos feitos fora do run_assessment).
+
+Cada cliente conta uma única vez por framework — só o assessment mais recente dele entra
+na distribuição (counts_as_peer no recálculo, o mesmo critério no rebuild) —, então
+`count` é o nº de clientes distintos e o mínimo BENCHMARK_MIN_PEERS vale para clientes.
+
+A consulta (compare) lê só os buckets do cliente e as linhas do framework: O(buckets),
+independente do tamanho da carteira.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Assessment, AssessmentBucket, PeerBenchmark
+
+QUANTIS = (0.25, 0.5, 0.75, 0.9)
+
+
+def _bin(media) -> str | None:
+    if media is None:
+        return None
+    try:
+        return str(int(round(float(media) * 10)))
+    except (TypeError, ValueError):
+        return None
+
+
+def counts_as_peer(assessment) -> bool:
+    """
+    O assessment é o mais recente do cliente neste framework? (Hoje a constraint
+    uniq_submission_per_customer_framework já garante um só, mas a distribuição não
+    depende disso.)
+    """
+    return not (
+        Assessment.objects.filter(
+            framework_id=assessment.framework_id,
+            submission__customer_id=assessment.submission.customer_id,
+            updated_at__gt=assessment.updated_at,
+        ).exclude(pk=assessment.pk).exists()
+    )
+
+
+def snapshot(assessment_id) -> dict:
+    """{(level, code): bin} das médias gravadas do assessment (vazio se não existir)."""
+    if not assessment_id:
+        return {}
+    rows = AssessmentBucket.objects.filter(assessment_id=assessment_id).values_list("level", "code", "metrics__media")
+    return {(level, code): b for level, code, media in rows if (b := _bin(media)) is not None}
+
+
+def apply_delta(framework_id, old: dict, new: dict):
+    """Desconta `old` e soma `new` (retratos de snapshot) nas linhas do framework."""
+    removed = {k: v for k, v in old.items() if new.get(k) != v}
+    added = {k: v for k, v in new.items() if old.get(k) != v}
+    keys = set(removed) | set(added)
+    if not framework_id or not keys:
+        return
+
+    with transaction.atomic():
+        PeerBenchmark.objects.bulk_create(
+            [PeerBenchmark(framework_id=framework_id, level=level, code=code) for level, code in added],
+            ignore_conflicts=True,
+        )
+        # trava em ordem fixa (level, code): recálculos concorrentes do mesmo framework não se travam mutuamente
+        rows = (
+            PeerBenchmark.objects.select_for_update()
+            .filter(framework_id=framework_id, code__in={code for _, code in keys})
+            .order_by("level", "code")
+        )
+        changed = []
+        for row in rows:
+            key = (row.level, row.code)
+            if key not in keys:
+                continue
+            hist = Counter(row.histogram)
+            # só desconta o que foi somado antes (assessment anterior ao backfill não entrou)
+            if key in removed and hist[removed[key]] > 0:
+                hist[removed[key]] -= 1
+            if key in added:
+                hist[added[key]] += 1
+            row.histogram = {b: n for b, n in hist.items() if n > 0}
+            row.count = sum(row.histogram.values())
+            changed.append(row)
+        PeerBenchmark.objects.bulk_update(changed, ["count", "histogram", "updated_at"])
+
+
+def frameworks_missing() -> list:
+    """Frameworks com assessments mas sem nenhuma linha de benchmark (ainda sem backfill)."""
+    return list(
+        Assessment.objects.exclude(framework_id__in=PeerBenchmark.objects.values("framework_id"))
+        .values_list("framework_id", flat=True).distinct()
+    )
+
+
+def rebuild(framework_id=None) -> int:
+    """
+    Recalcula as distribuições a partir dos buckets gravados — só o assessment mais recente
+    de cada cliente por framework (um cliente conta como um par). Retorna o nº de linhas.
+    """
+    latest = (
+        Assessment.objects.order_by("submission__customer_id", "framework_id", "-updated_at", "-id")
+        .distinct("submission__customer_id", "framework_id")
+    )
+    if framework_id:
+        latest = latest.filter(framework_id=framework_id)
+    qs = AssessmentBucket.objects.filter(assessment_id__in=latest.values("id"))
+    acc = {}
+    for fw_id, level, code, media in qs.values_list("assessment__framework_id", "level", "code", "metrics__media").iterator(chunk_size=5000):
+        b = _bin(media)
+        if b is None:
+            continue
+        acc.setdefault((fw_id, level, code), Counter())[b] += 1
+
+    rows = [
+        PeerBenchmark(
+            framework_id=fw_id, level=level, code=code, histogram=dict(hist), count=sum(hist.values()),
+        )
+        for (fw_id, level, code), hist in acc.items()
+    ]
+    with transaction.atomic():
+        old = PeerBenchmark.objects.all()
+        if framework_id:
+            old = old.filter(framework_id=framework_id)
+        old.delete()
+        PeerBenchmark.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def sketch_stats(row: PeerBenchmark) -> dict:
+    """count/média/quantis a partir do histograma (até 51 bins)."""
+    bins = sorted((int(b), n) for b, n in row.histogram.items())
+    count = sum(n for _, n in bins)
+    # média exata a partir do histograma (soma de inteiros, sem acumular erro de float)
+    mean = sum(b * n for b, n in bins) / count / 10 if count else None
+    stats = {"count": count, "mean": None if mean is None else round(mean, 2)}
+    for q in QUANTIS:
+        alvo, acumulado, valor = q * count, 0, None
+        for b, n in bins:
+            acumulado += n
+            if acumulado >= alvo:
+                valor = b / 10
+                break
+        stats[f"p{int(q * 100)}"] = valor
+    return stats
+
+
+def percentile_rank(row: PeerBenchmark, media) -> float | None:
+    """% de pares abaixo da média informada (empates contam pela metade)."""
+    b = _bin(media)
+    if b is None or not row.count:
+        return None
+    b = int(b)
+    below = sum(n for k, n in row.histogram.items() if int(k) < b)
+    equal = row.histogram.get(str(b), 0)
+    return round(100 * (below + equal / 2) / row.count, 1)
+
+
+def compare(assessment, level=None) -> list:
+    """Por bucket do assessment: média do cliente + distribuição dos pares."""
+    buckets = AssessmentBucket.objects.filter(assessment=assessment).order_by("level", "order", "code")
+    peers = PeerBenchmark.objects.filter(framework_id=assessment.framework_id)
+    if level:
+        buckets = buckets.filter(level=level)
+        peers = peers.filter(level=level)
+    peers = {(p.level, p.code): p for p in peers}
+    min_peers = getattr(settings, "BENCHMARK_MIN_PEERS", 5)
+
+    result = []
+    for bucket in buckets:
+        media = (bucket.metrics or {}).get("media")
+        row = peers.get((bucket.level, bucket.code))
+        item = {"level": bucket.level, "code": bucket.code, "name": bucket.name, "media": media, "peers": None}
+        # com poucos pares a distribuição deixaria inferir notas de outros clientes
+        # (row.count = clientes distintos: ver counts_as_peer)
+        if row is not None and row.count >= min_peers:
+            item["peers"] = {**sketch_stats(row), "percentile": percentile_rank(row, media)}
+        result.append(item)
+    return result
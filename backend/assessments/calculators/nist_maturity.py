@@ -1,8 +1,10 @@
 from decimal import Decimal
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 import json
 
-from assessments.engine import register, to_decimal, status_from_goal
+from assessments.engine import register, register_simulator, to_decimal, status_from_goal
+from frameworks.models import Question
+from frameworks.taxonomy import ControlInfo, QuestionInfo, get_index
 from responses.models import Answer
 
 
@@ -38,8 +40,21 @@ def _extract_numeric(ans):
     return Decimal("0")
 
 
-@register("maturity-1-5")
-def calculate_nist_maturity(assessment, fw_config):
+DEFAULT_MAPPING = {
+    "goal": 3.0,
+    "score_code": "score",
+    "use_policy_practice": False,
+    "policy_code": "politica",
+    "practice_code": "pratica",
+    "info_code": "info",
+    "attachment_code": "attachment",
+}
+
+# resposta "em memória": o que o cálculo lê de Answer
+AnswerRow = namedtuple("AnswerRow", ["question_id", "score", "value", "evidence"])
+
+
+def resolve_mapping(fw_config):
     """
     fw_config.mapping esperado:
     {
@@ -52,26 +67,86 @@ def calculate_nist_maturity(assessment, fw_config):
       "attachment_code": "attachment" # opcional (default)
     }
     """
-    mapping = {
-        "goal": 3.0,
-        "score_code": "score",
-        "use_policy_practice": False,
-        "policy_code": "politica",
-        "practice_code": "pratica",
-        "info_code": "info",
-        "attachment_code": "attachment",
-    }
+    mapping = dict(DEFAULT_MAPPING)
     mapping.update(getattr(fw_config, "mapping", {}) or {})
+    return mapping
 
-    goal = Decimal(str(mapping["goal"]))
-    use_pp = bool(mapping.get("use_policy_practice"))
 
-    # carrega respostas
-    answers = (
-        Answer.objects
-        .filter(submission=assessment.submission)
-        .select_related("question__control__domain")
+def load_taxonomy(framework, question_ids):
+    """(questions, controls) do índice em memória, completando perguntas de fora do framework."""
+    index = get_index(framework)
+    questions, ctl_info = index.questions, index.controls
+    missing = {qid for qid in question_ids if qid not in questions}
+    if missing:
+        # perguntas fora do framework do assessment: busca só essas (sem mexer no índice)
+        questions, ctl_info = dict(questions), dict(ctl_info)
+        for q in Question.objects.filter(id__in=missing).select_related("control__domain"):
+            ctl, dom = q.control, q.control.domain
+            questions[q.id] = QuestionInfo(q.id, ctl.id, (q.local_code or "").strip(), q.type)
+            ctl_info[ctl.id] = ControlInfo(ctl.id, ctl.code, ctl.title or ctl.code, dom.id, dom.code, dom.title)
+    return questions, ctl_info
+
+
+@register("maturity-1-5")
+def calculate_nist_maturity(assessment, fw_config):
+    """Calcula e grava buckets + summary do assessment (ver compute_maturity)."""
+    from assessments.models import AssessmentBucket
+
+    answers = list(Answer.objects.filter(submission=assessment.submission))
+    questions, ctl_info = load_taxonomy(assessment.framework, {a.question_id for a in answers})
+    result = compute_maturity(answers, questions, ctl_info, resolve_mapping(fw_config))
+
+    AssessmentBucket.objects.filter(assessment=assessment).delete()
+    AssessmentBucket.objects.bulk_create(
+        [AssessmentBucket(assessment=assessment, **b) for b in result["buckets"]],
+        batch_size=500,
     )
+    assessment.summary = result["summary"]
+    assessment.save()
+    return assessment
+
+
+@register_simulator("maturity-1-5")
+def simulate_nist_maturity(submission, fw_config, question_overrides=None, control_overrides=None):
+    """
+    What-if sem gravar nada: respostas atuais (uma query enxuta) + overrides.
+    question_overrides: {question_id: valor}; control_overrides: {"GV.OC-01": 3, ...}.
+    """
+    current = {
+        row[0]: AnswerRow(*row)
+        for row in Answer.objects.filter(submission=submission).values_list("question_id", "score", "value", "evidence")
+    }
+    projected = dict(current)
+    for qid, value in (question_overrides or {}).items():
+        projected[int(qid)] = AnswerRow(int(qid), None, value, None)
+
+    questions, ctl_info = load_taxonomy(submission.framework, set(projected))
+    mapping = resolve_mapping(fw_config)
+    result = compute_maturity(
+        projected.values(), questions, ctl_info, mapping, control_overrides=control_overrides, details=False
+    )
+    if question_overrides or control_overrides:
+        result["baseline_summary"] = compute_maturity(
+            current.values(), questions, ctl_info, mapping, details=False
+        )["summary"]
+    else:
+        result["baseline_summary"] = result["summary"]
+    return result
+
+
+def compute_maturity(answers, questions, ctl_info, mapping, control_overrides=None, details=True):
+    """
+    Cálculo puro (sem banco) da maturidade 1-5.
+
+    answers: iteráveis com question_id, score, value, evidence (Answer ou AnswerRow)
+    questions/ctl_info: dicts do índice de taxonomia (frameworks.taxonomy)
+    control_overrides: {código do controle: nota} — força a nota do controle (what-if)
+    details: inclui notas/anexos por controle (desligado na simulação)
+
+    Retorna {"buckets": [{level, code, name, order, metrics}], "summary": {...}}.
+    """
+    goal = Decimal(str(mapping["goal"]))
+    use_pp = bool(mapping.get("use_policy_practice"))
 
     # estruturas
     controls = {}                 # ctl_code -> info e valores
@@ -82,18 +157,18 @@ def calculate_nist_maturity(assessment, fw_config):
     control_notes = defaultdict(list)       # ctl_code -> [str]
     control_attachments = defaultdict(list) # ctl_code -> [ {name, url, description} ]
 
-    def ensure_ctl(ctl, dom):
+    def ensure_ctl(ctl):
         code = ctl.code                       # ex: "GV.RM-02"
         if code not in controls:
             cat_code = code.split("-")[0]     # ex: "GV.RM"
             func_code = cat_code.split(".")[0]  # ex: "GV"
-            if getattr(dom, "title", None):
-                names_function[func_code] = dom.title
+            if ctl.domain_title:
+                names_function[func_code] = ctl.domain_title
             cat_to_func[cat_code] = func_code
             controls[code] = {
                 "func": func_code,
                 "cat": cat_code,
-                "title": ctl.title or code,
+                "title": ctl.title,
                 "name": code,
                 "policy_vals": [],
                 "practice_vals": [],
@@ -108,14 +183,13 @@ def calculate_nist_maturity(assessment, fw_config):
     score_lc  = (mapping.get("score_code") or "score").strip()
 
     for ans in answers:
-        q = getattr(ans, "question", None)
-        ctl = getattr(q, "control", None)
-        dom = getattr(ctl, "domain", None)
-        if not q or not ctl or not dom:
+        q = questions.get(ans.question_id)
+        ctl = ctl_info.get(q.control_id) if q else None
+        if not q or not ctl:
             continue
 
-        local = (q.local_code or "").strip()
-        rec = ensure_ctl(ctl, dom)
+        local = q.local_code
+        rec = ensure_ctl(ctl)
 
         # coleta valores de política/prática/score
         if use_pp:
@@ -129,6 +203,9 @@ def calculate_nist_maturity(assessment, fw_config):
             if local == score_lc:
                 rec["score_vals"].append(_extract_numeric(ans))
 
+        if not details:
+            continue
+
         # coleta NOTES (info + evidence)
         ev = getattr(ans, "evidence", None)
         if ev:
@@ -168,6 +245,21 @@ def calculate_nist_maturity(assessment, fw_config):
                 payload = {"name": None, "url": None, "description": None}
             control_attachments[ctl.code].append(payload)
 
+    # what-if: nota forçada por controle (cria o controle mesmo sem respostas)
+    if control_overrides:
+        by_code = {c.code: c for c in ctl_info.values()}
+        for code, value in control_overrides.items():
+            ctl = by_code.get(code)
+            if ctl is None:
+                continue
+            rec = ensure_ctl(ctl)
+            forced = [to_decimal(value)]
+            rec["score_vals"] = list(forced)
+            if use_pp:
+                rec["policy_vals"], rec["practice_vals"] = list(forced), list(forced)
+
+    buckets = []
+
     # agregadores
     agg_function           = defaultdict(list)   # "GV" -> [médias de controles]
     agg_category           = defaultdict(list)   # "GV.RM" -> [médias de controles]
@@ -179,9 +271,6 @@ def calculate_nist_maturity(assessment, fw_config):
     category_items         = defaultdict(list)   # "GV.RM" -> [dicts de controles] (para exibir)
     category_metrics_cache = {}                  # "GV.RM" -> metrics dict completo
 
-    from assessments.models import AssessmentBucket
-    AssessmentBucket.objects.filter(assessment=assessment).delete()
-
     total_vals_for_summary = []
 
     def avg(vals):
@@ -227,14 +316,13 @@ def calculate_nist_maturity(assessment, fw_config):
             metrics["politica"] = None if mp is None else float(mp.quantize(Decimal("0.1")))
             metrics["pratica"]  = None if mr is None else float(mr.quantize(Decimal("0.1")))
 
-        AssessmentBucket.objects.create(
-            assessment=assessment,
-            level="CONTROL",
-            code=ctl_code,
-            name=rec["name"],
-            order=order,
-            metrics=metrics,
-        )
+        buckets.append({
+            "level": "CONTROL",
+            "code": ctl_code,
+            "name": rec["name"],
+            "order": order,
+            "metrics": metrics,
+        })
         order += 1
 
         # item da lista da categoria (com notas e anexos)
@@ -279,14 +367,13 @@ def calculate_nist_maturity(assessment, fw_config):
         # cache para usar dentro da FUNÇÃO
         category_metrics_cache[cat_code] = metrics
 
-        AssessmentBucket.objects.create(
-            assessment=assessment,
-            level="CATEGORY",
-            code=cat_code,
-            name=cat_code,
-            order=order,
-            metrics=metrics,
-        )
+        buckets.append({
+            "level": "CATEGORY",
+            "code": cat_code,
+            "name": cat_code,
+            "order": order,
+            "metrics": metrics,
+        })
         order += 1
 
     # ---------- FUNCTION (com CATEGORIAS dentro) ----------
@@ -330,26 +417,24 @@ def calculate_nist_maturity(assessment, fw_config):
                 mr_fun = sum(mr_list) / Decimal(len(mr_list))
                 metrics["media_pratica"] = float(mr_fun.quantize(Decimal("0.1")))
 
-        AssessmentBucket.objects.create(
-            assessment=assessment,
-            level="FUNCTION",
-            code=func_code,
-            name=names_function.get(func_code, func_code),
-            order=order,
-            metrics=metrics,
-        )
+        buckets.append({
+            "level": "FUNCTION",
+            "code": func_code,
+            "name": names_function.get(func_code, func_code),
+            "order": order,
+            "metrics": metrics,
+        })
         order += 1
 
     # ---------- SUMMARY ----------
     if total_vals_for_summary:
         m_total = sum(total_vals_for_summary) / Decimal(len(total_vals_for_summary))
-        assessment.summary = {
+        summary = {
             "media_geral": float(m_total.quantize(Decimal("0.1"))),
             "objetivo": float(goal),
             "status": status_from_goal(m_total, goal),
         }
     else:
-        assessment.summary = {"media_geral": 0.0, "objetivo": float(goal), "status": "Não Avaliado"}
+        summary = {"media_geral": 0.0, "objetivo": float(goal), "status": "Não Avaliado"}
 
-    assessment.save()
-    return assessment
+    return {"buckets": buckets, "summary": summary}
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 REGISTRY = {}  # slug -> callable
+SIMULATORS = {}  # slug -> callable (what-if, sem gravar nada)
 
 def register(slug):
     def deco(fn):
@@ -8,6 +9,12 @@ def register(slug):
         return fn
     return deco
 
+def register_simulator(slug):
+    def deco(fn):
+        SIMULATORS[slug] = fn
+        return fn
+    return deco
+
 LABEL_MAP = {
     "Inicial": 1, "Repetido": 2, "Definido": 3, "Gerenciado": 4, "Otimizado": 5
 }
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from assessments import benchmark
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a tabela PeerBenchmark a partir dos buckets gravados (backfill / correção de deriva)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--framework", type=int, default=None, help="Só este framework (id).")
+        parser.add_argument(
+            "--missing", action="store_true",
+            help="Só frameworks com assessments e sem benchmark ainda (backfill barato; roda no deploy).",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["missing"]:
+            ids = benchmark.frameworks_missing()
+            total = sum(benchmark.rebuild(fw_id) for fw_id in ids)
+            self.stdout.write(self.style.SUCCESS(f"PeerBenchmark: {len(ids)} frameworks, {total} linhas criadas."))
+            return
+        total = benchmark.rebuild(opts["framework"])
+        self.stdout.write(self.style.SUCCESS(f"PeerBenchmark: {total} linhas reconstruídas."))
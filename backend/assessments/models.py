@@ -34,6 +34,8 @@ class Assessment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     summary = models.JSONField(default=dict, blank=True)  # médias gerais, status, etc.
+    # impressão digital das respostas + calculadora + mapping usada no último cálculo
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
 
     def __str__(self):
         return f"{self.assessment_type.slug} - sub#{self.submission_id}"
@@ -59,3 +61,25 @@ class AssessmentBucket(models.Model):
 
     def __str__(self):
         return f"{self.assessment_id} {self.level}:{self.code}"
+
+
+class PeerBenchmark(models.Model):
+    """
+    Distribuição das médias de todos os clientes por (framework, nível, código) —
+    materializada e mantida incrementalmente a cada recálculo (assessments/benchmark.py).
+
+    `histogram` conta as médias em passos de 0,1 ({"27": 4} = quatro clientes com 2.7);
+    como as médias dos buckets já são arredondadas em 0,1, média e quantis saem exatos.
+    """
+    framework = models.ForeignKey(Framework, on_delete=models.CASCADE, related_name="peer_benchmarks")
+    level = models.CharField(max_length=10, choices=AssessmentBucket.Level.choices)
+    code = models.CharField(max_length=32)
+    count = models.PositiveIntegerField(default=0)
+    histogram = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("framework", "level", "code")
+
+    def __str__(self):
+        return f"fw#{self.framework_id} {self.level}:{self.code} (n={self.count})"
@@ -27,3 +27,17 @@ class AssessmentSerializer(serializers.ModelSerializer):
             )
         ).order_by("level_rank", "order", "code")
         return AssessmentBucketSerializer(qs, many=True).data
+
+
+class SimulationRequestSerializer(serializers.Serializer):
+    """Corpo do what-if: notas forçadas por controle e/ou valores por pergunta."""
+    type = serializers.CharField(required=False, allow_blank=True)
+    controls = serializers.DictField(child=serializers.JSONField(), required=False, default=dict)
+    questions = serializers.DictField(child=serializers.JSONField(), required=False, default=dict)
+    only = serializers.ChoiceField(choices=["function", "category", "control"], required=False)
+
+    def validate_questions(self, value):
+        try:
+            return {int(k): v for k, v in value.items()}
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("As chaves devem ser ids de pergunta.")
@@ -1,16 +1,48 @@
-from django.db import transaction
-from assessments.engine import REGISTRY
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from assessments import benchmark
+from assessments.engine import REGISTRY, SIMULATORS
 from assessments.models import Assessment, AssessmentType, FrameworkAssessmentConfig
 # ajuste import do Submission conforme seu app
-from responses.models import Submission
+from responses.models import Answer, Submission
+from monitoring import metrics
 
-def run_assessment(submission_id: int, assessment_type_slug: str | None = None):
-    submission = Submission.objects.select_related("framework").get(id=submission_id)
-    framework = submission.framework
+# namespace dos advisory locks de recálculo (pg_advisory_xact_lock(ns, submission_id))
+ASSESSMENT_LOCK_NS = 4401
+
+
+class AssessmentBusy(Exception):
+    """Outro recálculo da mesma submissão não terminou dentro de ASSESSMENT_LOCK_TIMEOUT."""
+
+
+def _acquire_submission_lock(submission_id: int) -> bool:
+    """
+    Single-flight por submissão (dentro da transação atual; liberado no commit/rollback).
+    Retorna True se precisou esperar outro recálculo terminar.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [ASSESSMENT_LOCK_NS, submission_id])
+        if cur.fetchone()[0]:
+            return False
+        timeout_ms = int(getattr(settings, "ASSESSMENT_LOCK_TIMEOUT", 30) * 1000)
+        cur.execute(f"SET LOCAL lock_timeout = {timeout_ms}")
+        try:
+            cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ASSESSMENT_LOCK_NS, submission_id])
+        except OperationalError as e:
+            raise AssessmentBusy("Recálculo desta submissão já em andamento; tente novamente.") from e
+        cur.execute("SET LOCAL lock_timeout = DEFAULT")
+    return True
 
-    # descobrir tipo
-    fw_cfg = None
-    at = None
+
+def resolve_config(framework, assessment_type_slug: str | None = None):
+    """(AssessmentType, FrameworkAssessmentConfig) pedido, ou o padrão do framework."""
     if assessment_type_slug:
         at = AssessmentType.objects.get(slug=assessment_type_slug)
         fw_cfg = FrameworkAssessmentConfig.objects.get(framework=framework, assessment_type=at)
@@ -19,14 +51,122 @@ def run_assessment(submission_id: int, assessment_type_slug: str | None = None):
         if not fw_cfg:
             raise ValueError("Nenhuma avaliação padrão configurada para este framework.")
         at = fw_cfg.assessment_type
+    return at, fw_cfg
+
+
+def answers_fingerprint(submission_id: int) -> str:
+    """
+    Impressão digital barata do conjunto de respostas: quantidade, último answered_at e
+    um hash de (id, pergunta, answered_at, score, value, evidence) de todas as linhas —
+    pega também updates em massa que não tocam answered_at. Uma única query agregada.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT count(*), max(answered_at),
+                       md5(string_agg(
+                           concat_ws('|', id, question_id, answered_at, score, value::text, evidence),
+                           E'\\n' ORDER BY id))
+                FROM {Answer._meta.db_table} WHERE submission_id = %s
+                """,
+                [submission_id],
+            )
+            count, last, digest = cur.fetchone()
+    else:
+        rows = list(
+            Answer.objects.filter(submission_id=submission_id).order_by("id")
+            .values_list("id", "question_id", "answered_at", "score", "value", "evidence")
+        )
+        count = len(rows)
+        last = max((r[2] for r in rows), default=None)
+        digest = hashlib.md5(repr(rows).encode()).hexdigest()
+    return f"{count}|{last}|{digest}"
+
+
+def assessment_fingerprint(submission_id: int, fw_cfg, framework) -> str:
+    """Respostas + calculadora + mapping + versão da taxonomia (Framework.updated_at)."""
+    parts = [
+        answers_fingerprint(submission_id),
+        fw_cfg.assessment_type.slug,
+        json.dumps(fw_cfg.mapping or {}, sort_keys=True, default=str),
+        str(framework.updated_at),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def run_assessment(submission_id: int, assessment_type_slug: str | None = None, force: bool = False):
+    """
+    Recalcula o assessment da submissão.
+
+    Chamadas concorrentes para a mesma submissão não recalculam em paralelo: a segunda
+    espera a primeira (advisory lock) e, se o assessment foi gravado depois que ela
+    chegou, devolve esse resultado em vez de recalcular.
+
+    Sem `force`, se respostas/calculadora/mapping não mudaram desde o último cálculo
+    (mesma impressão digital), devolve o assessment gravado sem recalcular.
+    """
+    requested_at = timezone.now()
+    submission = Submission.objects.select_related("framework").get(id=submission_id)
+    framework = submission.framework
+
+    at, fw_cfg = resolve_config(framework, assessment_type_slug)
 
     calc = REGISTRY.get(at.slug)
     if not calc:
         raise ValueError(f"Não há calculadora registrada para '{at.slug}'.")
 
+    started = time.perf_counter()
     with transaction.atomic():
+        if _acquire_submission_lock(submission.id):
+            fresh = (
+                Assessment.objects
+                .filter(submission=submission, assessment_type=at, updated_at__gte=requested_at)
+                .first()
+            )
+            if fresh is not None:
+                metrics.inc("fs3m_assessment_singleflight_total", {"result": "reused"})
+                return fresh
+
+        fingerprint = assessment_fingerprint(submission.id, fw_cfg, framework)
+        if not force:
+            unchanged = Assessment.objects.filter(
+                submission=submission, assessment_type=at, framework=framework, fingerprint=fingerprint
+            ).first()
+            if unchanged is not None:
+                metrics.inc("fs3m_assessment_singleflight_total", {"result": "unchanged"})
+                return unchanged
+
+        previous = Assessment.objects.select_related("submission").filter(submission=submission).first()
+        before = benchmark.snapshot(previous.id) if previous and benchmark.counts_as_peer(previous) else {}
+
         assessment, _ = Assessment.objects.update_or_create(
             submission=submission,
-            defaults={"assessment_type": at, "framework": framework}
+            defaults={"assessment_type": at, "framework": framework, "fingerprint": fingerprint}
         )
-        return calc(assessment, fw_cfg)
+        result = calc(assessment, fw_cfg)
+
+        # distribuição dos pares (PeerBenchmark): tira as médias antigas, soma as novas
+        after = benchmark.snapshot(assessment.id) if benchmark.counts_as_peer(assessment) else {}
+        if previous and previous.framework_id != framework.id:
+            benchmark.apply_delta(previous.framework_id, before, {})
+            before = {}
+        benchmark.apply_delta(framework.id, before, after)
+    metrics.inc("fs3m_assessment_singleflight_total", {"result": "computed"})
+    metrics.observe("fs3m_assessment_duration_seconds", time.perf_counter() - started, {"calculator": at.slug})
+    return result
+
+
+def simulate_assessment(submission, assessment_type_slug=None, question_overrides=None, control_overrides=None):
+    """
+    What-if: árvore de buckets projetada com as respostas atuais + overrides, sem gravar nada.
+    Retorna {"buckets": [...], "summary": {...}, "baseline_summary": {...}}.
+    """
+    at, fw_cfg = resolve_config(submission.framework, assessment_type_slug)
+    simulator = SIMULATORS.get(at.slug)
+    if not simulator:
+        raise ValueError(f"Não há simulação disponível para '{at.slug}'.")
+    started = time.perf_counter()
+    result = simulator(submission, fw_cfg, question_overrides, control_overrides)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
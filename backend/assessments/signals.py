@@ -0,0 +1,14 @@
+# assessments/signals.py
+"""Assessment apagado (inclusive em cascata da submissão) sai da distribuição dos pares."""
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from . import benchmark
+from .models import Assessment
+
+
+@receiver(pre_delete, sender=Assessment)
+def _assessment_deleted(sender, instance, **kwargs):
+    # pre_delete: os buckets ainda existem aqui
+    if benchmark.counts_as_peer(instance):
+        benchmark.apply_delta(instance.framework_id, benchmark.snapshot(instance.pk), {})
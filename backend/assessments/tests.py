@@ -1,3 +1,149 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from frameworks.models import Control, Domain, FormTemplate, Framework, Question
+from responses.models import Answer, Submission
+from users.models import CustomUser
+
+from . import benchmark
+from .engine import REGISTRY
+from .models import Assessment, AssessmentBucket, AssessmentType, FrameworkAssessmentConfig, PeerBenchmark
+from .services import run_assessment
+
+FUNCAO = AssessmentBucket.Level.FUNCTION
+
+
+class SketchStatsTests(SimpleTestCase):
+    def test_media_e_quantis_do_histograma(self):
+        row = PeerBenchmark(count=4, histogram={"20": 2, "30": 1, "40": 1})
+        stats = benchmark.sketch_stats(row)
+        self.assertEqual(stats["count"], 4)
+        self.assertEqual(stats["mean"], 2.75)
+        self.assertEqual((stats["p25"], stats["p50"], stats["p75"], stats["p90"]), (2.0, 2.0, 3.0, 4.0))
+
+    def test_histograma_vazio(self):
+        stats = benchmark.sketch_stats(PeerBenchmark(count=0, histogram={}))
+        self.assertEqual(stats["count"], 0)
+        self.assertIsNone(stats["mean"])
+        self.assertIsNone(stats["p50"])
+
+    def test_percentil_conta_empates_pela_metade(self):
+        row = PeerBenchmark(count=4, histogram={"20": 2, "30": 1, "40": 1})
+        self.assertEqual(benchmark.percentile_rank(row, 3.0), 62.5)
+        self.assertEqual(benchmark.percentile_rank(row, 1.0), 0.0)
+        self.assertIsNone(benchmark.percentile_rank(row, None))
+
+
+class PeerBenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.at = AssessmentType.objects.create(slug="maturity-1-5", name="Maturidade 1–5")
+        cls.fw = Framework.objects.create(slug="fw-teste", name="Framework Teste")
+        cls.tpl = FormTemplate.objects.create(name="Template Teste", slug="fw-teste-tpl", framework=cls.fw)
+
+    def _assessment(self, i, medias):
+        cliente = CustomUser.objects.create_user(
+            email=f"cliente-{i}@teste.local", password=None, nome=f"Cliente {i}", role="cliente",
+        )
+        sub = Submission.objects.create(customer=cliente, template=self.tpl, framework=self.fw)
+        assessment = Assessment.objects.create(submission=sub, assessment_type=self.at, framework=self.fw)
+        AssessmentBucket.objects.bulk_create([
+            AssessmentBucket(assessment=assessment, level=FUNCAO, code=code, metrics={"media": media})
+            for code, media in medias.items()
+        ])
+        return assessment
+
+    def _row(self, code="PR"):
+        return PeerBenchmark.objects.get(framework=self.fw, level=FUNCAO, code=code)
+
+    def test_apply_delta_troca_o_bin(self):
+        benchmark.apply_delta(self.fw.id, {}, {(FUNCAO, "PR"): "20"})
+        benchmark.apply_delta(self.fw.id, {}, {(FUNCAO, "PR"): "20"})
+        benchmark.apply_delta(self.fw.id, {(FUNCAO, "PR"): "20"}, {(FUNCAO, "PR"): "35"})
+        row = self._row()
+        self.assertEqual(row.histogram, {"20": 1, "35": 1})
+        self.assertEqual(row.count, 2)
+
+    def test_apply_delta_nao_desconta_o_que_nunca_entrou(self):
+        # assessment anterior ao backfill: a média antiga não está na distribuição
+        benchmark.apply_delta(self.fw.id, {}, {(FUNCAO, "PR"): "30"})
+        benchmark.apply_delta(self.fw.id, {(FUNCAO, "PR"): "10"}, {(FUNCAO, "PR"): "40"})
+        row = self._row()
+        self.assertEqual(row.histogram, {"30": 1, "40": 1})
+        self.assertEqual(row.count, 2)
+
+    def test_rebuild_e_snapshot(self):
+        a1 = self._assessment(1, {"PR": 2.0, "DE": 3.04})
+        self._assessment(2, {"PR": 3.0})
+        self.assertEqual(benchmark.snapshot(a1.id), {(FUNCAO, "PR"): "20", (FUNCAO, "DE"): "30"})
+
+        self.assertEqual(benchmark.rebuild(self.fw.id), 2)
+        self.assertEqual(self._row("PR").histogram, {"20": 1, "30": 1})
+        self.assertEqual(self._row("DE").count, 1)
+        self.assertEqual(benchmark.frameworks_missing(), [])
+
+    def test_apagar_assessment_desconta_as_medias(self):
+        a1 = self._assessment(1, {"PR": 2.0})
+        self._assessment(2, {"PR": 3.0})
+        benchmark.rebuild(self.fw.id)
+        a1.delete()
+        self.assertEqual(self._row().histogram, {"30": 1})
+
+    @override_settings(BENCHMARK_MIN_PEERS=3)
+    def test_compare_esconde_distribuicao_com_poucos_pares(self):
+        assessments = [self._assessment(i, {"PR": 1.0 + i}) for i in range(3)]
+        benchmark.rebuild(self.fw.id)
+        [item] = benchmark.compare(assessments[0])
+        self.assertEqual(item["peers"]["count"], 3)
+        self.assertEqual(item["peers"]["mean"], 2.0)
+        self.assertEqual(item["peers"]["percentile"], 16.7)
+
+        assessments[2].delete()
+        [item] = benchmark.compare(assessments[0])
+        self.assertIsNone(item["peers"])
+
+
+class RunAssessmentFingerprintTests(TestCase):
+    """run_assessment só recalcula quando respostas, calculadora, mapping ou taxonomia mudam."""
+
+    def setUp(self):
+        self.fw = Framework.objects.create(slug="fw-teste", name="Framework Teste")
+        tpl = FormTemplate.objects.create(name="Template Teste", slug="fw-teste-tpl", framework=self.fw)
+        at = AssessmentType.objects.create(slug="teste", name="Teste")
+        self.cfg = FrameworkAssessmentConfig.objects.create(framework=self.fw, assessment_type=at, mapping={"goal": 3})
+        cliente = CustomUser.objects.create_user(email="cliente@teste.local", password=None, nome="Cliente", role="cliente")
+        self.sub = Submission.objects.create(customer=cliente, template=tpl, framework=self.fw)
+        domain = Domain.objects.create(framework=self.fw, code="PR", title="Proteger")
+        control = Control.objects.create(framework=self.fw, domain=domain, code="PR.AA-01", title="Controle")
+        question = Question.objects.create(control=control, local_code="score", prompt="Pergunta", type="scale")
+        self.answer = Answer.objects.create(submission=self.sub, question=question, score=2)
+
+        self.calc = mock.Mock(side_effect=lambda assessment, fw_cfg: assessment)
+        patcher = mock.patch.dict(REGISTRY, {"teste": self.calc})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _rodar(self, **kwargs):
+        run_assessment(self.sub.id, **kwargs)
+        return self.calc.call_count
+
+    def test_sem_mudanca_reaproveita(self):
+        self.assertEqual(self._rodar(), 1)
+        self.assertEqual(self._rodar(), 1)
+        self.assertEqual(self._rodar(force=True), 2)
+
+    def test_update_em_massa_sem_answered_at_recalcula(self):
+        self._rodar()
+        Answer.objects.filter(id=self.answer.id).update(score=4)
+        self.assertEqual(self._rodar(), 2)
+        Answer.objects.filter(id=self.answer.id).update(evidence="nova evidência")
+        self.assertEqual(self._rodar(), 3)
+
+    def test_mapping_e_taxonomia_entram_na_impressao(self):
+        self._rodar()
+        self.cfg.mapping = {"goal": 4}
+        self.cfg.save()
+        self.assertEqual(self._rodar(), 2)
+        self.fw.save()  # updated_at da taxonomia
+        self.assertEqual(self._rodar(), 3)
@@ -1,6 +1,8 @@
 from django.urls import path
-from assessments.views import RunAssessmentView
+from assessments.views import PeerBenchmarkView, RunAssessmentView, SimulateAssessmentView
 
 urlpatterns = [
     path("assessments/run/<int:submission_id>/", RunAssessmentView.as_view(), name="run-assessment"),
+    path("assessments/benchmark/<int:submission_id>/", PeerBenchmarkView.as_view(), name="peer-benchmark"),
+    path("assessments/simulate/<int:submission_id>/", SimulateAssessmentView.as_view(), name="simulate-assessment"),
 ]
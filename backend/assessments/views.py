@@ -1,8 +1,11 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from assessments.services import run_assessment
-from assessments.serializers import AssessmentSerializer
+from assessments import benchmark
+from assessments.models import Assessment
+from assessments.services import AssessmentBusy, run_assessment, simulate_assessment
+from assessments.serializers import AssessmentSerializer, SimulationRequestSerializer
+from users.permissions import can_access_client
 # ajuste import Submission se quiser validar existência antes
 from responses.models import Submission
 
@@ -11,10 +14,13 @@ class RunAssessmentView(APIView):
     def post(self, request, submission_id):
         atype = request.query_params.get("type")  # 'maturity-1-5'
         only = request.query_params.get("only")   # ex.: 'function'
+        force = request.query_params.get("force") in ("1", "true", "yes")  # ignora a impressão digital
         try:
-            assessment = run_assessment(submission_id, atype)
+            assessment = run_assessment(submission_id, atype, force=force)
         except Submission.DoesNotExist:
             return Response({"error":"Submission não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        except AssessmentBusy as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -22,3 +28,63 @@ class RunAssessmentView(APIView):
         if only == "function":
             data["buckets"] = [b for b in data["buckets"] if b["level"] == "FUNCTION"]
         return Response(data, status=status.HTTP_200_OK)
+
+
+LEVEL_RANK = {"FUNCTION": 0, "CATEGORY": 1, "CONTROL": 2}
+
+
+class SimulateAssessmentView(APIView):
+    """
+    POST /api/assessments/simulate/<submission_id>/
+    {"controls": {"GV.OC-01": 3, ...}, "questions": {"<question_id>": 4}, "only": "function"}
+
+    Projeta a árvore de buckets com as respostas atuais + overrides, sem gravar nada
+    (cálculo puro em memória). Traz também o summary atual para comparação.
+    """
+    def post(self, request, submission_id):
+        params = SimulationRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        submission = Submission.objects.select_related("framework").filter(id=submission_id).first()
+        if submission is None:
+            return Response({"error": "Submission não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        if not can_access_client(request.user, submission.customer_id):
+            return Response({"detail": "Sem permissão."}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            result = simulate_assessment(
+                submission, data.get("type") or None,
+                question_overrides=data["questions"], control_overrides=data["controls"],
+            )
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        buckets = sorted(result["buckets"], key=lambda b: (LEVEL_RANK.get(b["level"], 3), b["order"], b["code"]))
+        if data.get("only"):
+            buckets = [b for b in buckets if b["level"] == data["only"].upper()]
+        result["buckets"] = buckets
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class PeerBenchmarkView(APIView):
+    """
+    GET /api/assessments/benchmark/<submission_id>/?level=FUNCTION|CATEGORY|CONTROL
+
+    Média do cliente em cada bucket + distribuição dos pares do mesmo framework
+    (count, mean, p25/p50/p75/p90 e o percentil do cliente). Lê a tabela materializada
+    PeerBenchmark: custo proporcional aos buckets, não ao tamanho da carteira.
+    """
+    def get(self, request, submission_id):
+        assessment = Assessment.objects.select_related("submission").filter(submission_id=submission_id).first()
+        if assessment is None:
+            return Response({"error": "Assessment não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        if not can_access_client(request.user, assessment.submission.customer_id):
+            return Response({"detail": "Sem permissão."}, status=status.HTTP_403_FORBIDDEN)
+
+        level = (request.query_params.get("level") or "").upper() or None
+        return Response({
+            "submission_id": submission_id,
+            "framework_id": assessment.framework_id,
+            "buckets": benchmark.compare(assessment, level),
+        }, status=status.HTTP_200_OK)
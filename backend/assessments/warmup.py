@@ -0,0 +1,78 @@
+# assessments/warmup.py
+"""
+Aquecimento do worker: tira do primeiro request o custo de imports pesados e de
+montar caches em memória.
+
+- preimport(): módulos importados sob demanda no código (cryptography, pyotp, drf_yasg...).
+  Seguro em qualquer momento, inclusive no AppConfig.ready (não toca no banco).
+- prime(): índices de taxonomia dos frameworks ativos, keyring Fernet e schema OpenAPI.
+  Usa o banco; chamado pelos hooks do gunicorn (gunicorn.conf.py). Com --preload roda
+  uma vez no master e os workers herdam tudo por copy-on-write.
+"""
+import importlib
+import logging
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = (
+    "cryptography.fernet",
+    "pyotp",
+    "qrcode",
+    "yaml",
+    "drf_yasg.generators",
+    "drf_yasg.codecs",
+    "drf_yasg.renderers",
+    "rest_framework_simplejwt.tokens",
+    "responses.crypto",
+    "responses.exports",
+    "responses.storage",
+)
+
+
+def preimport():
+    """Importa HEAVY_MODULES; retorna {módulo: ms} (ausentes são ignorados)."""
+    timings = {}
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.warning("warmup: módulo %s indisponível", name)
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+def prime():
+    """Monta os caches em memória; retorna um pequeno relatório."""
+    from config.openapi import load_schema
+    from frameworks import taxonomy
+    from responses.crypto import get_keyring
+
+    report = {}
+    started = time.perf_counter()
+    report["frameworks"] = taxonomy.prime(active_only=True)
+    get_keyring()
+    try:
+        load_schema("json")
+    except Exception:
+        logger.warning("warmup: não foi possível carregar o schema OpenAPI", exc_info=True)
+    report["prime_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def run(prime_caches=True):
+    started = time.perf_counter()
+    report = {"imports_ms": preimport()}
+    if prime_caches:
+        try:
+            report.update(prime())
+        finally:
+            # nada de conexão aberta atravessando o fork dos workers
+            connections.close_all()
+    report["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("warmup: %s", report)
+    return report
@@ -0,0 +1,126 @@
+# config/openapi.py
+"""
+Schema OpenAPI pré-gerado.
+
+Gerar o schema com o drf-yasg introspecta todos os viewsets (centenas de ms de CPU
+num worker síncrono). Aqui ele é gerado uma vez — `manage.py build_openapi_schema`
+no deploy ou, na falta do arquivo, no primeiro acesso — e gravado em
+settings.OPENAPI_SCHEMA_DIR. A versão é o hash do conteúdo:
+
+- /swagger.json|.yaml            -> ETag + revalidação (304 sem corpo)
+- /swagger-<versão>.json|.yaml   -> Cache-Control immutable (1 ano)
+
+Os arquivos são relidos só quando o mtime muda (regenerar não exige restart).
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.views.decorators.http import require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+API_INFO = openapi.Info(
+    title="Projeto FS3M",
+    default_version="v1",
+    description="Documentação da API para a CyberSec Maturity Platform",
+    terms_of_service="https://www.seusite.com/terms/",
+    contact=openapi.Contact(email="suporte@seusite.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+FORMATS = {
+    "json": ("openapi.json", "application/json; charset=utf-8"),
+    "yaml": ("openapi.yaml", "application/yaml; charset=utf-8"),
+}
+
+_lock = threading.Lock()
+_loaded = {}  # formato -> (mtime, corpo, versão)
+
+
+def schema_dir() -> Path:
+    return Path(settings.OPENAPI_SCHEMA_DIR)
+
+
+def generate_schema():
+    """Gera o schema (objeto openapi.Swagger) sem request: visão pública completa."""
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(API_INFO)
+    return generator.get_schema(request=None, public=True)
+
+
+def write_schema() -> str:
+    """Gera e grava JSON + YAML (rename atômico). Retorna a versão (hash)."""
+    schema = generate_schema()
+    outputs = {
+        "json": OpenAPICodecJson(validators=[]).encode(schema),
+        "yaml": OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+    target = schema_dir()
+    target.mkdir(parents=True, exist_ok=True)
+    for fmt, body in outputs.items():
+        path = target / FORMATS[fmt][0]
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+    with _lock:
+        _loaded.clear()
+    return _version(outputs["json"])
+
+
+def _version(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def load_schema(fmt: str):
+    """(corpo, versão) do formato pedido; gera o artefato se ainda não existir."""
+    path = schema_dir() / FORMATS[fmt][0]
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        write_schema()
+        mtime = path.stat().st_mtime
+
+    with _lock:
+        cached = _loaded.get(fmt)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+    body = path.read_bytes()
+    # a versão é a do JSON, para que .json e .yaml da mesma geração compartilhem o mesmo valor
+    version = _version(body if fmt == "json" else (schema_dir() / FORMATS["json"][0]).read_bytes())
+    with _lock:
+        _loaded[fmt] = (mtime, body, version)
+    return body, version
+
+
+def _response(request, fmt, cache_control, version=None):
+    fmt = fmt.lstrip(".")
+    if fmt not in FORMATS:
+        raise Http404
+    body, current = load_schema(fmt)
+    if version is not None and version != current:
+        raise Http404("Versão do schema não encontrada.")
+
+    etag = f'"{current}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "X-Schema-Version": current}
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        resp = HttpResponseNotModified()
+    else:
+        resp = HttpResponse(body, content_type=FORMATS[fmt][1])
+    for k, v in headers.items():
+        resp[k] = v
+    return resp
+
+
+@require_safe
+def schema_file(request, format):
+    return _response(request, format, "public, max-age=0, must-revalidate")
+
+
+@require_safe
+def schema_file_versioned(request, version, format):
+    return _response(request, format, "public, max-age=31536000, immutable", version=version)
@@ -0,0 +1,60 @@
+# config/pagination.py
+"""
+Paginação por keyset com cursor opaco, para listas longas servidas direto de um índice
+(auditoria de usuários, fila priorizada de recomendações).
+
+`ordering` é a ordenação completa e única da lista (termina na PK), no formato do
+order_by ("-campo" = decrescente). O cursor guarda os valores dessa ordenação no último
+item da página; a próxima página é "tudo que vem depois dele" nessa ordem — custo
+constante por página, sem OFFSET.
+"""
+import base64
+from datetime import date, datetime
+
+from django.db.models import Q
+
+
+def parse_limit(value, default=50, maximum=200) -> int:
+    """Tamanho da página entre 1 e `maximum`. ValueError/TypeError se não for inteiro."""
+    if value in (None, ""):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def encode_cursor(values) -> str:
+    raw = "|".join(v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, parsers) -> tuple:
+    """Inverso de encode_cursor; `parsers` converte cada posição. ValueError se inválido."""
+    parts = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    if len(parts) != len(parsers):
+        raise ValueError("cursor inválido")
+    return tuple(parse(part) for parse, part in zip(parsers, parts))
+
+
+def after(ordering, values) -> Q:
+    """Filtro "depois de `values`" na ordem `ordering` (comparação lexicográfica)."""
+    q = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        op = "lt" if field.startswith("-") else "gt"
+        prefix = {f.lstrip("-"): v for f, v in zip(ordering[:i], values[:i])}
+        q |= Q(**prefix, **{f"{name}__{op}": values[i]})
+    return q
+
+
+def keyset_page(qs, ordering, parsers, cursor=None, limit=None, default_limit=50, max_limit=200):
+    """
+    (itens da página, próximo cursor ou None). Levanta ValueError/TypeError para
+    cursor/limit inválidos — a view responde 400.
+    """
+    limit = parse_limit(limit, default_limit, max_limit)
+    if cursor:
+        qs = qs.filter(after(ordering, decode_cursor(cursor, parsers)))
+    page = list(qs.order_by(*ordering)[: limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor([getattr(page[-1], f.lstrip("-")) for f in ordering])
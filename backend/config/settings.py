@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "assessments.apps.AssessmentsConfig",
     "recommendations",
     "actionplans",
+    "monitoring",
 ]
 
 # ========= Fernet (campos criptografados) =========
@@ -51,6 +52,8 @@ FERNET_KEYS = [k.strip() for k in env.str("FERNET_KEYS", "").split(",") if k.str
 
 # ========= Middleware =========
 MIDDLEWARE = [
+    "monitoring.middleware.QueryMetricsMiddleware",
+    "monitoring.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -61,6 +64,25 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# ========= Métricas de queries por endpoint (monitoring) =========
+# Headers X-DB-* só em DEBUG, a menos que forçado por env
+QUERY_METRICS_HEADERS = env.bool("QUERY_METRICS_HEADERS", DEBUG)
+# url_name -> nº máximo de queries por requisição (warning em produção, falha em testes)
+QUERY_BUDGETS = {
+    "planodeacao-list-create": 8,
+    "planodeacao-resumo": 4,
+    "client-dashboard": 6,
+    "verificar-recomendacoes": 6,
+}
+
+# ========= Métricas Prometheus (monitoring.metrics) =========
+# SQLite local compartilhado pelos workers do gunicorn
+METRICS_ENABLED = env.bool("METRICS_ENABLED", True)
+METRICS_DB_PATH = env.str("METRICS_DB_PATH", str(BASE_DIR / "metrics.sqlite3"))
+# incrementos ficam em memória por worker e vão ao SQLite a cada N segundos (thread de fundo)
+METRICS_FLUSH_INTERVAL = env.float("METRICS_FLUSH_INTERVAL", 1.0)
+METRICS_TOKEN = env.str("METRICS_TOKEN", "")
+
 ROOT_URLCONF = "config.urls"
 WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
@@ -89,15 +111,28 @@ if not DEBUG and DATABASES["default"]["ENGINE"].endswith("postgresql"):
 
 # ========= Auth / DRF =========
 AUTH_USER_MODEL = "users.CustomUser"
+# TTL do principal em cache (users/principal.py); a versão no usuário já garante a invalidação
+PRINCIPAL_CACHE_TTL = env.int("PRINCIPAL_CACHE_TTL", 300)
+
+# Cache compartilhado pelos workers do gunicorn (principal, estado do usuário no JWT,
+# carteira): em disco local, como os SQLite de métricas/throttle. Com LocMem cada worker
+# teria a sua cópia e uma invalidação feita num worker não chegaria aos outros.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": env.str("CACHE_DIR", str(BASE_DIR / "cache")),
+        "OPTIONS": {"MAX_ENTRIES": env.int("CACHE_MAX_ENTRIES", 10000)},
+    }
+}
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.UserRateThrottle",
-        "rest_framework.throttling.AnonRateThrottle",
+        "users.throttling.SharedUserRateThrottle",
+        "users.throttling.SharedAnonRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"user": "200/min", "anon": "30/min"},
 }
@@ -109,6 +144,45 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+# auditoria de usuários (users/audit.py): flush em lote e retenção
+AUDIT_FLUSH_INTERVAL = env.float("AUDIT_FLUSH_INTERVAL", 2.0)
+AUDIT_BUFFER_SIZE = env.int("AUDIT_BUFFER_SIZE", 200)
+AUDIT_RETENTION_DAYS = env.int("AUDIT_RETENTION_DAYS", 365)
+# contadores de throttle compartilhados entre workers (users/throttling.py)
+THROTTLE_DB_PATH = env.str("THROTTLE_DB_PATH", str(BASE_DIR / "throttle.sqlite3"))
+# por quanto tempo se confia em (principal_version, is_active) do cache sem reler o usuário.
+# O save() do usuário atualiza o cache compartilhado na hora; só mudanças feitas fora dele
+# (update em massa, SQL) demoram até este tempo para barrar um token já emitido.
+JWT_USER_STATE_TTL = env.int("JWT_USER_STATE_TTL", 30)
+
+# perfis por requisição (monitoring.middleware.ProfilingMiddleware): staff com `X-Profile: 1`
+# ou amostragem de fundo; PROFILING_ENABLED=False tira o middleware da cadeia
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", True)
+PROFILE_SAMPLE_RATE = env.float("PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_DIR = env.str("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_MAX_FILES = env.int("PROFILE_MAX_FILES", 200)
+
+# mínimo de pares para expor a distribuição do benchmark (assessments/benchmark.py)
+BENCHMARK_MIN_PEERS = env.int("BENCHMARK_MIN_PEERS", 5)
+
+# TTL (s) do painel de carteira (responses/portfolio.py)
+PORTFOLIO_CACHE_TTL = env.int("PORTFOLIO_CACHE_TTL", 60)
+
+# custo mensal assumido (R$) para recomendações sem custo_estimado (actionplans/optimizer.py)
+PLANO_CUSTO_MES_PADRAO = env.float("PLANO_CUSTO_MES_PADRAO", 10000)
+
+# espera máxima (s) por um recálculo concorrente da mesma submissão (assessments/services.py)
+ASSESSMENT_LOCK_TIMEOUT = env.float("ASSESSMENT_LOCK_TIMEOUT", 30)
+
+# pré-importa módulos pesados no AppConfig.ready (assessments/warmup.py); o gunicorn.conf.py
+# faz o warmup completo (com caches) independentemente disto
+WARMUP_ON_READY = env.bool("WARMUP_ON_READY", False)
+
+# ========= OpenAPI (config/openapi.py) =========
+# artefato gerado por `manage.py build_openapi_schema` (ou no primeiro acesso)
+OPENAPI_SCHEMA_DIR = env.str("OPENAPI_SCHEMA_DIR", str(BASE_DIR / "openapi"))
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
 
 # ========= i18n / tz =========
 LANGUAGE_CODE = "pt-br"
@@ -123,6 +197,23 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Downloads de anexos: em produção o nginx serve o arquivo (X-Accel-Redirect -> location interna)
+ATTACHMENTS_X_ACCEL = env.bool("ATTACHMENTS_X_ACCEL", not DEBUG)
+ATTACHMENTS_X_ACCEL_PREFIX = "/media/"
+# validade (s) das URLs assinadas de download devolvidas pela API (<img src>/<a href> sem JWT)
+DOWNLOAD_URL_TTL = env.int("DOWNLOAD_URL_TTL", 900)
+# Upload em pedaços (responses.ChunkedUpload)
+CHUNKED_UPLOAD_DIR = MEDIA_ROOT / "uploads_tmp"
+CHUNKED_UPLOAD_MAX_SIZE = env.int("CHUNKED_UPLOAD_MAX_SIZE", 512 * 1024 * 1024)
+# Pacote de evidências (responses/exports.py): montado em disco fora do request, servido via X-Accel.
+# Tem evidências decifradas: fica fora de MEDIA_ROOT (volume próprio, sem backup) e expira.
+EVIDENCE_BUNDLE_DIR = Path(env.str("EVIDENCE_BUNDLE_DIR", str(BASE_DIR / "exports")))
+EVIDENCE_BUNDLE_X_ACCEL_PREFIX = "/_exports/"
+EVIDENCE_BUNDLE_TTL = env.int("EVIDENCE_BUNDLE_TTL", 3600)
+EVIDENCE_BUNDLE_RETRY_AFTER = env.int("EVIDENCE_BUNDLE_RETRY_AFTER", 5)
+# montagem sem sinal de vida há mais que isso (s) é considerada abandonada e recomeça
+EVIDENCE_BUNDLE_BUILD_TIMEOUT = env.int("EVIDENCE_BUNDLE_BUILD_TIMEOUT", 300)
+
 # ========= CORS / CSRF =========
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = True
@@ -0,0 +1,46 @@
+# config/settings_test.py
+"""
+Settings da suíte de testes:
+
+    python manage.py test --settings=config.settings_test
+
+Usa o Postgres de config/settings (POSTGRES_* ou DB_URL; o runner cria test_<nome>): o
+schema depende de ArrayField/DISTINCT ON, então SQLite não serve. As migrations não são
+versionadas, por isso as tabelas são criadas direto dos models. Cache, SQLites auxiliares
+(métricas/throttle) e arquivos ficam isolados num diretório temporário por execução.
+"""
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+
+
+class _SemMigrations(dict):
+    """MIGRATION_MODULES que desliga as migrations de todos os apps (syncdb dos models)."""
+
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = _SemMigrations()
+
+TEST_TMP_DIR = Path(tempfile.mkdtemp(prefix="fs3m-test-"))
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+MEDIA_ROOT = TEST_TMP_DIR / "media"
+CHUNKED_UPLOAD_DIR = MEDIA_ROOT / "uploads_tmp"
+EVIDENCE_BUNDLE_DIR = TEST_TMP_DIR / "exports"
+METRICS_DB_PATH = str(TEST_TMP_DIR / "metrics.sqlite3")
+THROTTLE_DB_PATH = str(TEST_TMP_DIR / "throttle.sqlite3")
+PROFILE_DIR = str(TEST_TMP_DIR / "profiles")
+PROFILING_ENABLED = False
+ATTACHMENTS_X_ACCEL = False
+
+# a thread de auditoria não grava no meio de um teste (os testes chamam audit.flush())
+AUDIT_FLUSH_INTERVAL = 3600
+AUDIT_BUFFER_SIZE = 10_000
@@ -1,18 +1,14 @@
 from django.contrib import admin
 from django.urls import include, path, re_path
-from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from .openapi import API_INFO, schema_file, schema_file_versioned
+
+# As páginas de UI são baratas (não introspectam nada); o spec que elas carregam vem do
+# artefato pré-gerado (SWAGGER_SETTINGS/REDOC_SETTINGS["SPEC_URL"] -> schema-json).
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Projeto FS3M",
-        default_version="v1",
-        description="Documentação da API para a CyberSec Maturity Platform",
-        terms_of_service="https://www.seusite.com/terms/",
-        contact=openapi.Contact(email="suporte@seusite.com"),
-        license=openapi.License(name="MIT License"),
-    ),
+    API_INFO,
     public=True,
     permission_classes=(permissions.AllowAny,),
 )
@@ -24,9 +20,14 @@ urlpatterns = [
     # Swagger/Redoc (drf-yasg)
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
+        schema_file,
         name="schema-json",
     ),
+    re_path(
+        r"^swagger-(?P<version>[0-9a-f]{16})(?P<format>\.json|\.yaml)$",
+        schema_file_versioned,
+        name="schema-json-versioned",
+    ),
     path(
         "swagger/",
         schema_view.with_ui("swagger", cache_timeout=0),
@@ -46,4 +47,5 @@ urlpatterns = [
     path("api/", include("assessments.urls")),
     path("api/", include("recommendations.urls")),
     path("api/planos/", include("actionplans.urls")),
+    path("api/monitoring/", include("monitoring.urls")),
 ]
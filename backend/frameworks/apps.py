@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FrameworksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "frameworks"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (versão do índice de taxonomia)
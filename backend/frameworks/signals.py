@@ -0,0 +1,31 @@
+# frameworks/signals.py
+"""Mudanças na taxonomia tocam Framework.updated_at (versão do índice em frameworks/taxonomy.py)."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Control, Domain, Framework, FormTemplate, Question, TemplateItem
+
+
+def touch_framework(framework_id):
+    if framework_id:
+        Framework.objects.filter(pk=framework_id).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Domain)
+@receiver([post_save, post_delete], sender=Control)
+@receiver([post_save, post_delete], sender=FormTemplate)
+def _taxonomy_changed(sender, instance, **kwargs):
+    touch_framework(instance.framework_id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def _question_changed(sender, instance, **kwargs):
+    touch_framework(Control.objects.filter(pk=instance.control_id).values_list("framework_id", flat=True).first())
+
+
+@receiver([post_save, post_delete], sender=TemplateItem)
+def _template_item_changed(sender, instance, **kwargs):
+    touch_framework(
+        FormTemplate.objects.filter(pk=instance.template_id).values_list("framework_id", flat=True).first()
+    )
@@ -0,0 +1,124 @@
+# frameworks/taxonomy.py
+"""
+Índice em memória (por processo) da taxonomia de um framework: domínios, controles,
+perguntas e a ordem dos itens de cada template.
+
+A taxonomia muda raramente e é lida em todo cálculo de assessment; em vez de refazer
+joins Answer -> Question -> Control -> Domain a cada vez, o índice é montado uma vez
+(4 queries "planas") e reaproveitado enquanto Framework.updated_at não mudar.
+Qualquer alteração em Domain/Control/Question/FormTemplate/TemplateItem toca o
+updated_at do framework (frameworks/signals.py), então todos os workers percebem.
+
+O warmup (assessments/warmup.py) pré-monta os índices dos frameworks ativos.
+"""
+import threading
+from dataclasses import dataclass, field
+
+from monitoring import metrics
+
+from .models import Control, Domain, Framework, FormTemplate, Question, TemplateItem
+
+
+@dataclass(frozen=True)
+class ControlInfo:
+    id: int
+    code: str
+    title: str
+    domain_id: int
+    domain_code: str
+    domain_title: str
+
+
+@dataclass(frozen=True)
+class QuestionInfo:
+    id: int
+    control_id: int
+    local_code: str
+    type: str
+
+
+@dataclass
+class FrameworkIndex:
+    framework_id: int
+    slug: str
+    version: object                                   # Framework.updated_at
+    controls: dict = field(default_factory=dict)      # id -> ControlInfo
+    questions: dict = field(default_factory=dict)     # id -> QuestionInfo
+    templates: dict = field(default_factory=dict)     # slug -> tuple(question ids, em ordem)
+
+    def control_for_question(self, question_id):
+        q = self.questions.get(question_id)
+        return self.controls.get(q.control_id) if q else None
+
+
+_lock = threading.Lock()
+_indexes = {}  # framework_id -> FrameworkIndex
+
+
+def build_index(framework) -> FrameworkIndex:
+    index = FrameworkIndex(framework_id=framework.id, slug=framework.slug, version=framework.updated_at)
+
+    domains = {
+        d_id: (code, title)
+        for d_id, code, title in Domain.objects.filter(framework_id=framework.id).values_list("id", "code", "title")
+    }
+    for c_id, code, title, d_id in (
+        Control.objects.filter(framework_id=framework.id).values_list("id", "code", "title", "domain_id")
+    ):
+        d_code, d_title = domains.get(d_id, ("", ""))
+        index.controls[c_id] = ControlInfo(c_id, code, title or code, d_id, d_code, d_title)
+
+    for q_id, c_id, local_code, q_type in (
+        Question.objects.filter(control__framework_id=framework.id)
+        .values_list("id", "control_id", "local_code", "type")
+    ):
+        index.questions[q_id] = QuestionInfo(q_id, c_id, (local_code or "").strip(), q_type)
+
+    slugs = dict(FormTemplate.objects.filter(framework_id=framework.id).values_list("id", "slug"))
+    items = {}
+    for t_id, q_id in (
+        TemplateItem.objects.filter(template_id__in=slugs, question__isnull=False)
+        .order_by("template_id", "order", "id")
+        .values_list("template_id", "question_id")
+    ):
+        items.setdefault(slugs[t_id], []).append(q_id)
+    index.templates = {slug: tuple(ids) for slug, ids in items.items()}
+    return index
+
+
+def get_index(framework) -> FrameworkIndex:
+    """
+    Índice do framework (instância ou id). Com a instância em mãos não há query
+    nenhuma quando o índice está em dia; com o id, uma consulta ao updated_at.
+    """
+    if not isinstance(framework, Framework):
+        framework = Framework.objects.only("id", "slug", "updated_at").get(pk=framework)
+
+    with _lock:
+        index = _indexes.get(framework.id)
+    if index is not None and index.version == framework.updated_at:
+        metrics.cache_hit("taxonomy")
+        return index
+
+    metrics.cache_miss("taxonomy")
+    index = build_index(framework)
+    with _lock:
+        _indexes[framework.id] = index
+    return index
+
+
+def prime(active_only=True) -> int:
+    """Monta os índices (usado no warmup). Retorna quantos frameworks foram indexados."""
+    qs = Framework.objects.only("id", "slug", "updated_at")
+    if active_only:
+        qs = qs.filter(active=True)
+    count = 0
+    for framework in qs:
+        get_index(framework)
+        count += 1
+    return count
+
+
+def clear():
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,40 @@
+# gunicorn.conf.py
+"""
+Configuração do gunicorn (produção).
+
+Com preload (GUNICORN_PRELOAD=1, padrão) a aplicação e o warmup (assessments/warmup.py)
+rodam uma vez no master e os workers herdam imports e caches por copy-on-write.
+Sem preload, cada worker se aquece logo após carregar a aplicação, antes de aceitar requests.
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "3"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+warmup = os.environ.get("GUNICORN_WARMUP", "1") == "1"
+
+
+def _warmup(log):
+    if not warmup:
+        return
+    from assessments.warmup import run
+
+    log.info("warmup: %s", run())
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        _warmup(server.log)
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        # conexões abertas no master não podem ser compartilhadas entre processos
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warmup(worker.log)
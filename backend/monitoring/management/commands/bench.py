@@ -0,0 +1,302 @@
+# monitoring/management/commands/bench.py
+"""
+Benchmark reprodutível: gera um portfólio sintético (N clientes x M frameworks)
+e cronometra cenários pela pilha HTTP completa, emitindo um relatório JSON
+comparável entre commits.
+
+    python manage.py bench --clients 20 --frameworks 2 --controls 100 --output bench.json
+    python manage.py bench --cleanup
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from actionplans.models import PlanoDeAcao, PlanoDeAcaoRecomendacao
+from actionplans.services import recalcular_resumo
+from assessments.models import AssessmentType, FrameworkAssessmentConfig
+from frameworks.models import Control, Domain, FormTemplate, Framework, Question, TemplateItem
+from recommendations.models import Recomendacao
+from responses.models import Answer, Submission
+
+User = get_user_model()
+
+PREFIX = "bench"
+EMAIL_DOMAIN = "bench.local"
+FUNCTIONS = ["GV", "ID", "PR", "DE", "RS", "RC"]
+CATEGORIA_POR_FUNCAO = {code.split("(")[1].rstrip(")"): code for code, _ in Recomendacao.CATEGORIA_CHOICES}
+CATEGORIES_PER_FUNCTION = 3
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _summarize(durations_ms, queries):
+    ordered = sorted(durations_ms)
+    p95 = ordered[max(0, int(round(0.95 * len(ordered))) - 1)]
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 2),
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(p95, 2),
+        "max_ms": round(ordered[-1], 2),
+        "avg_queries": round(sum(queries) / len(queries), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = "Gera portfólio sintético e mede cenários (framework, autosave, assessment, gaps, planos, kanban)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=10, help="Nº de clientes sintéticos.")
+        parser.add_argument("--frameworks", type=int, default=1, help="Nº de frameworks sintéticos.")
+        parser.add_argument("--controls", type=int, default=100, help="Controles por framework.")
+        parser.add_argument("--density", type=float, default=0.8, help="Fração de perguntas respondidas (0..1).")
+        parser.add_argument("--evidence-size", type=int, default=200, help="Tamanho (chars) da evidência por resposta.")
+        parser.add_argument("--attachment-kb", type=int, default=0, help="Anexo por resposta no autosave (KB, 0 = sem).")
+        parser.add_argument("--burst", type=int, default=20, help="Respostas por rajada de autosave.")
+        parser.add_argument("--repeat", type=int, default=5, help="Repetições por cenário.")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (reprodutibilidade).")
+        parser.add_argument("--output", type=str, help="Arquivo do relatório JSON (padrão: stdout).")
+        parser.add_argument("--skip-generate", action="store_true", help="Reusa o dataset existente.")
+        parser.add_argument("--cleanup", action="store_true", help="Remove o dataset sintético e sai.")
+
+    def handle(self, *args, **opts):
+        if opts["cleanup"]:
+            self._cleanup()
+            return
+
+        self.rng = random.Random(opts["seed"])
+        if not opts["skip_generate"]:
+            self._cleanup()
+            t0 = time.perf_counter()
+            self._generate(opts)
+            self.stderr.write(f"Dataset gerado em {time.perf_counter() - t0:.1f}s")
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "generated_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "db_vendor": connection.vendor,
+                "params": {k: opts[k] for k in (
+                    "clients", "frameworks", "controls", "density", "evidence_size",
+                    "attachment_kb", "burst", "repeat", "seed",
+                )},
+            },
+            "scenarios": self._run_scenarios(opts),
+        }
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            self.stdout.write(self.style.SUCCESS(f"Relatório salvo em {opts['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    # ------------------------------------------------------------------ dataset
+
+    def _cleanup(self):
+        with transaction.atomic():
+            users = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+            PlanoDeAcao.objects.filter(cliente__in=users).delete()
+            Recomendacao.objects.filter(cliente__in=users).delete()
+            Submission.objects.filter(customer__in=users).delete()
+            FormTemplate.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+            Framework.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+            users.delete()
+        self.stderr.write("Dataset sintético removido.")
+
+    @transaction.atomic
+    def _generate(self, opts):
+        at, _ = AssessmentType.objects.get_or_create(
+            slug="maturity-1-5",
+            defaults={"name": "Maturidade 1–5", "description": "Escala 1–5 baseada em 'score'."},
+        )
+        self.gestor = User.objects.create_user(
+            email=f"{PREFIX}-gestor@{EMAIL_DOMAIN}", password=None, nome="Bench Gestor", role="gestor",
+        )
+        templates = [self._make_framework(j, opts["controls"], at) for j in range(opts["frameworks"])]
+
+        evidence = "x" * max(0, opts["evidence_size"])
+        today = date.today()
+        for i in range(opts["clients"]):
+            cliente = User.objects.create_user(
+                email=f"{PREFIX}-cliente-{i}@{EMAIL_DOMAIN}", password=None, nome=f"Bench Cliente {i}", role="cliente",
+            )
+            for tpl in templates:
+                sub = Submission.objects.create(customer=cliente, template=tpl, framework=tpl.framework)
+                answers, low = [], []
+                for q in tpl._bench_questions:
+                    if self.rng.random() > opts["density"]:
+                        continue
+                    n = self.rng.randint(1, 5)
+                    answers.append(Answer(
+                        submission=sub, question=q, value={"type": "scale", "value": n},
+                        score=n, evidence=evidence or None,
+                    ))
+                    if n < 3:
+                        low.append(q)
+                Answer.objects.bulk_create(answers, batch_size=500)
+                sub.recalc_progress(commit=True)
+
+                recs = Recomendacao.objects.bulk_create([
+                    Recomendacao(
+                        cliente=cliente, submission=sub, analista=self.gestor,
+                        nome=f"Melhorar {q.control.code}", nist=q.control.code,
+                        categoria=CATEGORIA_POR_FUNCAO[q.control.code.split(".")[0]],
+                        prioridade=self.rng.choice(["baixa", "media", "alta"]),
+                        data_inicio=today, data_fim=today + timedelta(days=self.rng.randint(-60, 365)),
+                        meses=self.rng.randint(1, 12), detalhes="Gerado pelo bench.", investimentos="R$ 0",
+                        urgencia=str(self.rng.randint(1, 5)), gravidade=str(self.rng.randint(1, 5)),
+                        perguntaId=str(q.id),
+                    ).atualizar_risk_score()
+                    for q in low
+                ])
+                plano = PlanoDeAcao.objects.create(cliente=cliente, criado_por=self.gestor, submission_id=sub.id)
+                PlanoDeAcaoRecomendacao.objects.bulk_create([
+                    PlanoDeAcaoRecomendacao(plano=plano, recomendacao=r, ordem=idx)
+                    for idx, r in enumerate(recs)
+                ])
+                recalcular_resumo(plano.id)
+
+    def _make_framework(self, j, n_controls, assessment_type):
+        fw = Framework.objects.create(slug=f"{PREFIX}-fw-{j}", name=f"Bench Framework {j}", version="1.0")
+        tpl = FormTemplate.objects.create(name=f"Bench Template {j}", slug=f"{PREFIX}-fw-{j}-tpl", framework=fw)
+        FrameworkAssessmentConfig.objects.create(
+            framework=fw, assessment_type=assessment_type,
+            mapping={"score_code": "score", "goal": 3.0}, is_default=True,
+        )
+        domains = {
+            fn: Domain.objects.create(framework=fw, code=fn, title=f"Função {fn}", order=k)
+            for k, fn in enumerate(FUNCTIONS)
+        }
+        controls = []
+        for k in range(n_controls):
+            fn = FUNCTIONS[k % len(FUNCTIONS)]
+            cat = (k // len(FUNCTIONS)) % CATEGORIES_PER_FUNCTION
+            controls.append(Control(
+                framework=fw, domain=domains[fn], code=f"{fn}.C{cat}-{k:03d}",
+                title=f"Controle {k}", order=k,
+            ))
+        controls = Control.objects.bulk_create(controls)
+        questions = Question.objects.bulk_create([
+            Question(control=c, local_code="score", prompt=f"Maturidade de {c.code}", type="scale", order=0)
+            for c in controls
+        ])
+        for q, c in zip(questions, controls):
+            q.control = c
+        TemplateItem.objects.bulk_create([
+            TemplateItem(template=tpl, control=c, order=k) for k, c in enumerate(controls)
+        ])
+        tpl._bench_questions = questions
+        return tpl
+
+    # ---------------------------------------------------------------- cenários
+
+    def _run_scenarios(self, opts):
+        gestor = User.objects.get(email=f"{PREFIX}-gestor@{EMAIL_DOMAIN}")
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(user=gestor)
+
+        subs = list(
+            Submission.objects.filter(customer__email__endswith=f"@{EMAIL_DOMAIN}")
+            .select_related("framework").order_by("id")
+        )
+        if not subs:
+            raise CommandError("Nenhum dado sintético encontrado. Rode sem --skip-generate.")
+        sub = subs[0]
+        questions = list(sub.all_questions_qs().order_by("id")[: opts["burst"]])
+        vinculos = list(PlanoDeAcaoRecomendacao.objects.filter(plano__submission_id=sub.id)[:20])
+        evidence = "y" * max(0, opts["evidence_size"])
+        attachment = b"%" * (opts["attachment_kb"] * 1024)
+
+        def framework_detail():
+            return [client.get(reverse("framework-detail", args=[sub.framework_id]))]
+
+        def autosave_burst():
+            out = []
+            for q in questions:
+                data = {
+                    "submission": sub.id, "question": q.id, "score": self.rng.randint(1, 5),
+                    "evidence_plain": evidence, "encrypt_evidence": bool(settings.FERNET_KEYS),
+                }
+                if attachment:
+                    data["attachment"] = ContentFile(attachment, name="evidencia.pdf")
+                    out.append(client.post(reverse("answer-upsert"), data, format="multipart"))
+                else:
+                    out.append(client.post(reverse("answer-upsert"), data, format="json"))
+            return out
+
+        def run_assessment():
+            # force: mede o cálculo em si, não o atalho da impressão digital
+            return [client.post(reverse("run-assessment", args=[sub.id]) + "?force=1")]
+
+        def run_assessment_unchanged():
+            return [client.post(reverse("run-assessment", args=[sub.id]))]
+
+        def gap_check():
+            return [client.get(reverse("verificar-recomendacoes", args=[sub.id]))]
+
+        def plan_list():
+            return [client.get(reverse("planodeacao-list-create"))]
+
+        def kanban_update():
+            dados = [
+                {"plano_id": v.plano_id, "recomendacao_id": v.recomendacao_id,
+                 "status": self.rng.choice(["A Fazer", "Em Progresso", "Finalizado"]), "ordem": idx}
+                for idx, v in enumerate(vinculos)
+            ]
+            return [client.post(reverse("kanban-update"), {"dados": dados}, format="json")]
+
+        scenarios = {
+            "framework_detail": framework_detail,
+            "answer_autosave_burst": autosave_burst,
+            "run_assessment": run_assessment,
+            "run_assessment_unchanged": run_assessment_unchanged,
+            "recommendation_gap_check": gap_check,
+            "action_plan_list": plan_list,
+            "kanban_update": kanban_update,
+        }
+
+        results = {}
+        # mede o custo da aplicação, não do throttling
+        with mock.patch.object(APIView, "get_throttles", lambda self: []):
+            for name, fn in scenarios.items():
+                durations, queries = [], []
+                for _ in range(max(1, opts["repeat"])):
+                    with CaptureQueriesContext(connection) as ctx:
+                        t0 = time.perf_counter()
+                        responses = fn()
+                        durations.append((time.perf_counter() - t0) * 1000)
+                    queries.append(len(ctx))
+                    bad = [r.status_code for r in responses if r.status_code >= 400]
+                    if bad:
+                        raise CommandError(f"Cenário {name} falhou: HTTP {bad[0]}")
+                results[name] = _summarize(durations, queries)
+                self.stderr.write(f"{name}: mediana {results[name]['median_ms']} ms")
+        return results
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.openapi import schema_dir, write_schema
+
+
+class Command(BaseCommand):
+    help = "Gera o schema OpenAPI (JSON + YAML) servido em /swagger.json e /swagger-<versão>.json."
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        version = write_schema()
+        self.stdout.write(self.style.SUCCESS(
+            f"Schema gerado em {schema_dir()} (versão {version}, {time.perf_counter() - t0:.2f}s)."
+        ))
@@ -0,0 +1,69 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+TARGETS = {
+    # o que um worker do gunicorn importa até estar pronto
+    "wsgi": "import config.wsgi",
+    # o que qualquer `manage.py <comando>` paga antes de rodar
+    "manage": "import django; django.setup()",
+    # wsgi + warmup completo dos módulos pesados
+    "warmup": "import config.wsgi; from assessments.warmup import preimport; preimport()",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Relatório de tempo de import (python -X importtime) do boot do worker ou do manage.py: "
+        "módulos mais caros por tempo próprio e acumulado, e total por pacote de topo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=sorted(TARGETS), default="wsgi")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--json", action="store_true", help="Saída em JSON.")
+
+    def handle(self, *args, **opts):
+        code = f"import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings'); {TARGETS[opts['target']]}"
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=Path(settings.BASE_DIR), capture_output=True, text=True,
+        )
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        if proc.returncode != 0 and not rows:
+            self.stderr.write(proc.stderr[-2000:])
+            return
+
+        by_package = defaultdict(int)
+        for name, self_us, _ in rows:
+            by_package[name.split(".")[0]] += self_us
+        total_us = sum(by_package.values())
+
+        top = opts["top"]
+        report = {
+            "target": opts["target"],
+            "total_ms": round(total_us / 1000, 1),
+            "modules": len(rows),
+            "by_self": [(n, round(s / 1000, 1)) for n, s, _ in sorted(rows, key=lambda r: -r[1])[:top]],
+            "by_cumulative": [(n, round(c / 1000, 1)) for n, _, c in sorted(rows, key=lambda r: -r[2])[:top]],
+            "by_package": [(p, round(s / 1000, 1)) for p, s in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]],
+        }
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+            return
+
+        self.stdout.write(f"Alvo: {report['target']} — {report['modules']} módulos, {report['total_ms']} ms de import")
+        for title, key in (("Por pacote", "by_package"), ("Tempo próprio", "by_self"), ("Acumulado", "by_cumulative")):
+            self.stdout.write(f"\n{title} (ms):")
+            for name, ms in report[key]:
+                self.stdout.write(f"  {ms:>9.1f}  {name}")
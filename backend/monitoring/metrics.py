@@ -0,0 +1,290 @@
+# monitoring/metrics.py
+"""
+Métricas internas no formato Prometheus, compartilhadas entre workers.
+
+Cada processo acumula os incrementos em memória e os descarrega no SQLite local
+(settings.METRICS_DB_PATH) a cada METRICS_FLUSH_INTERVAL segundos, numa única transação
+de UPSERT, a partir de uma thread de fundo — a requisição só soma num dict, sem tocar
+no disco. Os 3 workers do gunicorn agregam no mesmo lugar sem servidor extra; /metrics
+vê os dados dos outros workers com até um intervalo de atraso.
+
+- counters/histogramas: somados entre processos (pid = 0)
+- gauges: um valor por pid (ex.: requisições em andamento por worker); linhas de pids
+  mortos são ignoradas na exposição e apagadas
+
+Falhas aqui nunca derrubam a requisição: são logadas e ignoradas.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "fs3m_http_request_duration_seconds": "Tempo total da requisição por endpoint (url_name).",
+    "fs3m_http_requests_inflight": "Requisições em andamento por worker (pid).",
+    "fs3m_assessment_duration_seconds": "Tempo de cálculo do assessment por calculadora.",
+    "fs3m_answers_written_total": "Respostas gravadas (use rate() para respostas/minuto).",
+    "fs3m_assessment_singleflight_total": "Execuções de assessment: calculadas, reaproveitadas de uma chamada concorrente ou sem mudança (fingerprint).",
+    "fs3m_progress_recalc_total": "Recalculos de progresso de Submission.",
+    "fs3m_cache_requests_total": "Consultas a caches internos por resultado (hit/miss).",
+    "fs3m_cache_hit_ratio": "Razão hit/(hit+miss) por cache, desde o início da coleta.",
+}
+TYPES = {
+    "fs3m_http_request_duration_seconds": "histogram",
+    "fs3m_http_requests_inflight": "gauge",
+    "fs3m_assessment_duration_seconds": "histogram",
+    "fs3m_answers_written_total": "counter",
+    "fs3m_assessment_singleflight_total": "counter",
+    "fs3m_progress_recalc_total": "counter",
+    "fs3m_cache_requests_total": "counter",
+    "fs3m_cache_hit_ratio": "gauge",
+}
+
+_lock = threading.Lock()
+_conn = None
+_conn_pid = None
+
+_pending_lock = threading.Lock()
+_pending = defaultdict(float)  # (name, labels_json, pid) -> incremento ainda não gravado
+_flusher_pid = None
+
+
+def _enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def _connection():
+    """Conexão por processo (reabre após fork do gunicorn)."""
+    global _conn, _conn_pid
+    pid = os.getpid()
+    if _conn is None or _conn_pid != pid:
+        conn = sqlite3.connect(settings.METRICS_DB_PATH, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " name TEXT NOT NULL, labels TEXT NOT NULL, pid INTEGER NOT NULL, value REAL NOT NULL,"
+            " PRIMARY KEY (name, labels, pid))"
+        )
+        _conn, _conn_pid = conn, pid
+    return _conn
+
+
+def _labels(labels):
+    return json.dumps(labels or {}, sort_keys=True, ensure_ascii=False)
+
+
+def _flush_loop():
+    interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+    while True:
+        time.sleep(interval)
+        flush()
+
+
+def _ensure_flusher():
+    """Uma thread de descarga por processo (a do master não sobrevive ao fork)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _pending_lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def _write(rows):
+    """rows: [(name, labels_json, pid, value)] — soma no buffer do processo."""
+    if not _enabled():
+        return
+    _ensure_flusher()
+    with _pending_lock:
+        for name, labels, pid, value in rows:
+            _pending[(name, labels, pid)] += value
+
+
+def flush():
+    """Grava o buffer do processo numa única transação (UPSERT somando)."""
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return
+        batch, _pending = _pending, defaultdict(float)
+    sql = (
+        "INSERT INTO samples (name, labels, pid, value) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (name, labels, pid) DO UPDATE SET value = value + excluded.value"
+    )
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(sql, [(*key, value) for key, value in batch.items()])
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    except Exception:
+        # devolve ao buffer para a próxima tentativa (as chaves são limitadas: não cresce sem fim)
+        with _pending_lock:
+            for key, value in batch.items():
+                _pending[key] += value
+        logger.debug("Falha ao gravar métricas", exc_info=True)
+
+
+def _after_fork_in_child():
+    """
+    Com preload_app o master já instrumentou algo (warmup) antes do fork: o filho não
+    pode herdar esse buffer (seria gravado de novo por cada worker) nem locks que
+    estavam presos no momento do fork. O flusher do master não existe no filho.
+    """
+    global _lock, _pending_lock, _pending, _flusher_pid, _conn, _conn_pid
+    _lock = threading.Lock()
+    _pending_lock = threading.Lock()
+    _pending = defaultdict(float)
+    _flusher_pid = None
+    _conn = _conn_pid = None  # a conexão SQLite do pai não pode ser usada no filho
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(flush)
+
+
+# ======= API de instrumentação =======
+
+def inc(name: str, labels: dict | None = None, value: float = 1.0):
+    _write([(name, _labels(labels), 0, value)])
+
+
+def gauge_inc(name: str, labels: dict | None = None, value: float = 1.0):
+    _write([(name, _labels(labels), os.getpid(), value)])
+
+
+def gauge_dec(name: str, labels: dict | None = None, value: float = 1.0):
+    gauge_inc(name, labels, -value)
+
+
+def observe(name: str, seconds: float, labels: dict | None = None, buckets=DEFAULT_BUCKETS):
+    labels = dict(labels or {})
+    # grava todos os buckets (inclusive com 0) para a série ficar completa na exposição
+    rows = [
+        (f"{name}_bucket", _labels({**labels, "le": str(le)}), 0, 1.0 if seconds <= le else 0.0)
+        for le in buckets
+    ]
+    rows.append((f"{name}_bucket", _labels({**labels, "le": "+Inf"}), 0, 1.0))
+    rows.append((f"{name}_sum", _labels(labels), 0, seconds))
+    rows.append((f"{name}_count", _labels(labels), 0, 1.0))
+    _write(rows)
+
+
+def cache_hit(cache: str):
+    inc("fs3m_cache_requests_total", {"cache": cache, "result": "hit"})
+
+
+def cache_miss(cache: str):
+    inc("fs3m_cache_requests_total", {"cache": cache, "result": "miss"})
+
+
+# ======= Exposição =======
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _fmt_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in sorted(labels.items()):
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_value(value) -> str:
+    # repr: menor representação exata do float ({:g} corta em 6 dígitos: 1234567 -> 1.23457e+06)
+    return repr(float(value))
+
+
+def _family(sample_name: str) -> str:
+    for suffix in ("_bucket", "_sum", "_count"):
+        if sample_name.endswith(suffix) and TYPES.get(sample_name[: -len(suffix)]) == "histogram":
+            return sample_name[: -len(suffix)]
+    return sample_name
+
+
+def render() -> str:
+    """Texto no formato de exposição do Prometheus (version=0.0.4)."""
+    flush()
+    with _lock:
+        rows = _connection().execute("SELECT name, labels, pid, value FROM samples").fetchall()
+
+    families = defaultdict(list)
+    alive = {}
+    cache_counts = defaultdict(lambda: {"hit": 0.0, "miss": 0.0})
+    for name, labels_json, pid, value in rows:
+        labels = json.loads(labels_json)
+        if pid:
+            if pid not in alive:
+                alive[pid] = _pid_alive(pid)
+            if not alive[pid]:
+                continue
+            labels["pid"] = str(pid)
+        if name == "fs3m_cache_requests_total":
+            cache_counts[labels.get("cache", "")][labels.get("result", "miss")] += value
+        families[_family(name)].append((name, labels, value))
+
+    dead = [pid for pid, ok in alive.items() if not ok]
+    if dead:
+        # gauges de workers que morreram (reciclados pelo gunicorn) não voltam: apaga as linhas
+        try:
+            with _lock:
+                _connection().execute(
+                    f"DELETE FROM samples WHERE pid IN ({','.join('?' * len(dead))})", dead,
+                )
+        except Exception:
+            logger.debug("Falha ao remover gauges de pids mortos", exc_info=True)
+
+    for cache, c in cache_counts.items():
+        total = c["hit"] + c["miss"]
+        ratio = c["hit"] / total if total else 0.0
+        families["fs3m_cache_hit_ratio"].append(("fs3m_cache_hit_ratio", {"cache": cache}, ratio))
+
+    def le_key(sample):
+        le = sample[1].get("le")
+        return float("inf") if le == "+Inf" else float(le) if le is not None else 0.0
+
+    lines = []
+    for family in sorted(families):
+        if family in HELP:
+            lines.append(f"# HELP {family} {HELP[family]}")
+        lines.append(f"# TYPE {family} {TYPES.get(family, 'untyped')}")
+        samples = sorted(
+            families[family],
+            key=lambda s: (s[0], _fmt_labels({k: v for k, v in s[1].items() if k != "le"}), le_key(s)),
+        )
+        for name, labels, value in samples:
+            lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _pending_lock:
+        _pending.clear()
+    with _lock:
+        _connection().execute("DELETE FROM samples")
@@ -0,0 +1,159 @@
+# monitoring/middleware.py
+import cProfile
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+
+from . import metrics, profiling, stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryMetricsMiddleware:
+    """
+    Mede nº de queries, tempo de banco e tempo total por requisição,
+    agregando por url_name (ex.: 'run-assessment', 'client-dashboard').
+
+    - Sempre registra em monitoring.stats e anexa `response.query_metrics`
+      (usado por monitoring.testing nos testes).
+    - Com DEBUG (ou QUERY_METRICS_HEADERS=True) expõe X-DB-Queries, X-DB-Time-ms e X-Total-Time-ms.
+    - Loga um warning quando o orçamento de settings.QUERY_BUDGETS é estourado.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, "QUERY_METRICS_HEADERS", settings.DEBUG)
+
+    def __call__(self, request):
+        counter = {"queries": 0, "db": 0.0}
+
+        def wrapper(execute, sql, params, many, context):
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                counter["queries"] += 1
+                counter["db"] += time.perf_counter() - t0
+
+        start = time.perf_counter()
+        metrics.gauge_inc("fs3m_http_requests_inflight")
+        try:
+            with connection.execute_wrapper(wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.gauge_dec("fs3m_http_requests_inflight")
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = counter["db"] * 1000
+
+        match = getattr(request, "resolver_match", None)
+        url_name = (match.view_name if match else None) or "<unresolved>"
+        stats.record(url_name, counter["queries"], db_ms, total_ms)
+        metrics.observe("fs3m_http_request_duration_seconds", total_ms / 1000, {"view": url_name})
+
+        response.query_metrics = {
+            "url_name": url_name,
+            "queries": counter["queries"],
+            "db_ms": round(db_ms, 2),
+            "total_ms": round(total_ms, 2),
+        }
+        if self.headers:
+            response["X-DB-Queries"] = str(counter["queries"])
+            response["X-DB-Time-ms"] = f"{db_ms:.2f}"
+            response["X-Total-Time-ms"] = f"{total_ms:.2f}"
+
+        budget = stats.get_budget(url_name)
+        if budget is not None and counter["queries"] > budget:
+            logger.warning(
+                "Orçamento de queries excedido em %s: %s > %s", url_name, counter["queries"], budget
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Perfila a requisição (cProfile + SQL com tempos) e grava o artefato em
+    monitoring.profiling, devolvendo `X-Profile-Id`.
+
+    Dispara quando:
+    - um usuário staff envia `X-Profile: 1` (JWT conferido só quando o header vem);
+    - ou por amostragem de fundo, com probabilidade settings.PROFILE_SAMPLE_RATE.
+
+    Com PROFILING_ENABLED=False o middleware sai da cadeia no boot (custo zero).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+
+    def __call__(self, request):
+        reason = None
+        if request.META.get("HTTP_X_PROFILE") in ("1", "true", "yes"):
+            if self._is_staff(request):
+                reason = "header"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            reason = "sample"
+        if reason is None:
+            return self.get_response(request)
+        return self._profile(request, reason)
+
+    @staticmethod
+    def _is_staff(request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            return True
+        from users.authentication import ClaimsJWTAuthentication
+
+        try:
+            result = ClaimsJWTAuthentication().authenticate(request)
+        except Exception:
+            return False
+        return bool(result and result[0].is_staff)
+
+    def _profile(self, request, reason):
+        queries = []
+
+        def wrapper(execute, sql, params, many, context):
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({"sql": sql, "ms": round((time.perf_counter() - t0) * 1000, 3), "many": many})
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with connection.execute_wrapper(wrapper):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        # depois da view: o DRF repassa ao HttpRequest o usuário autenticado pelo JWT
+        user = getattr(request, "user", None)
+        try:
+            profile_id = profiling.save(profiler, {
+                "reason": reason,
+                "user_id": user.id if user is not None and user.is_authenticated else None,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": match.view_name if match else None,
+                "status": response.status_code,
+                "created_at": timezone.now().isoformat(),
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(sum(q["ms"] for q in queries), 2),
+                "queries": queries,
+            })
+        except OSError:
+            logger.warning("profiling: falha ao gravar perfil", exc_info=True)
+            return response
+        response["X-Profile-Id"] = profile_id
+        return response
@@ -0,0 +1,78 @@
+# monitoring/profiling.py
+"""
+Perfis de requisição guardados em disco (settings.PROFILE_DIR).
+
+Cada perfil gera dois arquivos com o mesmo id:
+- <id>.prof  -> dump do cProfile (abrir com snakeviz / `python -m pstats`)
+- <id>.json  -> metadados: rota, usuário (user_id), tempos, top funções e as queries SQL com tempo
+
+Mantém só os PROFILE_MAX_FILES mais recentes.
+"""
+import io
+import json
+import pstats
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+ID_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+def profile_dir() -> Path:
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def new_id() -> str:
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def top_functions(profiler, limit=30) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def save(profiler, meta: dict) -> str:
+    profile_id = new_id()
+    target = profile_dir()
+    profiler.dump_stats(target / f"{profile_id}.prof")
+    meta = {"id": profile_id, **meta, "top": top_functions(profiler)}
+    (target / f"{profile_id}.json").write_text(json.dumps(meta, ensure_ascii=False, default=str))
+    _prune(target)
+    return profile_id
+
+
+def _prune(target: Path):
+    limit = getattr(settings, "PROFILE_MAX_FILES", 200)
+    metas = sorted(target.glob("*.json"))
+    for old in metas[: max(len(metas) - limit, 0)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_profiles(limit=100):
+    """Mais recentes primeiro, sem o texto das funções/queries (resumo)."""
+    result = []
+    for path in sorted(profile_dir().glob("*.json"), reverse=True)[:limit]:
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        meta.pop("top", None)
+        meta["query_count"] = len(meta.pop("queries", []))
+        result.append(meta)
+    return result
+
+
+def get_paths(profile_id):
+    """(json, prof) do perfil, ou None se o id for inválido/inexistente."""
+    if not ID_RE.match(profile_id or ""):
+        return None
+    base = profile_dir() / profile_id
+    meta, prof = base.with_suffix(".json"), base.with_suffix(".prof")
+    return (meta, prof) if meta.exists() else None
@@ -0,0 +1,60 @@
+# monitoring/stats.py
+"""
+Agregado em memória (por processo) de tempo/queries por endpoint (url_name).
+"""
+import threading
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_stats = {}  # url_name -> {...}
+
+
+def get_budget(url_name: str):
+    """Orçamento de queries configurado em settings.QUERY_BUDGETS (ou None)."""
+    return (getattr(settings, "QUERY_BUDGETS", {}) or {}).get(url_name)
+
+
+def record(url_name: str, queries: int, db_ms: float, total_ms: float):
+    with _lock:
+        s = _stats.get(url_name)
+        if s is None:
+            s = _stats[url_name] = {
+                "requests": 0, "queries": 0, "db_ms": 0.0, "total_ms": 0.0,
+                "max_queries": 0, "max_total_ms": 0.0, "over_budget": 0,
+            }
+        s["requests"] += 1
+        s["queries"] += queries
+        s["db_ms"] += db_ms
+        s["total_ms"] += total_ms
+        s["max_queries"] = max(s["max_queries"], queries)
+        s["max_total_ms"] = max(s["max_total_ms"], total_ms)
+        budget = get_budget(url_name)
+        if budget is not None and queries > budget:
+            s["over_budget"] += 1
+
+
+def snapshot():
+    """Cópia com médias calculadas, pronta para serializar."""
+    with _lock:
+        items = {k: dict(v) for k, v in _stats.items()}
+    out = []
+    for url_name, s in sorted(items.items()):
+        n = s["requests"] or 1
+        out.append({
+            "url_name": url_name,
+            "requests": s["requests"],
+            "avg_queries": round(s["queries"] / n, 2),
+            "max_queries": s["max_queries"],
+            "avg_db_ms": round(s["db_ms"] / n, 2),
+            "avg_total_ms": round(s["total_ms"] / n, 2),
+            "max_total_ms": round(s["max_total_ms"], 2),
+            "budget": get_budget(url_name),
+            "over_budget": s["over_budget"],
+        })
+    return out
+
+
+def reset():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,44 @@
+# monitoring/testing.py
+"""
+Helpers para testes verificarem orçamentos de queries por endpoint.
+
+    class PlanosTests(QueryBudgetMixin, APITestCase):
+        def test_lista(self):
+            resp = self.client.get(reverse("planodeacao-list-create"))
+            self.assertWithinQueryBudget(resp)
+
+        def test_servico(self):
+            with assert_max_queries(5):
+                resumo_planos(PlanoDeAcao.objects.all())
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from . import stats
+
+
+@contextmanager
+def assert_max_queries(limit: int, using: str = "default"):
+    with CaptureQueriesContext(connections[using]) as ctx:
+        yield ctx
+    if len(ctx) > limit:
+        sqls = "\n".join(f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, 1))
+        raise AssertionError(f"{len(ctx)} queries executadas (limite {limit}):\n{sqls}")
+
+
+class QueryBudgetMixin:
+    """Mixin para TestCase: compara response.query_metrics com settings.QUERY_BUDGETS."""
+
+    def assertWithinQueryBudget(self, response, budget: int | None = None):
+        metrics = getattr(response, "query_metrics", None)
+        if metrics is None:
+            self.fail("Resposta sem query_metrics: QueryMetricsMiddleware está ativo?")
+        limit = budget if budget is not None else stats.get_budget(metrics["url_name"])
+        if limit is None:
+            self.fail(f"Sem orçamento configurado para '{metrics['url_name']}'.")
+        self.assertLessEqual(
+            metrics["queries"], limit,
+            f"{metrics['url_name']}: {metrics['queries']} queries (orçamento {limit})",
+        )
@@ -0,0 +1,15 @@
+from django.urls import path
+from .views import ProfileDetailView, ProfileListView, QueryMetricsView, prometheus_metrics
+
+urlpatterns = [
+    path("queries/", QueryMetricsView.as_view(), name="monitoring-queries"),
+    path("metrics/", prometheus_metrics, name="monitoring-metrics"),
+    path("profiles/", ProfileListView.as_view(), name="monitoring-profiles"),
+    path("profiles/<str:profile_id>/", ProfileDetailView.as_view(), name="monitoring-profile"),
+    path(
+        "profiles/<str:profile_id>/download/",
+        ProfileDetailView.as_view(),
+        {"download": True},
+        name="monitoring-profile-download",
+    ),
+]
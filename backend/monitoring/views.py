@@ -0,0 +1,67 @@
+import hmac
+import json
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics, profiling, stats
+
+
+class QueryMetricsView(APIView):
+    """
+    GET /api/monitoring/queries/ -> agregados por endpoint (deste processo)
+    DELETE -> zera os contadores
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"endpoints": stats.snapshot()}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def prometheus_metrics(request):
+    """
+    GET /api/monitoring/metrics/ -> formato texto do Prometheus.
+
+    Fora da autenticação JWT (o scraper não tem token de usuário): exige
+    `Authorization: Bearer <METRICS_TOKEN>`; sem METRICS_TOKEN, só responde em DEBUG.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        sent = request.META.get("HTTP_AUTHORIZATION", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(sent, token):
+            return HttpResponse("Não autorizado.", status=401, content_type="text/plain")
+    elif not settings.DEBUG:
+        return HttpResponse("METRICS_TOKEN não configurado.", status=404, content_type="text/plain")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ProfileListView(APIView):
+    """GET /api/monitoring/profiles/ -> perfis gravados (mais recentes primeiro)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"profiles": profiling.list_profiles()}, status=status.HTTP_200_OK)
+
+
+class ProfileDetailView(APIView):
+    """
+    GET /api/monitoring/profiles/<id>/ -> metadados, top funções e queries SQL
+    GET /api/monitoring/profiles/<id>/download/ -> arquivo .prof (cProfile)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profile_id, download=False):
+        paths = profiling.get_paths(profile_id)
+        if not paths:
+            raise Http404
+        meta_path, prof_path = paths
+        if download:
+            return FileResponse(prof_path.open("rb"), as_attachment=True, filename=prof_path.name)
+        return Response(json.loads(meta_path.read_text()), status=status.HTTP_200_OK)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recommendations.models import Recomendacao, risk_score_expression
+
+
+class Command(BaseCommand):
+    help = "Recalcula Recomendacao.risk_score em SQL (backfill após adicionar o campo ou após updates em massa)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submission", type=int, default=None, help="Só as recomendações desta submissão.")
+
+    def handle(self, *args, **opts):
+        qs = Recomendacao.objects.all()
+        if opts["submission"]:
+            qs = qs.filter(submission_id=opts["submission"])
+        expr = risk_score_expression()
+        # só toca as linhas desatualizadas (UPDATE ... WHERE risk_score <> <expressão>)
+        total = qs.filter(~Q(risk_score=expr)).update(risk_score=expr)
+        self.stdout.write(self.style.SUCCESS(f"risk_score atualizado em {total} recomendações."))
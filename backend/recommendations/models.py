@@ -1,7 +1,33 @@
 from django.db import models
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Cast
 from django.core.exceptions import ValidationError
 from users.models import CustomUser
 from responses.models import Submission  # ← usa seu app atual
+from responses.storage import attachment_storage
+
+# peso da prioridade no risk_score: domina o produto urgência × gravidade (1..25)
+PRIORIDADE_PESO = {"alta": 2, "media": 1, "baixa": 0}
+RISK_PRIORIDADE_FATOR = 100
+
+
+def calcular_risk_score(urgencia, gravidade, prioridade) -> int:
+    """prioridade * 100 + urgência × gravidade  (alta/5/5 -> 225, baixa/1/1 -> 1)."""
+    try:
+        produto = int(urgencia) * int(gravidade)
+    except (TypeError, ValueError):
+        produto = 0
+    return PRIORIDADE_PESO.get(prioridade, 0) * RISK_PRIORIDADE_FATOR + produto
+
+
+def risk_score_expression():
+    """Mesma conta em SQL, para recalcular em massa: qs.update(risk_score=risk_score_expression())."""
+    peso = Case(
+        *[When(prioridade=p, then=Value(w * RISK_PRIORIDADE_FATOR)) for p, w in PRIORIDADE_PESO.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+    return peso + Cast("urgencia", IntegerField()) * Cast("gravidade", IntegerField())
+
 
 class Recomendacao(models.Model):
     CATEGORIA_CHOICES = [
@@ -40,6 +66,8 @@ class Recomendacao(models.Model):
     # Detalhes
     detalhes = models.TextField()
     investimentos = models.CharField(max_length=255)
+    # custo numérico (R$) usado pelo otimizador de planos; vazio -> estimado (actionplans/optimizer.py)
+    custo_estimado = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     riscos = models.TextField(default="Não informado")
     justificativa = models.TextField(default="Não informado")
     observacoes = models.TextField(default="Nenhuma observação adicional")
@@ -47,11 +75,13 @@ class Recomendacao(models.Model):
     # Avaliação
     urgencia = models.CharField(max_length=1, choices=URGENCIA_CHOICES)
     gravidade = models.CharField(max_length=1, choices=GRAVIDADE_CHOICES)
+    # derivado de prioridade/urgência/gravidade (calcular_risk_score); mantido no save e nos bulk
+    risk_score = models.PositiveSmallIntegerField(default=0, editable=False)
 
     # Status
     cumprida = models.BooleanField(default=False)
     data_cumprimento = models.DateField(null=True, blank=True)
-    comprovante = models.FileField(upload_to="comprovantes/", null=True, blank=True)
+    comprovante = models.FileField(upload_to="comprovantes/", storage=attachment_storage, max_length=255, null=True, blank=True)
 
     # Metadata
     criado_em = models.DateTimeField(auto_now_add=True)
@@ -64,7 +94,11 @@ class Recomendacao(models.Model):
     class Meta:
         verbose_name = "Recomendação"
         verbose_name_plural = "Recomendações"
-        ordering = ["-prioridade", "data_fim"]
+        ordering = ["-risk_score", "data_fim", "id"]
+        indexes = [
+            # fila priorizada por submissão (RecomendacaoFilaView) servida direto do índice
+            models.Index(fields=["submission", "-risk_score", "data_fim", "id"], name="rec_sub_risk_idx"),
+        ]
 
     def __str__(self):
         return f"{self.nome} (Cliente: {self.cliente})"
@@ -75,6 +109,14 @@ class Recomendacao(models.Model):
         if not self.meses or self.meses <= 0:
             raise ValidationError("O prazo em meses deve ser maior que zero.")
 
+    def atualizar_risk_score(self):
+        self.risk_score = calcular_risk_score(self.urgencia, self.gravidade, self.prioridade)
+        return self
+
     def save(self, *args, **kwargs):
         self.full_clean()
+        self.atualizar_risk_score()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"urgencia", "gravidade", "prioridade"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "risk_score"}
         super().save(*args, **kwargs)
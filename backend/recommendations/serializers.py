@@ -3,6 +3,7 @@ from .models import Recomendacao
 from django.shortcuts import get_object_or_404
 from users.models import CustomUser
 from responses.models import Submission
+from responses.serializers import DownloadFileField
 
 class RecomendacaoSerializer(serializers.ModelSerializer):
     cliente = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -13,11 +14,12 @@ class RecomendacaoSerializer(serializers.ModelSerializer):
     prioridade_display = serializers.CharField(source='get_prioridade_display', read_only=True)
     urgencia_display = serializers.CharField(source='get_urgencia_display', read_only=True)
     gravidade_display = serializers.CharField(source='get_gravidade_display', read_only=True)
+    comprovante = DownloadFileField("recomendacao-comprovante")
 
     class Meta:
         model = Recomendacao
         fields = '__all__'
-        read_only_fields = ['id', 'criado_em', 'atualizado_em', 'analista']
+        read_only_fields = ['id', 'criado_em', 'atualizado_em', 'analista', 'risk_score']
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -1,3 +1,52 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from frameworks.models import Control, Domain, FormTemplate, Framework, Question
+from monitoring.testing import QueryBudgetMixin
+from responses.models import Answer, Submission
+from users.models import CustomUser
+
+from .models import Recomendacao
+
+
+class VerificarRecomendacoesQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """O check de faltantes não pode fazer uma query por resposta/controle."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = CustomUser.objects.create_user(
+            email="gestor@teste.local", password=None, nome="Gestor", role="gestor",
+        )
+        cliente = CustomUser.objects.create_user(
+            email="cliente@teste.local", password=None, nome="Cliente", role="cliente",
+        )
+        fw = Framework.objects.create(slug="fw-teste", name="Framework Teste")
+        tpl = FormTemplate.objects.create(name="Template Teste", slug="fw-teste-tpl", framework=fw)
+        domain = Domain.objects.create(framework=fw, code="PR", title="Proteger")
+        cls.sub = Submission.objects.create(customer=cliente, template=tpl, framework=fw)
+
+        answers = []
+        for k in range(6):
+            control = Control.objects.create(framework=fw, domain=domain, code=f"PR.AA-0{k + 1}", title=f"Controle {k}", order=k)
+            question = Question.objects.create(control=control, local_code="score", prompt=f"Maturidade {k}", type="scale")
+            answers.append(Answer(submission=cls.sub, question=question, value={"type": "scale", "value": 2}, score=2))
+        Answer.objects.bulk_create(answers)
+
+        hoje = date.today()
+        Recomendacao.objects.create(
+            cliente=cliente, submission=cls.sub, analista=cls.gestor,
+            nome="Recomendação", nist="PR.AA-01", categoria="Proteger (PR)", prioridade="alta",
+            data_inicio=hoje, data_fim=hoje, meses=1, detalhes="Teste.", investimentos="R$ 0",
+            urgencia="4", gravidade="4",
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.gestor)
+
+    def test_verificar_recomendacoes(self):
+        resp = self.client.get(reverse("verificar-recomendacoes", args=[self.sub.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["total_faltantes"], 5)
+        self.assertWithinQueryBudget(resp)
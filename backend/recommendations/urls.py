@@ -2,11 +2,17 @@ from django.urls import path
 from .views import (
     RecomendacaoListCreateView,
     RecomendacaoRetrieveUpdateDestroyView,
+    RecomendacaoFilaView,
     verificar_recomendacoes_faltantes,
+    baixar_comprovante,
 )
 
 urlpatterns = [
     path("recommendations/<int:cliente_id>/<int:submission_id>/", RecomendacaoListCreateView.as_view(), name="recomendacoes-list-create"),
     path("recommendations/<int:pk>/", RecomendacaoRetrieveUpdateDestroyView.as_view(), name="recomendacao-detail"),
+    path("recommendations/<int:pk>/comprovante/", baixar_comprovante, name="recomendacao-comprovante"),
+    # mesmo download, com o nome do arquivo no fim da URL (é o que os serializers devolvem)
+    path("recommendations/<int:pk>/comprovante/<str:filename>", baixar_comprovante, name="recomendacao-comprovante"),
     path("submissions/<int:submission_id>/recommendations/check-missing/", verificar_recomendacoes_faltantes, name="verificar-recomendacoes"),
+    path("submissions/<int:submission_id>/recommendations/queue/", RecomendacaoFilaView.as_view(), name="recomendacoes-fila"),
 ]
@@ -1,14 +1,22 @@
 from decimal import Decimal
 from collections import defaultdict
+from datetime import date
 import logging
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
 from .models import Recomendacao
 from .serializers import RecomendacaoSerializer
 from responses.models import Submission, Answer
+from actionplans.services import aplicar_mudanca_cumprida, recalcular_resumo
+from responses.files import has_valid_signature, serve_file
+from config.pagination import keyset_page
+from users.permissions import can_access_client
 
 logger = logging.getLogger(__name__)
 
@@ -140,4 +148,66 @@ class RecomendacaoRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVie
     def perform_update(self, serializer):
         if "analista" in serializer.validated_data:
             serializer.validated_data.pop("analista")
-        serializer.save()
+        cumprida_antes = serializer.instance.cumprida
+        rec = serializer.save()
+        aplicar_mudanca_cumprida(rec.id, cumprida_antes, rec.cumprida)
+
+    def perform_destroy(self, instance):
+        # os vínculos caem em cascata: recalcula os planos afetados
+        planos_ids = list(instance.planodeacaorecomendacao_set.values_list("plano_id", flat=True))
+        instance.delete()
+        for plano_id in planos_ids:
+            recalcular_resumo(plano_id)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def baixar_comprovante(request, pk, filename=None):
+    """
+    Download do comprovante via X-Accel-Redirect (nginx). Aceita a URL assinada que o
+    serializer devolve; sem assinatura válida, exige JWT e permissão sobre o cliente.
+    """
+    rec = get_object_or_404(Recomendacao, pk=pk)
+    if not rec.comprovante:
+        raise Http404("Recomendação sem comprovante.")
+    if not has_valid_signature(request, rec.comprovante):
+        if not request.user.is_authenticated:
+            raise NotAuthenticated()
+        if not can_access_client(request.user, rec.cliente_id):
+            return Response({"detail": "Sem permissão."}, status=status.HTTP_403_FORBIDDEN)
+    return serve_file(rec.comprovante)
+
+
+# ========= FILA PRIORIZADA =========
+class RecomendacaoFilaView(APIView):
+    """
+    /api/submissions/<submission_id>/recommendations/queue/?pendentes=1&cursor=<next_cursor>&limit=50
+
+    Recomendações da submissão em ordem de risco (risk_score desc, data_fim, id), com
+    paginação por keyset: cada página é uma varredura do índice rec_sub_risk_idx, sem
+    ordenar o backlog inteiro nem OFFSET.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 200
+
+    def get(self, request, submission_id):
+        submission = get_object_or_404(Submission.objects.only("id", "customer_id"), id=submission_id)
+        if not can_access_client(request.user, submission.customer_id):
+            return Response({"detail": "Sem permissão."}, status=status.HTTP_403_FORBIDDEN)
+
+        params = request.query_params
+        qs = Recomendacao.objects.filter(submission_id=submission.id)
+        if params.get("pendentes") in ("1", "true"):
+            qs = qs.filter(cumprida=False)
+        try:
+            page, next_cursor = keyset_page(
+                qs, ("-risk_score", "data_fim", "id"), (int, date.fromisoformat, int),
+                cursor=params.get("cursor"), limit=params.get("limit"), max_limit=self.max_limit,
+            )
+        except (TypeError, ValueError):
+            return Response({"detail": "Parâmetros inválidos (cursor/limit)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": RecomendacaoSerializer(page, many=True, context={"request": request}).data,
+            "next_cursor": next_cursor,
+        })
@@ -0,0 +1,89 @@
+# responses/crypto.py
+"""
+Chaveiro Fernet construído uma vez a partir de settings.FERNET_KEYS.
+
+Formato gravado em Answer.encrypted_evidence:
+    b"<key_id>$<token fernet>"     (key_id = 8 hex do sha256 da chave)
+Tokens antigos, sem prefixo, continuam legíveis por tentativa em todas as chaves.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+
+KEY_ID_LEN = 8
+SEP = b"$"
+
+
+def key_id(key: str) -> bytes:
+    return hashlib.sha256(key.encode()).hexdigest()[:KEY_ID_LEN].encode()
+
+
+@lru_cache(maxsize=4)
+def _build_keyring(keys: tuple):
+    from cryptography.fernet import Fernet
+
+    return [(key_id(k), Fernet(k.encode())) for k in keys]
+
+
+def get_keyring():
+    """[(key_id, Fernet)] na ordem de FERNET_KEYS (a primeira é a primária)."""
+    return _build_keyring(tuple(getattr(settings, "FERNET_KEYS", []) or []))
+
+
+def primary_key_id():
+    keyring = get_keyring()
+    return keyring[0][0] if keyring else None
+
+
+def split_blob(blob) -> tuple[bytes | None, bytes]:
+    """Separa (key_id, token). key_id = None para tokens legados sem prefixo."""
+    data = bytes(blob)
+    kid, sep, token = data.partition(SEP)
+    if sep and len(kid) == KEY_ID_LEN:
+        return kid, token
+    return None, data
+
+
+def encrypt(text: str) -> bytes | None:
+    """Criptografa com a chave primária. Sem chaves configuradas, retorna None."""
+    keyring = get_keyring()
+    if not keyring:
+        return None
+    kid, fernet = keyring[0]
+    return kid + SEP + fernet.encrypt((text or "").encode())
+
+
+def try_decrypt(blob) -> str | None:
+    """Decifra indo direto à chave do prefixo; tokens legados tentam todas. None se nenhuma servir."""
+    from cryptography.fernet import InvalidToken
+
+    if not blob:
+        return ""
+    kid, token = split_blob(blob)
+    keyring = get_keyring()
+    candidates = [f for k, f in keyring if k == kid] if kid else [f for _, f in keyring]
+    for fernet in candidates:
+        try:
+            return fernet.decrypt(token).decode()
+        except (InvalidToken, ValueError):
+            continue
+    return None
+
+
+def decrypt(blob) -> str:
+    """Como try_decrypt, mas '' quando nenhuma chave funciona."""
+    text = try_decrypt(blob)
+    return "" if text is None else text
+
+
+def decrypt_answers(answers):
+    """
+    Decifra a evidência de vários Answer de uma vez, guardando o texto em cada instância
+    (lido por Answer.get_decrypted_evidence). Retorna a lista de answers.
+    """
+    answers = list(answers)
+    for a in answers:
+        if "_decrypted_evidence" not in a.__dict__:
+            a._decrypted_evidence = decrypt(a.encrypted_evidence) if a.encrypted_evidence else (a.evidence or "")
+    return answers
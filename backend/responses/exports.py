@@ -0,0 +1,231 @@
+# responses/exports.py
+"""
+Pacote de evidências de uma submission em ZIP, gerado em blocos com memória
+constante (evidence_bundle é um gerador; cada bloco escrito no ZIP sai em seguida).
+O zipfile aceita destino não "seekable" e grava os tamanhos em data descriptors.
+
+Conteúdo:
+    manifest.csv                    controle, pergunta, nota, valor, evidência (decifrada), anexo
+    anexos/<controle>/<answer>_<nome>
+    comprovantes/<recomendação>_<nome>
+    erros.txt                       (se algum arquivo não pôde ser lido)
+
+Servir o ZIP em streaming prenderia um worker síncrono do gunicorn pelo download inteiro
+(e o arbiter o mataria no timeout, truncando o arquivo). Por isso o endpoint usa
+ensure_bundle(): o ZIP é montado em disco por uma thread de fundo (um por submissão e
+"carimbo" das respostas) e, pronto, servido pelo nginx via X-Accel-Redirect como os
+anexos. Enquanto monta, o endpoint responde 202 e o cliente tenta de novo.
+
+O ZIP leva as evidências decifradas: fica em EVIDENCE_BUNDLE_DIR, fora de MEDIA_ROOT (e do
+backup do volume de mídia), e é apagado EVIDENCE_BUNDLE_TTL segundos depois de montado
+(purge_expired, chamado a cada ensure_bundle e por `manage.py purge_evidence_bundles`).
+"""
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max
+
+from .models import Answer
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 256 * 1024
+
+
+class _StreamBuffer:
+    """Destino de escrita do ZipFile que só acumula até o próximo pop()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _answer_zip_path(answer) -> str:
+    code = answer.question.control.code.replace("/", "_")
+    return f"anexos/{code}/{answer.id}_{os.path.basename(answer.attachment.name)}"
+
+
+def evidence_bundle(submission):
+    """Gerador de bytes do ZIP (usar com StreamingHttpResponse)."""
+    from recommendations.models import Recomendacao
+
+    buf = _StreamBuffer()
+    errors = []
+    answers = (
+        Answer.objects.filter(submission=submission)
+        .select_related("question__control")
+        .order_by("question__control__code", "question_id")
+    )
+
+    with zipfile.ZipFile(buf, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        # 1) manifesto, linha a linha
+        with zf.open("manifest.csv", mode="w", force_zip64=True) as entry:
+            text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(["controle", "pergunta_id", "codigo_local", "pergunta", "nota", "valor", "evidencia", "anexo"])
+            for a in answers.iterator(chunk_size=500):
+                q = a.question
+                writer.writerow([
+                    q.control.code, q.id, q.local_code, q.prompt,
+                    "" if a.score is None else str(a.score),
+                    json.dumps(a.value, ensure_ascii=False) if a.value else "",
+                    a.get_decrypted_evidence(),
+                    _answer_zip_path(a) if a.attachment else "",
+                ])
+                text.flush()
+                yield buf.pop()
+            text.flush()
+            text.detach()
+        yield buf.pop()
+
+        # 2) anexos das respostas e comprovantes das recomendações, em blocos
+        files = [
+            (a.attachment, _answer_zip_path(a))
+            for a in answers.exclude(attachment="").exclude(attachment__isnull=True).iterator(chunk_size=500)
+        ]
+        files += [
+            (r.comprovante, f"comprovantes/{r.id}_{os.path.basename(r.comprovante.name)}")
+            for r in Recomendacao.objects.filter(submission=submission)
+            .exclude(comprovante="").exclude(comprovante__isnull=True).only("id", "comprovante")
+        ]
+        for fieldfile, arcname in files:
+            try:
+                src = fieldfile.open("rb")
+            except (FileNotFoundError, OSError) as e:
+                errors.append(f"{arcname}: {e}")
+                continue
+            info = zipfile.ZipInfo(arcname)
+            info.compress_type = zipfile.ZIP_STORED  # PDFs/imagens já vêm comprimidos
+            with src, zf.open(info, mode="w", force_zip64=True) as entry:
+                for chunk in src.chunks(READ_CHUNK):
+                    entry.write(chunk)
+                    yield buf.pop()
+            yield buf.pop()
+
+        if errors:
+            zf.writestr("erros.txt", "\n".join(errors))
+    yield buf.pop()
+
+
+# ========= montagem em disco (fora do request) =========
+def bundle_dir() -> Path:
+    path = Path(settings.EVIDENCE_BUNDLE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def bundle_stamp(submission) -> str:
+    """Muda sempre que respostas, anexos ou comprovantes da submissão mudam."""
+    from recommendations.models import Recomendacao
+
+    answers = Answer.objects.filter(submission=submission).aggregate(n=Count("id"), last=Max("answered_at"))
+    recs = Recomendacao.objects.filter(submission=submission).aggregate(n=Count("id"), last=Max("atualizado_em"))
+    raw = f"{submission.updated_at}|{answers['n']}|{answers['last']}|{recs['n']}|{recs['last']}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def bundle_path(submission, stamp: str) -> Path:
+    return bundle_dir() / f"submission_{submission.id}_{stamp}.zip"
+
+
+def write_bundle(submission, target: Path, lock: Path | None = None):
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    last_beat = time.monotonic()
+    with open(tmp, "wb") as fh:
+        for chunk in evidence_bundle(submission):
+            fh.write(chunk)
+            if lock is not None and time.monotonic() - last_beat > 30:
+                os.utime(lock)  # sinal de vida: a montagem não é dada como abandonada
+                last_beat = time.monotonic()
+    os.replace(tmp, target)
+    # versões antigas da mesma submissão não servem mais
+    for old in target.parent.glob(f"submission_{submission.id}_*.zip"):
+        if old != target:
+            old.unlink(missing_ok=True)
+
+
+def _build(submission, target: Path, lock: Path):
+    try:
+        write_bundle(submission, target, lock)
+    except Exception:
+        logger.exception("falha ao montar o pacote de evidências da submission %s", submission.id)
+    finally:
+        lock.unlink(missing_ok=True)
+        connection.close()  # conexão própria da thread
+
+
+def purge_expired(ttl: int | None = None) -> int:
+    """
+    Apaga pacotes montados há mais de `ttl` segundos (padrão EVIDENCE_BUNDLE_TTL) e sobras
+    de montagens abandonadas (.tmp/.building). Um download em andamento não é afetado:
+    o nginx já tem o arquivo aberto. Retorna o nº de arquivos removidos.
+    """
+    ttl = settings.EVIDENCE_BUNDLE_TTL if ttl is None else ttl
+    now = time.time()
+    removidos = 0
+    for path in bundle_dir().iterdir():
+        if path.suffix == ".zip":
+            limite = ttl
+        elif path.suffix in (".tmp", ".building"):
+            limite = settings.EVIDENCE_BUNDLE_BUILD_TIMEOUT
+        else:
+            continue
+        try:
+            if now - path.stat().st_mtime >= limite:
+                path.unlink()
+                removidos += 1
+        except FileNotFoundError:
+            pass  # outro worker apagou/concluiu no meio
+    return removidos
+
+
+def ensure_bundle(submission):
+    """
+    Caminho do ZIP pronto para o estado atual da submissão, ou None se ainda está sendo
+    montado (nesse caso dispara a montagem, se ninguém a começou).
+    """
+    purge_expired()
+    target = bundle_path(submission, bundle_stamp(submission))
+    if target.exists():
+        return target
+
+    lock = target.with_suffix(".building")
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # montagem em andamento (outro request/worker) — ou abandonada, se o processo morreu
+        try:
+            started = lock.stat().st_mtime
+        except FileNotFoundError:
+            # a montagem terminou entre o open e o stat: o ZIP já deve estar lá
+            return target if target.exists() else ensure_bundle(submission)
+        if time.time() - started < settings.EVIDENCE_BUNDLE_BUILD_TIMEOUT:
+            return None
+        lock.unlink(missing_ok=True)
+        return ensure_bundle(submission)
+    os.close(fd)
+    threading.Thread(
+        target=_build, args=(submission, target, lock), name=f"evidence-bundle-{submission.id}", daemon=True,
+    ).start()
+    return None
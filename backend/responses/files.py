@@ -0,0 +1,117 @@
+# responses/files.py
+"""
+Download e upload de anexos sem prender worker do gunicorn:
+
+- download: após checar permissão, devolve X-Accel-Redirect e o nginx serve o arquivo
+  (em dev, sem nginx, cai num FileResponse que lê em blocos). As URLs que a API devolve
+  levam uma assinatura curta (?exp=&sig=, DOWNLOAD_URL_TTL) para o front usar direto em
+  <img src>/<a href>, que não mandam o header Authorization;
+- upload: sessões ChunkedUpload recebem pedaços (Content-Range) gravados direto em disco,
+  retomáveis a partir do offset atual.
+"""
+import mimetypes
+import os
+import re
+import time
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+COPY_CHUNK = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+SIGNATURE_SALT = "responses.files.download"
+
+
+def _signature(fieldfile, exp: int) -> str:
+    # amarra a assinatura ao objeto e ao arquivo atual: trocar o anexo invalida as URLs antigas
+    instance = fieldfile.instance
+    value = f"{instance._meta.label_lower}:{instance.pk}:{fieldfile.name}:{exp}"
+    return salted_hmac(SIGNATURE_SALT, value).hexdigest()
+
+
+def signed_query(fieldfile) -> str:
+    """'exp=...&sig=...' válido por settings.DOWNLOAD_URL_TTL segundos."""
+    exp = int(time.time()) + getattr(settings, "DOWNLOAD_URL_TTL", 900)
+    return urlencode({"exp": exp, "sig": _signature(fieldfile, exp)})
+
+
+def has_valid_signature(request, fieldfile) -> bool:
+    exp, sig = request.GET.get("exp"), request.GET.get("sig")
+    if not exp or not sig:
+        return False
+    try:
+        exp = int(exp)
+    except ValueError:
+        return False
+    return exp >= time.time() and constant_time_compare(sig, _signature(fieldfile, exp))
+
+
+def serve_file(fieldfile, download_name: str | None = None):
+    name = fieldfile.name
+    filename = download_name or os.path.basename(name)
+    if getattr(settings, "ATTACHMENTS_X_ACCEL", False):
+        # storage endereçado por conteúdo: o nginx precisa do caminho do blob físico
+        internal = getattr(fieldfile.storage, "internal_name", lambda n: n)(name)
+        return _x_accel(internal, filename)
+    return FileResponse(fieldfile.open("rb"), as_attachment=True, filename=filename)
+
+
+def serve_path(path: Path, download_name: str, root: Path, prefix: str):
+    """
+    Como serve_file, para um arquivo gerado em disco (ex.: pacote de evidências): `root` é
+    o diretório que o nginx expõe na location interna `prefix`.
+    """
+    if getattr(settings, "ATTACHMENTS_X_ACCEL", False):
+        return _x_accel(Path(path).relative_to(root).as_posix(), download_name, prefix)
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=download_name)
+
+
+def _x_accel(internal: str, filename: str, prefix: str | None = None):
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    resp = HttpResponse(content_type=content_type)
+    resp["X-Accel-Redirect"] = (prefix or settings.ATTACHMENTS_X_ACCEL_PREFIX) + quote(internal)
+    resp["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    return resp
+
+
+def parse_content_range(header: str):
+    """'bytes 0-1048575/5000000' -> (start, end, total) ou None."""
+    m = CONTENT_RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    start, end, total = (int(g) for g in m.groups())
+    if end < start or end >= total:
+        return None
+    return start, end, total
+
+
+def upload_temp_path(upload) -> Path:
+    base = Path(settings.CHUNKED_UPLOAD_DIR)
+    base.mkdir(parents=True, exist_ok=True)
+    return base / f"{upload.id}.part"
+
+
+def append_chunk(upload, stream, length: int) -> int:
+    """
+    Grava `length` bytes do stream a partir de upload.offset, em blocos. Retorna o novo offset.
+
+    Trunca o arquivo parcial no offset gravado antes de escrever: se uma tentativa anterior
+    gravou bytes mas não chegou a salvar o offset (erro/rollback), o reenvio do pedaço
+    sobrescreve esses bytes em vez de ser anexado depois deles.
+    """
+    path = upload_temp_path(upload)
+    remaining = length
+    with open(path, "r+b" if path.exists() else "wb") as fh:
+        fh.truncate(upload.offset)
+        fh.seek(upload.offset)
+        while remaining > 0:
+            data = stream.read(min(COPY_CHUNK, remaining))
+            if not data:
+                break
+            fh.write(data)
+            remaining -= len(data)
+        # o que chegou de fato é a fonte da verdade (cliente pode cair no meio do pedaço)
+        return fh.tell()
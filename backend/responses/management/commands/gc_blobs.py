@@ -0,0 +1,104 @@
+# responses/management/commands/gc_blobs.py
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recommendations.models import Recomendacao
+from responses.models import Answer, StoredBlob
+from responses.storage import BLOBS_DIR, TMP_DIR, attachment_storage, blob_name, parse_cas_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula as referências dos blobs de anexos a partir do banco e remove os órfãos "
+        "(sem Answer.attachment nem Recomendacao.comprovante apontando para eles)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours", type=int, default=24,
+            help="Não remove blobs/temporários mais novos que isso (uploads em andamento). Padrão: 24h.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Só relata o que seria removido.")
+
+    def handle(self, *args, **opts):
+        dry = opts["dry_run"]
+        limite = timezone.now() - timedelta(hours=opts["grace_hours"])
+        storage = attachment_storage()
+
+        # 1) referências reais, direto do banco
+        refs = Counter()
+        for qs in (
+            Answer.objects.exclude(attachment="").exclude(attachment__isnull=True).values_list("attachment", flat=True),
+            Recomendacao.objects.exclude(comprovante="").exclude(comprovante__isnull=True).values_list("comprovante", flat=True),
+        ):
+            for name in qs.iterator(chunk_size=2000):
+                sha = parse_cas_name(name)
+                if sha:
+                    refs[sha] += 1
+
+        # 2) corrige contadores. Blobs referenciados dentro da carência ficam de fora (a nova
+        # Answer/Recomendação pode ainda não estar no retrato do passo 1), e o UPDATE é
+        # condicional ao valor lido: um F()+1 concorrente nunca é sobrescrito.
+        changed = 0
+        for sha, seen in (
+            StoredBlob.objects.filter(referenced_at__lt=limite)
+            .values_list("sha256", "ref_count").iterator(chunk_size=2000)
+        ):
+            real = refs.get(sha, 0)
+            if seen == real:
+                continue
+            changed += 1
+            if not dry:
+                StoredBlob.objects.filter(sha256=sha, ref_count=seen).update(ref_count=real)
+
+        # 3) remove blobs sem referência (fora da janela de carência). A condição é conferida
+        # de novo com a linha travada — o storage conta novas referências sob o mesmo lock.
+        orphans = StoredBlob.objects.filter(ref_count=0, referenced_at__lt=limite)
+        freed = removed = 0
+        for sha, size in list(orphans.values_list("sha256", "size")):
+            if dry:
+                freed += size
+                removed += 1
+                continue
+            with transaction.atomic():
+                blob = orphans.select_for_update().filter(sha256=sha).first()
+                if blob is None:
+                    continue
+                path = storage.path(blob_name(blob.sha256))
+                if os.path.exists(path):
+                    os.remove(path)
+                blob.delete()
+            freed += blob.size
+            removed += 1
+
+        # 4) arquivos físicos sem registro e temporários abandonados
+        known = set(StoredBlob.objects.values_list("sha256", flat=True))
+        cutoff = time.time() - opts["grace_hours"] * 3600
+        stray = 0
+        for rel, is_blob_dir in ((BLOBS_DIR, True), (TMP_DIR, False)):
+            root = storage.path(rel)
+            if not os.path.isdir(root):
+                continue
+            for dirpath, _, files in os.walk(root):
+                for fname in files:
+                    path = os.path.join(dirpath, fname)
+                    if is_blob_dir and fname in known:
+                        continue
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    stray += 1
+                    freed += os.path.getsize(path)
+                    if not dry:
+                        os.remove(path)
+
+        prefix = "[dry-run] " if dry else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Contadores corrigidos: {changed} | blobs órfãos: {removed} | "
+            f"arquivos soltos: {stray} | liberado: {freed / (1024 * 1024):.1f} MB"
+        ))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from responses.files import upload_temp_path
+from responses.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = "Remove sessões de upload em pedaços abandonadas (e seus arquivos parciais)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-hours", type=int, default=48, help="Idade mínima da sessão. Padrão: 48h.")
+
+    def handle(self, *args, **opts):
+        limite = timezone.now() - timedelta(hours=opts["older_than_hours"])
+        qs = ChunkedUpload.objects.filter(created_at__lt=limite)
+        removidos = 0
+        for upload in qs.iterator():
+            upload_temp_path(upload).unlink(missing_ok=True)
+            upload.delete()
+            removidos += 1
+        self.stdout.write(self.style.SUCCESS(f"Sessões removidas: {removidos}."))
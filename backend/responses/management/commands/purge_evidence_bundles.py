@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from responses.exports import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Remove pacotes de evidências (ZIPs com evidências decifradas) expirados e montagens abandonadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ttl", type=int, default=None,
+            help=f"Idade máxima do ZIP em segundos. Padrão: EVIDENCE_BUNDLE_TTL ({settings.EVIDENCE_BUNDLE_TTL}).",
+        )
+
+    def handle(self, *args, **opts):
+        removidos = purge_expired(opts["ttl"])
+        self.stdout.write(self.style.SUCCESS(f"Arquivos removidos: {removidos}."))
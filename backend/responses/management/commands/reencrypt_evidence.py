@@ -0,0 +1,127 @@
+# responses/management/commands/reencrypt_evidence.py
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from responses import crypto
+from responses.models import Answer
+
+DEFAULT_CHECKPOINT = Path(settings.BASE_DIR) / ".reencrypt_evidence.checkpoint.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-criptografa Answer.encrypted_evidence com a chave primária de FERNET_KEYS, em lotes. "
+        "Retomável: grava o último id processado num checkpoint e continua dali."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Linhas por lote (bulk_update).")
+        parser.add_argument("--sleep", type=float, default=0.2, help="Pausa em segundos entre lotes (throttling).")
+        parser.add_argument("--max-batches", type=int, default=0, help="Para após N lotes (0 = até o fim).")
+        parser.add_argument("--checkpoint", type=str, default=str(DEFAULT_CHECKPOINT), help="Arquivo de checkpoint.")
+        parser.add_argument("--reset", action="store_true", help="Ignora o checkpoint e recomeça do início.")
+        parser.add_argument("--dry-run", action="store_true", help="Só conta o que seria re-criptografado.")
+
+    def handle(self, *args, **opts):
+        primary = crypto.primary_key_id()
+        if primary is None:
+            raise CommandError("FERNET_KEYS vazio: nada a fazer.")
+
+        checkpoint = Path(opts["checkpoint"])
+        last_id = 0 if opts["reset"] else self._load_checkpoint(checkpoint, primary)
+        batch_size = max(1, opts["batch_size"])
+
+        base = Answer.objects.filter(encrypted_evidence__isnull=False)
+        pending = base.filter(id__gt=last_id).count()
+        self.stdout.write(f"Retomando após id={last_id}: {pending} respostas criptografadas a verificar.")
+
+        rows = (
+            base.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "encrypted_evidence")
+            .iterator(chunk_size=batch_size)  # cursor server-side no Postgres
+        )
+
+        seen = rotated = failed = batches = 0
+        started = time.monotonic()
+        batch = []
+        for answer in rows:
+            seen += 1
+            kid, _ = crypto.split_blob(answer.encrypted_evidence)
+            if kid != primary:
+                text = crypto.try_decrypt(answer.encrypted_evidence)
+                if text is None:
+                    failed += 1
+                else:
+                    original = bytes(answer.encrypted_evidence)
+                    answer.encrypted_evidence = crypto.encrypt(text)
+                    batch.append((answer, original))
+            last_id = answer.id
+
+            if seen % batch_size == 0:
+                rotated += self._flush(batch, opts["dry_run"])
+                batch = []
+                batches += 1
+                self._save_checkpoint(checkpoint, primary, last_id, opts["dry_run"])
+                self._progress(seen, pending, rotated, failed, started)
+                if opts["max_batches"] and batches >= opts["max_batches"]:
+                    self.stdout.write(self.style.WARNING(f"Parado após {batches} lotes (checkpoint id={last_id})."))
+                    return
+                if opts["sleep"]:
+                    time.sleep(opts["sleep"])
+
+        rotated += self._flush(batch, opts["dry_run"])
+        self._save_checkpoint(checkpoint, primary, last_id, opts["dry_run"])
+        self._progress(seen, pending, rotated, failed, started)
+        self.stdout.write(self.style.SUCCESS(
+            f"Concluído: {rotated} re-criptografadas, {failed} ilegíveis (nenhuma chave serviu)."
+        ))
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _flush(batch, dry_run) -> int:
+        """Grava o lote; pula linhas editadas por usuários desde a leitura (roda em horário comercial)."""
+        if not batch:
+            return 0
+        if dry_run:
+            return len(batch)
+        with transaction.atomic():
+            current = dict(
+                Answer.objects.select_for_update()
+                .filter(id__in=[a.id for a, _ in batch])
+                .values_list("id", "encrypted_evidence")
+            )
+            unchanged = [a for a, original in batch if current.get(a.id) is not None and bytes(current[a.id]) == original]
+            Answer.objects.bulk_update(unchanged, ["encrypted_evidence"])
+        return len(unchanged)
+
+    @staticmethod
+    def _load_checkpoint(path: Path, primary: bytes) -> int:
+        try:
+            data = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+        # chave primária mudou desde o checkpoint => precisa varrer tudo de novo
+        if data.get("primary_key_id") != primary.decode():
+            return 0
+        return int(data.get("last_id") or 0)
+
+    @staticmethod
+    def _save_checkpoint(path: Path, primary: bytes, last_id: int, dry_run: bool):
+        if dry_run:
+            return
+        path.write_text(json.dumps({"primary_key_id": primary.decode(), "last_id": last_id}))
+
+    def _progress(self, seen, pending, rotated, failed, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        pct = 100 * seen / pending if pending else 100.0
+        self.stdout.write(
+            f"{seen}/{pending} ({pct:.1f}%) verificadas | {rotated} re-criptografadas | "
+            f"{failed} ilegíveis | {seen / elapsed:.0f} linhas/s"
+        )
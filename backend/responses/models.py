@@ -1,4 +1,6 @@
 # responses/models.py
+import uuid
+
 from django.db import models
 from django.db.models import UniqueConstraint
 from django.conf import settings
@@ -6,6 +8,8 @@ from django.utils import timezone
 
 from users.models import CustomUser
 from frameworks.models import Framework, FormTemplate, Question
+from monitoring import metrics
+from .storage import attachment_storage
 
 try:
     # Postgres only
@@ -73,6 +77,7 @@ class Submission(models.Model):
     def recalc_progress(self, commit: bool = True):
         total = self.total_questions or 1
         self.progress = round(100 * (self.answered_count / total), 2)
+        metrics.inc("fs3m_progress_recalc_total")
         if commit:
             self.save(update_fields=["progress", "updated_at"])
 
@@ -194,7 +199,7 @@ class Answer(models.Model):
     else:
         multichoice = models.JSONField(default=list, blank=True)  # fallback
 
-    attachment = models.FileField(upload_to="answers/", null=True, blank=True)
+    attachment = models.FileField(upload_to="answers/", storage=attachment_storage, max_length=255, null=True, blank=True)
 
     answered_at = models.DateTimeField(auto_now=True)
 
@@ -208,41 +213,36 @@ class Answer(models.Model):
     # ===== helpers de criptografia simples (opcionais) =====
     def set_encrypted_evidence(self, text: str):
         """
-        Criptografa e grava em encrypted_evidence (usa a primeira chave em settings.FERNET_KEYS).
+        Criptografa e grava em encrypted_evidence (chave primária de settings.FERNET_KEYS,
+        com prefixo de key id — ver responses/crypto.py).
         Mantém `evidence` limpo/None quando usar criptografia.
         """
-        from cryptography.fernet import Fernet
+        from . import crypto
 
-        keys = getattr(settings, "FERNET_KEYS", [])
-        if not keys:
+        token = crypto.encrypt(text)
+        if token is None:
             # sem chave => armazena como texto simples
             self.evidence = text
             self.encrypted_evidence = None
             return
 
-        f = Fernet(keys[0].encode())
-        token = f.encrypt((text or "").encode())
         self.encrypted_evidence = token
         self.evidence = None
+        self._decrypted_evidence = text or ""
 
     def get_decrypted_evidence(self) -> str:
-        from cryptography.fernet import Fernet, InvalidToken
-
-        if not self.encrypted_evidence:
-            return self.evidence or ""
+        from . import crypto
 
-        keys = getattr(settings, "FERNET_KEYS", [])
-        for k in keys:
-            try:
-                f = Fernet(k.encode())
-                return f.decrypt(self.encrypted_evidence).decode()
-            except (InvalidToken, ValueError):
-                continue
-        return ""  # se nenhuma chave funcionar
+        if "_decrypted_evidence" not in self.__dict__:
+            if not self.encrypted_evidence:
+                return self.evidence or ""
+            self._decrypted_evidence = crypto.decrypt(self.encrypted_evidence)
+        return self._decrypted_evidence
 
     # recálculo de progresso do submission ao salvar/excluir
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        metrics.inc("fs3m_answers_written_total")
         # Sempre recalcula (criação e atualização) para refletir progresso corretamente.
         self.submission.recalc_progress(commit=True)
 
@@ -250,3 +250,37 @@ class Answer(models.Model):
         submission = self.submission
         super().delete(*args, **kwargs)
         submission.recalc_progress(commit=True)
+
+
+class StoredBlob(models.Model):
+    """Blob único do storage endereçado por conteúdo (ver responses/storage.py)."""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # última vez que um upload passou a referenciar o blob (carência do gc_blobs)
+    referenced_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.size} bytes, refs={self.ref_count})"
+
+
+class ChunkedUpload(models.Model):
+    """
+    Sessão de upload em pedaços (retomável). O arquivo parcial fica em
+    settings.CHUNKED_UPLOAD_DIR/<id>.part até ser anexado a uma Answer/Recomendação.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="chunked_uploads")
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"ChunkedUpload({self.id}, {self.offset}/{self.total_size})"
+
+    @property
+    def is_complete(self) -> bool:
+        return self.offset >= self.total_size
@@ -0,0 +1,123 @@
+# responses/portfolio.py
+"""
+Visão de carteira para gestores/analistas: por cliente, a submissão mais recente
+(status/progresso), o resumo do assessment, as recomendações em aberto e o andamento
+dos planos de ação — tudo numa única query (subqueries correlacionadas anotadas na
+lista de clientes), em vez de um ClientDashboardView + 3 chamadas por cliente.
+
+O resultado fica em cache por PORTFOLIO_CACHE_TTL segundos (por filtro); é um painel
+de acompanhamento, alguns segundos de atraso são aceitáveis.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, JSONField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from actionplans.models import PlanoDeAcao
+from assessments.models import Assessment
+from monitoring import metrics
+from recommendations.models import Recomendacao
+from users.models import CustomUser
+
+from .models import Submission
+
+
+def _agregado(qs, campo, funcao):
+    """Subquery escalar com o agregado de `qs` (já correlacionado por OuterRef)."""
+    sub = qs.order_by().values(campo).annotate(v=funcao).values("v")[:1]
+    return Coalesce(Subquery(sub, output_field=IntegerField()), 0)
+
+
+def portfolio_queryset(assigned_to=None, busca=None):
+    ultima = Submission.objects.filter(customer_id=OuterRef("pk")).order_by("-updated_at", "-created_at")
+    planos = PlanoDeAcao.objects.filter(cliente_id=OuterRef("pk"))
+
+    qs = CustomUser.objects.filter(role="cliente", is_active=True)
+    if assigned_to:
+        qs = qs.filter(id__in=Submission.objects.filter(assigned_to_id=assigned_to).values("customer_id"))
+    if busca:
+        qs = qs.filter(Q(nome__icontains=busca) | Q(email__icontains=busca) | Q(empresas__icontains=busca))
+
+    return (
+        qs.annotate(
+            sub_id=Subquery(ultima.values("id")[:1]),
+            sub_status=Subquery(ultima.values("status")[:1]),
+            sub_progress=Subquery(ultima.values("progress")[:1]),
+            sub_updated_at=Subquery(ultima.values("updated_at")[:1]),
+            sub_framework=Subquery(ultima.values("framework__slug")[:1]),
+            total_submissoes=_agregado(
+                Submission.objects.filter(customer_id=OuterRef("pk")), "customer_id", Count("id")
+            ),
+            recs_abertas=_agregado(
+                Recomendacao.objects.filter(cliente_id=OuterRef("pk"), cumprida=False), "cliente_id", Count("id")
+            ),
+            planos=_agregado(planos, "cliente_id", Count("id")),
+            plano_itens=_agregado(planos, "cliente_id", Sum("qtd_recomendacoes")),
+            plano_finalizados=_agregado(planos, "cliente_id", Sum("qtd_finalizado")),
+        )
+        .annotate(
+            assessment_summary=Subquery(
+                Assessment.objects.filter(submission_id=OuterRef("sub_id")).values("summary")[:1],
+                output_field=JSONField(),
+            ),
+            assessment_updated_at=Subquery(
+                Assessment.objects.filter(submission_id=OuterRef("sub_id")).values("updated_at")[:1]
+            ),
+        )
+        .only("id", "nome", "email", "empresas")
+        .order_by("nome", "id")
+    )
+
+
+def _linha(c):
+    return {
+        "client_id": c.id,
+        "nome": c.nome,
+        "email": c.email,
+        "empresas": c.empresas,
+        "total_submissoes": c.total_submissoes,
+        "submission": None if c.sub_id is None else {
+            "id": c.sub_id,
+            "status": c.sub_status,
+            "progress": float(c.sub_progress or 0),
+            "framework": c.sub_framework,
+            "updated_at": c.sub_updated_at,
+        },
+        "assessment": None if c.assessment_summary is None else {
+            "summary": c.assessment_summary,
+            "updated_at": c.assessment_updated_at,
+        },
+        "recomendacoes_abertas": c.recs_abertas,
+        "planos": {
+            "total": c.planos,
+            "itens": c.plano_itens,
+            "finalizados": c.plano_finalizados,
+            "conclusao": round(100 * c.plano_finalizados / c.plano_itens, 1) if c.plano_itens else 0.0,
+        },
+    }
+
+
+def build_portfolio(assigned_to=None, busca=None) -> dict:
+    clientes = [_linha(c) for c in portfolio_queryset(assigned_to, busca)]
+    return {
+        "total_clientes": len(clientes),
+        "clientes": clientes,
+        "generated_at": now().isoformat(),
+    }
+
+
+def get_portfolio(assigned_to=None, busca=None) -> dict:
+    raw = json.dumps({"a": assigned_to, "q": busca or ""}, sort_keys=True)
+    key = "portfolio:" + hashlib.sha1(raw.encode()).hexdigest()[:16]
+    data = cache.get(key)
+    if data is not None:
+        metrics.cache_hit("portfolio")
+        return data
+    metrics.cache_miss("portfolio")
+    data = build_portfolio(assigned_to, busca)
+    cache.set(key, data, getattr(settings, "PORTFOLIO_CACHE_TTL", 60))
+    return data
@@ -1,9 +1,35 @@
 # responses/serializers.py
+import os
+
+from django.urls import reverse
 from rest_framework import serializers
+from .files import signed_query
 from .models import Submission, Answer
 from frameworks.models import Question, FormTemplate
 
 
+class DownloadFileField(serializers.FileField):
+    """
+    FileField cuja URL é o endpoint de download (checa permissão e responde com
+    X-Accel-Redirect) — /media/ é `internal` no nginx. O último segmento do caminho é o
+    nome original do arquivo (o front usa como nome de exibição e para detectar imagens);
+    a query string é a assinatura de curta duração (responses.files.signed_query).
+    """
+    def __init__(self, url_name, **kwargs):
+        self.url_name = url_name
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("allow_null", True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = reverse(self.url_name, kwargs={"pk": value.instance.pk, "filename": os.path.basename(value.name)})
+        url = f"{url}?{signed_query(value)}"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None else url
+
+
 class SubmissionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Submission
@@ -47,6 +73,7 @@ class AnswerWriteSerializer(serializers.ModelSerializer):
     # Para permitir enviar evidence criptografada em um campo separado
     evidence_plain = serializers.CharField(required=False, allow_blank=True, write_only=True)
     encrypt_evidence = serializers.BooleanField(required=False, default=False, write_only=True)
+    attachment = DownloadFileField("answer-attachment")
 
     class Meta:
         model = Answer
@@ -95,7 +122,12 @@ class AnswerWriteSerializer(serializers.ModelSerializer):
 
 
 class AnswerReadSerializer(serializers.ModelSerializer):
+    """
+    Aceita `fields=[...]` para devolver só parte dos campos (ex.: grade de progresso
+    com ?fields=question,score). Ver ANSWER_FIELD_COLUMNS para o .only() correspondente.
+    """
     evidence_decrypted = serializers.SerializerMethodField()
+    attachment = DownloadFileField("answer-attachment")
 
     class Meta:
         model = Answer
@@ -105,10 +137,31 @@ class AnswerReadSerializer(serializers.ModelSerializer):
             "answered_at",
         ]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def get_evidence_decrypted(self, obj: Answer):
         return obj.get_decrypted_evidence()
 
 
+# campo do AnswerReadSerializer -> colunas necessárias (para queryset.only())
+ANSWER_FIELD_COLUMNS = {
+    "id": ["id"],
+    "submission": ["submission"],
+    "question": ["question"],
+    "value": ["value"],
+    "score": ["score"],
+    "multichoice": ["multichoice"],
+    "attachment": ["attachment"],
+    "evidence": ["evidence"],
+    "evidence_decrypted": ["evidence", "encrypted_evidence"],
+    "answered_at": ["answered_at"],
+}
+
+
 
 class SubmissionBriefSerializer(serializers.ModelSerializer):
     template = serializers.SerializerMethodField()
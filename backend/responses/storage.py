@@ -0,0 +1,129 @@
+# responses/storage.py
+"""
+Storage endereçado por conteúdo para anexos (Answer.attachment, Recomendacao.comprovante).
+
+- O nome gravado no FileField é "cas/<sha256>/<nome original>" (mantém o nome para download).
+- O arquivo físico fica uma única vez em "cas/blobs/<sha[:2]>/<sha>", não importa quantas
+  respostas o referenciem.
+- O hash é calculado enquanto o upload é copiado em blocos para um temporário.
+- StoredBlob guarda tamanho e contagem de referências; `manage.py gc_blobs` recalcula as
+  contagens a partir do banco e apaga blobs órfãos.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.text import get_valid_filename
+
+CAS_PREFIX = "cas/"
+BLOBS_DIR = "cas/blobs"
+TMP_DIR = "cas/tmp"
+
+
+def parse_cas_name(name: str):
+    """'cas/<sha>/<arquivo>' -> sha (ou None para nomes legados, ex.: 'answers/x.pdf')."""
+    if not name or not name.startswith(CAS_PREFIX):
+        return None
+    parts = name[len(CAS_PREFIX):].split("/", 1)
+    if len(parts) == 2 and len(parts[0]) == 64:
+        return parts[0]
+    return None
+
+
+def _short_filename(name: str, limit: int = 150) -> str:
+    """Nome original saneado e limitado (o FileField guarda 'cas/<sha>/' + nome em 255 chars)."""
+    original = get_valid_filename(os.path.basename(name)) or "arquivo"
+    if len(original) <= limit:
+        return original
+    stem, ext = os.path.splitext(original)
+    return stem[: limit - len(ext)] + ext
+
+
+def blob_name(sha: str) -> str:
+    return f"{BLOBS_DIR}/{sha[:2]}/{sha}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def internal_name(self, name: str) -> str:
+        """Caminho relativo do arquivo físico (usado no X-Accel-Redirect)."""
+        sha = parse_cas_name(name)
+        return blob_name(sha) if sha else name
+
+    def path(self, name):
+        return super().path(self.internal_name(name))
+
+    def exists(self, name):
+        return super().exists(self.internal_name(name))
+
+    def size(self, name):
+        return super().size(self.internal_name(name))
+
+    def url(self, name):
+        # mantém o nome lógico ("cas/<sha>/<nome original>"): o último segmento é o nome do
+        # arquivo; o nginx resolve esse caminho para o blob (ver nginx.conf, /media/cas/)
+        return super().url(name)
+
+    def get_available_name(self, name, max_length=None):
+        # o nome final vem do hash; arquivos iguais devem cair no mesmo blob
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        tmp_rel = f"{TMP_DIR}/{uuid.uuid4().hex}"
+        tmp_path = super().path(tmp_rel)
+        os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, "seek"):
+            content.seek(0)
+        with open(tmp_path, "wb") as fh:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                fh.write(chunk)
+                size += len(chunk)
+        sha = digest.hexdigest()
+
+        # a referência é contada com a linha do blob travada, e só então o arquivo vai para o
+        # lugar: o gc_blobs apaga arquivo + linha sob o mesmo lock, então um blob antigo que
+        # acabou de ganhar referência nunca é removido (e, se acabou de ser, é recriado aqui)
+        with transaction.atomic():
+            blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                sha256=sha, defaults={"size": size, "ref_count": 1},
+            )
+            if not created:
+                StoredBlob.objects.filter(sha256=sha).update(
+                    ref_count=F("ref_count") + 1, referenced_at=timezone.now(),
+                )
+
+            final_path = super().path(blob_name(sha))
+            if os.path.exists(final_path):
+                os.remove(tmp_path)  # conteúdo já armazenado
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(final_path, self.file_permissions_mode)
+
+        return f"{CAS_PREFIX}{sha}/{_short_filename(name)}"
+
+    def delete(self, name):
+        """Só decrementa a referência; o arquivo físico é removido pelo gc_blobs."""
+        from .models import StoredBlob
+
+        sha = parse_cas_name(name)
+        if not sha:
+            return super().delete(name)
+        StoredBlob.objects.filter(sha256=sha, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+
+def attachment_storage():
+    return ContentAddressedStorage()
@@ -1,3 +1,373 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from cryptography.fernet import Fernet
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from frameworks.models import Control, Domain, FormTemplate, Framework, Question
+from monitoring.testing import QueryBudgetMixin
+from users.models import CustomUser
+
+from . import crypto, exports
+from .files import append_chunk, upload_temp_path
+from .models import Answer, ChunkedUpload, StoredBlob, Submission
+from .storage import blob_name, parse_cas_name
+
+KEY_A = Fernet.generate_key().decode()
+KEY_B = Fernet.generate_key().decode()
+
+
+def criar_submission(email="cliente@teste.local", perguntas=1):
+    """Cliente + framework mínimo (um controle por pergunta) + submissão. Retorna (sub, perguntas)."""
+    cliente = CustomUser.objects.create_user(email=email, password=None, nome="Cliente", role="cliente")
+    fw = Framework.objects.create(slug=f"fw-{cliente.id}", name="Framework Teste")
+    tpl = FormTemplate.objects.create(name="Template Teste", slug=f"fw-{cliente.id}-tpl", framework=fw)
+    domain = Domain.objects.create(framework=fw, code="PR", title="Proteger")
+    questions = [
+        Question.objects.create(
+            control=Control.objects.create(framework=fw, domain=domain, code=f"PR.AA-0{k + 1}", title=f"Controle {k}"),
+            local_code="score", prompt=f"Pergunta {k}", type="scale",
+        )
+        for k in range(perguntas)
+    ]
+    return Submission.objects.create(customer=cliente, template=tpl, framework=fw), questions
+
+
+class ClientDashboardQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """O card do dashboard não pode crescer com o nº de submissões do cliente."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = CustomUser.objects.create_user(
+            email="cliente@teste.local", password=None, nome="Cliente", role="cliente",
+        )
+        for i in range(3):
+            fw = Framework.objects.create(slug=f"fw-teste-{i}", name=f"Framework Teste {i}")
+            tpl = FormTemplate.objects.create(name=f"Template Teste {i}", slug=f"fw-teste-{i}-tpl", framework=fw)
+            Submission.objects.create(customer=cls.cliente, template=tpl, framework=fw)
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.cliente)
+
+    def test_dashboard_do_cliente(self):
+        resp = self.client.get(reverse("client-dashboard", args=[self.cliente.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsNotNone(resp.data["submission"])
+        self.assertWithinQueryBudget(resp)
+
+
+class MediaRootMixin:
+    """MEDIA_ROOT (e uploads/pacotes) num diretório temporário, apagado ao fim de cada teste."""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        override = self.settings(
+            MEDIA_ROOT=tmp.name, CHUNKED_UPLOAD_DIR=self.tmp / "uploads_tmp", EVIDENCE_BUNDLE_DIR=self.tmp / "exports",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class KeyringTests(SimpleTestCase):
+    @override_settings(FERNET_KEYS=[KEY_A])
+    def test_ida_e_volta_com_prefixo_da_chave(self):
+        blob = crypto.encrypt("evidência sigilosa")
+        kid, _ = crypto.split_blob(blob)
+        self.assertEqual(kid, crypto.key_id(KEY_A))
+        self.assertEqual(crypto.decrypt(blob), "evidência sigilosa")
+
+    def test_rotacao(self):
+        with self.settings(FERNET_KEYS=[KEY_A]):
+            antigo = crypto.encrypt("antes da rotação")
+        with self.settings(FERNET_KEYS=[KEY_B, KEY_A]):
+            # a nova primária cifra; a antiga continua lendo o que já estava gravado
+            self.assertEqual(crypto.primary_key_id(), crypto.key_id(KEY_B))
+            self.assertEqual(crypto.split_blob(crypto.encrypt("x"))[0], crypto.key_id(KEY_B))
+            self.assertEqual(crypto.decrypt(antigo), "antes da rotação")
+        with self.settings(FERNET_KEYS=[KEY_B]):
+            self.assertIsNone(crypto.try_decrypt(antigo))
+            self.assertEqual(crypto.decrypt(antigo), "")
+
+    @override_settings(FERNET_KEYS=[KEY_B, KEY_A])
+    def test_token_legado_sem_prefixo(self):
+        legado = Fernet(KEY_A.encode()).encrypt(b"legado")
+        self.assertEqual(crypto.split_blob(legado), (None, legado))
+        self.assertEqual(crypto.decrypt(legado), "legado")
+
+    @override_settings(FERNET_KEYS=[])
+    def test_sem_chaves(self):
+        self.assertIsNone(crypto.encrypt("texto"))
+        self.assertIsNone(crypto.primary_key_id())
+        answer = Answer()
+        answer.set_encrypted_evidence("texto")
+        self.assertEqual((answer.evidence, answer.encrypted_evidence), ("texto", None))
+
+    @override_settings(FERNET_KEYS=[KEY_A])
+    def test_decrypt_answers_preenche_o_cache_da_instancia(self):
+        cifrada = Answer(encrypted_evidence=crypto.encrypt("cifrada"))
+        simples = Answer(evidence="simples")
+        crypto.decrypt_answers([cifrada, simples])
+        self.assertEqual(cifrada.__dict__["_decrypted_evidence"], "cifrada")
+        self.assertEqual(simples.get_decrypted_evidence(), "simples")
+
+
+class ReencryptEvidenceTests(TestCase):
+    def test_recifra_com_a_nova_primaria_e_retoma_do_checkpoint(self):
+        sub, questions = criar_submission(perguntas=3)
+        with self.settings(FERNET_KEYS=[KEY_A]):
+            for k, q in enumerate(questions):
+                answer = Answer(submission=sub, question=q)
+                answer.set_encrypted_evidence(f"evidência {k}")
+                answer.save()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        checkpoint = Path(tmp.name) / "checkpoint.json"
+        with self.settings(FERNET_KEYS=[KEY_B, KEY_A]):
+            args = ["--batch-size", "2", "--sleep", "0", "--checkpoint", str(checkpoint)]
+            call_command("reencrypt_evidence", *args, "--max-batches", "1", stdout=StringIO())
+            call_command("reencrypt_evidence", *args, stdout=StringIO())
+
+        with self.settings(FERNET_KEYS=[KEY_B]):
+            for k, answer in enumerate(Answer.objects.order_by("id")):
+                self.assertEqual(crypto.split_blob(answer.encrypted_evidence)[0], crypto.key_id(KEY_B))
+                self.assertEqual(answer.get_decrypted_evidence(), f"evidência {k}")
+
+
+class ContentAddressedStorageTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.sub, self.questions = criar_submission(perguntas=3)
+
+    def _anexar(self, question, nome, conteudo):
+        answer = Answer.objects.create(submission=self.sub, question=question)
+        answer.attachment.save(nome, ContentFile(conteudo), save=True)
+        return answer
+
+    def _gc(self, *args):
+        call_command("gc_blobs", *args, stdout=StringIO())
+
+    def test_conteudo_igual_vira_um_blob(self):
+        a1 = self._anexar(self.questions[0], "relatorio.pdf", b"%PDF igual")
+        a2 = self._anexar(self.questions[1], "copia.pdf", b"%PDF igual")
+        a3 = self._anexar(self.questions[2], "outro.pdf", b"%PDF diferente")
+
+        sha = parse_cas_name(a1.attachment.name)
+        self.assertEqual(parse_cas_name(a2.attachment.name), sha)
+        self.assertNotEqual(parse_cas_name(a3.attachment.name), sha)
+        self.assertTrue(a1.attachment.name.endswith("/relatorio.pdf"))
+        self.assertTrue(a2.attachment.name.endswith("/copia.pdf"))
+        self.assertEqual(StoredBlob.objects.get(sha256=sha).ref_count, 2)
+        self.assertEqual(StoredBlob.objects.count(), 2)
+        with a2.attachment.open("rb") as fh:
+            self.assertEqual(fh.read(), b"%PDF igual")
+
+    def test_delete_so_decrementa_e_gc_remove_o_orfao(self):
+        answer = self._anexar(self.questions[0], "relatorio.pdf", b"conteudo")
+        sha = parse_cas_name(answer.attachment.name)
+        path = answer.attachment.storage.path(blob_name(sha))
+
+        answer.attachment.delete(save=True)
+        self.assertEqual(StoredBlob.objects.get(sha256=sha).ref_count, 0)
+        self.assertTrue(Path(path).exists())
+
+        # dentro da carência nada é apagado (upload recém-feito pode ainda não estar no banco)
+        self._gc()
+        self.assertTrue(StoredBlob.objects.filter(sha256=sha).exists())
+
+        self._gc("--grace-hours", "0")
+        self.assertFalse(StoredBlob.objects.filter(sha256=sha).exists())
+        self.assertFalse(Path(path).exists())
+
+    def test_gc_corrige_contadores_e_poupa_blob_referenciado_na_carencia(self):
+        usado = self._anexar(self.questions[0], "usado.pdf", b"usado")
+        self._anexar(self.questions[1], "recente.pdf", b"recente")
+        sha_usado = parse_cas_name(usado.attachment.name)
+        antigo = timezone.now() - timedelta(days=2)
+        StoredBlob.objects.filter(sha256=sha_usado).update(ref_count=5, referenced_at=antigo)
+        # contador zerado por engano, mas referenciado agora há pouco: não pode sumir
+        StoredBlob.objects.exclude(sha256=sha_usado).update(ref_count=0)
+
+        self._gc("--grace-hours", "1")
+        self.assertEqual(StoredBlob.objects.get(sha256=sha_usado).ref_count, 1)
+        self.assertEqual(StoredBlob.objects.count(), 2)
+
+
+class AttachmentDownloadTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        sub, [question] = criar_submission()
+        self.dono = sub.customer
+        self.outro = CustomUser.objects.create_user(
+            email="outro@teste.local", password=None, nome="Outro", role="cliente",
+        )
+        self.answer = Answer.objects.create(submission=sub, question=question)
+        self.answer.attachment.save("evidencia.png", ContentFile(b"PNG"), save=True)
+
+    def _url_assinada(self):
+        self.client.force_authenticate(user=self.dono)
+        resp = self.client.get(reverse("answer-detail", args=[self.answer.id]))
+        self.client.force_authenticate(user=None)
+        return resp.data["attachment"]
+
+    def test_url_assinada_baixa_sem_jwt(self):
+        url = self._url_assinada()
+        self.assertIn("/attachment/evidencia.png?exp=", url)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(b"".join(resp.streaming_content), b"PNG")
+
+    def test_assinatura_adulterada_ou_expirada_exige_jwt(self):
+        url = self._url_assinada()
+        self.assertEqual(self.client.get(url[:-4] + "0000").status_code, 401)
+        with self.settings(DOWNLOAD_URL_TTL=-1):
+            expirada = self._url_assinada()
+        self.assertEqual(self.client.get(expirada).status_code, 401)
+
+    def test_sem_assinatura_confere_permissao(self):
+        url = reverse("answer-attachment", args=[self.answer.id, "evidencia.png"])
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(user=self.outro)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(user=self.dono)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_trocar_o_anexo_invalida_a_url_antiga(self):
+        url = self._url_assinada()
+        self.answer.attachment.save("outra.png", ContentFile(b"OUTRO"), save=True)
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    @override_settings(ATTACHMENTS_X_ACCEL=True)
+    def test_x_accel_aponta_para_o_blob(self):
+        resp = self.client.get(self._url_assinada())
+        sha = parse_cas_name(self.answer.attachment.name)
+        self.assertEqual(resp["X-Accel-Redirect"], "/media/" + blob_name(sha))
+
+
+class ChunkedUploadTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        sub, [question] = criar_submission()
+        self.cliente = sub.customer
+        self.answer = Answer.objects.create(submission=sub, question=question)
+        self.client.force_authenticate(user=self.cliente)
+
+    def _put(self, upload_id, data, start, total):
+        return self.client.generic(
+            "PUT", reverse("chunked-upload", args=[upload_id]), data,
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{start + len(data) - 1}/{total}",
+        )
+
+    def test_upload_em_pedacos_ate_o_anexo(self):
+        resp = self.client.post(reverse("chunked-upload-create"), {"filename": "grande.bin", "size": 8}, format="json")
+        self.assertEqual((resp.status_code, resp.data["offset"]), (201, 0))
+        upload_id = resp.data["id"]
+        self.assertEqual(self._put(upload_id, b"abcd", 0, 8).data["offset"], 4)
+        # pedaço fora de ordem: 409 com o offset para retomar
+        resp = self._put(upload_id, b"gh", 6, 8)
+        self.assertEqual((resp.status_code, resp.data["offset"]), (409, 4))
+        self.assertEqual(self._put(upload_id, b"efgh", 4, 8).data["offset"], 8)
+
+        resp = self.client.post(
+            reverse("chunked-upload-complete", args=[upload_id]), {"answer": self.answer.id}, format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.answer.refresh_from_db()
+        with self.answer.attachment.open("rb") as fh:
+            self.assertEqual(fh.read(), b"abcdefgh")
+
+    def test_reenvio_sobrescreve_bytes_sem_offset_salvo(self):
+        upload = ChunkedUpload.objects.create(user=self.cliente, filename="a.bin", total_size=8)
+        append_chunk(upload, BytesIO(b"lixo!!"), 6)  # tentativa que caiu antes de salvar o offset
+        self.assertEqual(append_chunk(upload, BytesIO(b"abcd"), 4), 4)
+        self.assertEqual(upload_temp_path(upload).read_bytes(), b"abcd")
+
+
+class EvidenceBundleTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.sub, [q1, q2] = criar_submission(perguntas=2)
+        self.client.force_authenticate(user=self.sub.customer)
+        with self.settings(FERNET_KEYS=[KEY_A]):
+            a1 = Answer(submission=self.sub, question=q1, score=3)
+            a1.set_encrypted_evidence("evidência sigilosa")
+            a1.save()
+        a2 = Answer.objects.create(submission=self.sub, question=q2, evidence="texto")
+        a2.attachment.save("politica.pdf", ContentFile(b"%PDF"), save=True)
+        self.a2 = a2
+
+    def _get(self):
+        return self.client.get(reverse("submission-evidence-bundle", args=[self.sub.id]))
+
+    def _envelhecer(self, path, segundos):
+        path.touch()
+        antigo = time.time() - segundos
+        os.utime(path, (antigo, antigo))
+
+    @override_settings(FERNET_KEYS=[KEY_A])
+    def test_202_enquanto_monta_e_depois_o_zip(self):
+        # a montagem roda numa thread com conexão própria, que não vê a transação do teste
+        with mock.patch.object(exports.threading, "Thread") as thread:
+            resp = self._get()
+            self.assertEqual(resp.status_code, 202)
+            self.assertTrue(resp.has_header("Retry-After"))
+            self.assertEqual(self._get().status_code, 202)  # lock presente: não dispara outra
+            thread.assert_called_once()
+        _submission, target, lock = thread.call_args.kwargs["args"]
+        exports.write_bundle(self.sub, target, lock)
+        lock.unlink()
+
+        resp = self._get()
+        self.assertEqual(resp.status_code, 200)
+        with zipfile.ZipFile(BytesIO(b"".join(resp.streaming_content))) as zf:
+            anexo = f"anexos/PR.AA-02/{self.a2.id}_politica.pdf"
+            self.assertEqual(sorted(zf.namelist()), sorted(["manifest.csv", anexo]))
+            self.assertEqual(zf.read(anexo), b"%PDF")
+            manifesto = zf.read("manifest.csv").decode()
+        self.assertIn("evidência sigilosa", manifesto)
+        self.assertIn(anexo, manifesto)
+
+    def test_nova_versao_apaga_a_anterior(self):
+        antigo = exports.bundle_path(self.sub, "antigo")
+        antigo.write_bytes(b"zip velho")
+        atual = exports.bundle_path(self.sub, exports.bundle_stamp(self.sub))
+        exports.write_bundle(self.sub, atual)
+        self.assertTrue(zipfile.is_zipfile(atual))
+        self.assertFalse(antigo.exists())
+        self.assertEqual(list(atual.parent.glob("*.tmp")), [])
+
+    @override_settings(EVIDENCE_BUNDLE_BUILD_TIMEOUT=300)
+    def test_montagem_abandonada_e_refeita(self):
+        target = exports.bundle_path(self.sub, exports.bundle_stamp(self.sub))
+        self._envelhecer(target.with_suffix(".building"), 301)
+        with mock.patch.object(exports.threading, "Thread") as thread:
+            self.assertIsNone(exports.ensure_bundle(self.sub))
+        thread.assert_called_once()
+        self.assertTrue(target.with_suffix(".building").exists())  # lock novo, da nova montagem
+
+    @override_settings(EVIDENCE_BUNDLE_BUILD_TIMEOUT=300)
+    def test_purge_expired(self):
+        d = exports.bundle_dir()
+        self._envelhecer(d / "submission_1_velho.zip", 61)
+        self._envelhecer(d / "submission_2_novo.zip", 10)
+        self._envelhecer(d / "submission_3_x.building", 120)
+        self._envelhecer(d / "submission_4_x.123.tmp", 301)
+        self._envelhecer(d / "outro.txt", 10_000)
+        self.assertEqual(exports.purge_expired(ttl=60), 2)
+        restantes = sorted(p.name for p in d.iterdir())
+        self.assertEqual(restantes, ["outro.txt", "submission_2_novo.zip", "submission_3_x.building"])
@@ -1,13 +1,25 @@
 # responses/urls.py
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import SubmissionViewSet, AnswerViewSet, ClientDashboardView
+from .views import (
+    SubmissionViewSet, AnswerViewSet, ClientDashboardView, PortfolioDashboardView,
+    ChunkedUploadCreateView, ChunkedUploadView, ChunkedUploadCompleteView,
+)
 
 router = DefaultRouter()
 router.register(r"submissions", SubmissionViewSet, basename="submission")
 router.register(r"answers", AnswerViewSet, basename="answer")
 
 urlpatterns = [
+    path("dashboard/portfolio/", PortfolioDashboardView.as_view(), name="portfolio-dashboard"),
     path("dashboard/<int:client_id>/", ClientDashboardView.as_view(), name="client-dashboard"),
+    # download do anexo com o nome do arquivo no fim da URL (é o que os serializers devolvem)
+    path(
+        "answers/<int:pk>/attachment/<str:filename>",
+        AnswerViewSet.as_view({"get": "download_attachment"}), name="answer-attachment",
+    ),
+    path("uploads/", ChunkedUploadCreateView.as_view(), name="chunked-upload-create"),
+    path("uploads/<uuid:upload_id>/", ChunkedUploadView.as_view(), name="chunked-upload"),
+    path("uploads/<uuid:upload_id>/complete/", ChunkedUploadCompleteView.as_view(), name="chunked-upload-complete"),
 ]
 urlpatterns += router.urls
@@ -1,18 +1,62 @@
 # responses/views.py
 from rest_framework import viewsets, status as drf_status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 
-from .models import Submission, Answer
+from users.permissions import can_access_client
+from users.principal import get_principal
+from .models import Submission, Answer, ChunkedUpload
+from .files import (
+    append_chunk, has_valid_signature, parse_content_range, serve_file, serve_path, upload_temp_path,
+)
+from .exports import ensure_bundle
 from .serializers import (
     SubmissionCreateSerializer, SubmissionReadSerializer,
-    AnswerWriteSerializer, AnswerReadSerializer, SubmissionBriefSerializer
+    AnswerWriteSerializer, AnswerReadSerializer, SubmissionBriefSerializer,
+    ANSWER_FIELD_COLUMNS,
 )
+from .portfolio import get_portfolio
 from .utils import get_or_create_client_submission
+from .crypto import decrypt_answers
+
+def answer_fields_from_request(request):
+    """Lê ?fields=question,score. None = todos os campos."""
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    invalid = sorted(set(fields) - set(ANSWER_FIELD_COLUMNS))
+    if invalid:
+        raise ValidationError({"fields": f"Campos inválidos: {', '.join(invalid)}."})
+    return fields
+
+
+def serialize_answers(qs, fields, request=None):
+    """
+    Serializa answers carregando só as colunas pedidas: sem `evidence_decrypted`
+    não lê `encrypted_evidence` nem decifra nada. Com `request`, URLs de anexo saem
+    absolutas (como no retrieve).
+    """
+    context = {"request": request}
+    if fields is None:
+        return AnswerReadSerializer(decrypt_answers(qs), many=True, context=context).data
+
+    columns = {col for f in fields for col in ANSWER_FIELD_COLUMNS[f]}
+    qs = qs.select_related(None).only("id", *columns)
+    if "evidence_decrypted" in fields:
+        qs = decrypt_answers(qs)
+    return AnswerReadSerializer(qs, many=True, fields=fields, context=context).data
+
 
 class SubmissionViewSet(viewsets.ModelViewSet):
     queryset = Submission.objects.select_related("template", "framework", "customer", "assigned_to")
@@ -48,7 +92,29 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     @action(methods=["get"], detail=True, url_path="answers")
     def list_answers(self, request, pk=None):
         qs = Answer.objects.filter(submission_id=pk).select_related("question")
-        return Response(AnswerReadSerializer(qs, many=True).data)
+        return Response(serialize_answers(qs, answer_fields_from_request(request), request))
+
+    @action(methods=["get"], detail=True, url_path="evidence-bundle")
+    def evidence_bundle(self, request, pk=None):
+        """
+        ZIP com todos os anexos + manifest.csv com as evidências decifradas.
+        Montado em segundo plano (responses/exports.py): 202 + Retry-After enquanto
+        monta; pronto, o download sai pelo nginx (X-Accel-Redirect), sem prender worker.
+        """
+        sub = self.get_object()
+        if not can_access_client(request.user, sub.customer_id):
+            return Response({"detail": "Sem permissão."}, status=drf_status.HTTP_403_FORBIDDEN)
+        path = ensure_bundle(sub)
+        if path is None:
+            retry = settings.EVIDENCE_BUNDLE_RETRY_AFTER
+            return Response(
+                {"status": "building", "retry_after": retry},
+                status=drf_status.HTTP_202_ACCEPTED, headers={"Retry-After": str(retry)},
+            )
+        return serve_path(
+            path, f"evidencias_submission_{sub.id}.zip",
+            settings.EVIDENCE_BUNDLE_DIR, settings.EVIDENCE_BUNDLE_X_ACCEL_PREFIX,
+        )
 
     @action(methods=["post"], detail=True, url_path="recalc")
     def recalc(self, request, pk=None):
@@ -68,12 +134,37 @@ class AnswerViewSet(viewsets.ModelViewSet):
             return AnswerReadSerializer
         return AnswerWriteSerializer
 
+    def get_permissions(self):
+        # download aceita URL assinada (<img src>/<a href> não mandam o JWT); a view confere
+        if self.action == "download_attachment":
+            return [AllowAny()]
+        return super().get_permissions()
+
+    def list(self, request, *args, **kwargs):
+        # ?fields=... restringe colunas; evidência só é decifrada se pedida
+        qs = self.filter_queryset(self.get_queryset())
+        return Response(serialize_answers(qs, answer_fields_from_request(request), request))
+
+    @action(methods=["get"], detail=True, url_path="attachment", url_name="attachment")
+    def download_attachment(self, request, pk=None, filename=None):
+        answer = self.get_object()
+        if not answer.attachment:
+            raise Http404("Resposta sem anexo.")
+        if not has_valid_signature(request, answer.attachment):
+            if not request.user.is_authenticated:
+                raise NotAuthenticated()
+            if not can_access_client(request.user, answer.submission.customer_id):
+                return Response({"detail": "Sem permissão."}, status=drf_status.HTTP_403_FORBIDDEN)
+        return serve_file(answer.attachment)
+
     @action(methods=["post"], detail=False, url_path="upsert")
     def upsert(self, request):
         ser = AnswerWriteSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         obj = ser.save()
-        return Response(AnswerReadSerializer(obj).data, status=drf_status.HTTP_201_CREATED)
+        return Response(
+            AnswerReadSerializer(obj, context=self.get_serializer_context()).data, status=drf_status.HTTP_201_CREATED,
+        )
 
 
 class ClientDashboardView(APIView):
@@ -86,6 +177,9 @@ class ClientDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, client_id: int):
+        if not can_access_client(request.user, client_id):
+            return Response({"detail": "Sem permissão."}, status=drf_status.HTTP_403_FORBIDDEN)
+
         ensure = request.query_params.get("ensure") in ("1", "true", "yes")
         template_slug = request.query_params.get("template")  # opcional
 
@@ -103,3 +197,133 @@ class ClientDashboardView(APIView):
             "submission": SubmissionBriefSerializer(sub).data if sub else None,
             "retrieved_at": now().isoformat(),
         })
+
+
+class PortfolioDashboardView(APIView):
+    """
+    GET /api/responses/dashboard/portfolio/?assigned_to=me&q=<nome/email/empresa>
+
+    Carteira inteira numa chamada (gestor/analista): por cliente, submissão mais recente,
+    resumo do assessment, recomendações em aberto e conclusão dos planos.
+    Ver responses/portfolio.py (uma query; cache curto).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        principal = get_principal(request.user)
+        if not principal or not principal.is_staff_like:
+            return Response({"detail": "Sem permissão."}, status=drf_status.HTTP_403_FORBIDDEN)
+
+        assigned_to = request.query_params.get("assigned_to")
+        if assigned_to == "me":
+            assigned_to = request.user.id
+        elif assigned_to:
+            try:
+                assigned_to = int(assigned_to)
+            except ValueError:
+                return Response({"detail": "assigned_to inválido."}, status=drf_status.HTTP_400_BAD_REQUEST)
+
+        return Response(get_portfolio(assigned_to, (request.query_params.get("q") or "").strip()))
+
+
+# ========= Upload em pedaços (retomável) =========
+
+class ChunkedUploadCreateView(APIView):
+    """
+    POST /api/responses/uploads/ {"filename": "...", "size": <bytes>}
+    -> {"id", "offset": 0}. Depois envie PUTs com Content-Range para /uploads/<id>/.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = (request.data.get("filename") or "").strip()
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            size = -1
+        if not filename or size <= 0:
+            return Response({"detail": "Informe 'filename' e 'size' (> 0)."}, status=drf_status.HTTP_400_BAD_REQUEST)
+        if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            return Response({"detail": "Arquivo acima do limite."}, status=drf_status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        upload = ChunkedUpload.objects.create(user=request.user, filename=filename[:255], total_size=size)
+        return Response({"id": str(upload.id), "offset": 0, "size": size}, status=drf_status.HTTP_201_CREATED)
+
+
+class ChunkedUploadView(APIView):
+    """
+    GET /api/responses/uploads/<id>/ -> offset atual (para retomar)
+    PUT /api/responses/uploads/<id>/ (corpo binário + Content-Range: bytes <ini>-<fim>/<total>)
+        O pedaço vai direto do socket para o disco; <ini> precisa ser o offset atual (senão 409).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, id=upload_id, user=request.user)
+        return Response({"id": str(upload.id), "offset": upload.offset, "size": upload.total_size})
+
+    def put(self, request, upload_id):
+        rng = parse_content_range(request.META.get("HTTP_CONTENT_RANGE"))
+        if rng is None:
+            return Response({"detail": "Content-Range inválido."}, status=drf_status.HTTP_400_BAD_REQUEST)
+        start, end, total = rng
+        if request.stream is None:
+            # corpo vazio (Content-Length 0): o Django não abre stream nenhum
+            return Response({"detail": "Pedaço sem conteúdo."}, status=drf_status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            upload = get_object_or_404(
+                ChunkedUpload.objects.select_for_update(), id=upload_id, user=request.user, completed_at__isnull=True
+            )
+            if total != upload.total_size or start != upload.offset:
+                return Response(
+                    {"detail": "Offset divergente.", "offset": upload.offset},
+                    status=drf_status.HTTP_409_CONFLICT,
+                )
+            # request.stream lê do socket sem carregar o corpo inteiro em memória
+            upload.offset = append_chunk(upload, request.stream, end - start + 1)
+            upload.save(update_fields=["offset"])
+
+        return Response({"id": str(upload.id), "offset": upload.offset, "size": upload.total_size})
+
+
+class ChunkedUploadCompleteView(APIView):
+    """
+    POST /api/responses/uploads/<id>/complete/ {"answer": <id>} ou {"recomendacao": <id>}
+    Anexa o arquivo montado ao destino e encerra a sessão.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        from recommendations.models import Recomendacao
+
+        upload = get_object_or_404(ChunkedUpload, id=upload_id, user=request.user, completed_at__isnull=True)
+        if not upload.is_complete:
+            return Response(
+                {"detail": "Upload incompleto.", "offset": upload.offset, "size": upload.total_size},
+                status=drf_status.HTTP_409_CONFLICT,
+            )
+
+        if request.data.get("answer"):
+            target = get_object_or_404(Answer.objects.select_related("submission"), id=request.data["answer"])
+            cliente_id, field = target.submission.customer_id, "attachment"
+        elif request.data.get("recomendacao"):
+            target = get_object_or_404(Recomendacao, id=request.data["recomendacao"])
+            cliente_id, field = target.cliente_id, "comprovante"
+        else:
+            return Response({"detail": "Informe 'answer' ou 'recomendacao'."}, status=drf_status.HTTP_400_BAD_REQUEST)
+
+        if not can_access_client(request.user, cliente_id):
+            return Response({"detail": "Sem permissão."}, status=drf_status.HTTP_403_FORBIDDEN)
+
+        path = upload_temp_path(upload)
+        with open(path, "rb") as fh:
+            # o storage copia em blocos (File.chunks), sem ler tudo em memória
+            getattr(target, field).save(upload.filename, File(fh), save=False)
+        update_fields = [field, "answered_at"] if field == "attachment" else [field, "atualizado_em"]
+        target.save(update_fields=update_fields)
+
+        path.unlink(missing_ok=True)
+        upload.completed_at = now()
+        upload.save(update_fields=["completed_at"])
+        return Response({"id": str(upload.id), field: getattr(target, field).name}, status=drf_status.HTTP_200_OK)
@@ -0,0 +1,114 @@
+# users/audit.py
+"""
+Gravação de UserAuditLog fora do caminho crítico da requisição.
+
+audit.log(...) só empilha o registro num buffer do processo. O flush (bulk_create) acontece:
+- no request_finished, que o servidor dispara depois de enviar a resposta, quando o buffer
+  passou de AUDIT_FLUSH_INTERVAL segundos ou AUDIT_BUFFER_SIZE registros;
+- por uma thread de fundo, a cada AUDIT_FLUSH_INTERVAL, para workers ociosos;
+- no fim do processo (atexit) e em audit.flush(), usado por commands/testes.
+
+Se o processo morrer no meio, perde-se no máximo o que estava no buffer.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+
+from .models_audit import UserAuditLog
+from .utils import request_fingerprint
+
+logger = logging.getLogger(__name__)
+
+Action = UserAuditLog.Action
+
+_lock = threading.Lock()
+_buffer = []
+_oldest = None
+_flusher_pid = None
+
+
+def _interval():
+    return getattr(settings, "AUDIT_FLUSH_INTERVAL", 2.0)
+
+
+def _max_size():
+    return getattr(settings, "AUDIT_BUFFER_SIZE", 200)
+
+
+def log(action, *, actor=None, target_user=None, metadata=None, request=None):
+    """Enfileira um evento de auditoria. Não toca no banco."""
+    global _oldest
+    ip, ua = request_fingerprint(request) if request is not None else (None, "")
+    entry = UserAuditLog(
+        actor_id=getattr(actor, "pk", actor),
+        target_user_id=getattr(target_user, "pk", target_user),
+        action=action,
+        metadata=metadata or {},
+        ip=ip,
+        user_agent=ua,
+    )
+    with _lock:
+        _buffer.append(entry)
+        if _oldest is None:
+            _oldest = time.monotonic()
+    _ensure_flusher()
+
+
+def flush():
+    """Grava tudo o que está no buffer. Retorna quantos registros foram gravados."""
+    global _buffer, _oldest
+    with _lock:
+        pending, _buffer, _oldest = _buffer, [], None
+    if not pending:
+        return 0
+    try:
+        UserAuditLog.objects.bulk_create(pending, batch_size=500)
+    except Exception:
+        logger.exception("audit: falha ao gravar %s registros", len(pending))
+        return 0
+    return len(pending)
+
+
+def _due():
+    with _lock:
+        if not _buffer:
+            return False
+        return len(_buffer) >= _max_size() or time.monotonic() - _oldest >= _interval()
+
+
+def _on_request_finished(**kwargs):
+    if _due():
+        flush()
+
+
+def _flusher_loop():
+    while True:
+        time.sleep(_interval())
+        if _due():
+            close_old_connections()
+            flush()
+            # a thread tem conexão própria: não a deixa aberta entre ciclos
+            connection.close()
+
+
+def _ensure_flusher():
+    """Uma thread por processo (o gunicorn faz fork depois do import)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+    threading.Thread(target=_flusher_loop, name="audit-flusher", daemon=True).start()
+
+
+request_finished.connect(_on_request_finished, dispatch_uid="users.audit.flush")
+atexit.register(flush)
@@ -0,0 +1,144 @@
+# users/authentication.py
+"""
+Autenticação JWT sem consulta ao usuário por request.
+
+O token de login (CustomTokenObtainPairSerializer) carrega as claims abaixo; a
+autenticação monta um CustomUser "parcial" com elas (demais campos adiados — o primeiro
+acesso a qualquer um carrega o restante numa única query, ver CustomUser.refresh_from_db).
+
+Para não confiar cegamente em claims antigas, compara a versão do token com
+(principal_version, is_active) do usuário, mantida no cache compartilhado pelos workers
+por JWT_USER_STATE_TTL segundos. Versão divergente (papel/cliente mudou) cai no caminho
+normal, com o usuário do banco.
+
+CustomUser.save() regrava esse estado (e apaga o dos clientes pais, que mudam por
+.update()), então desativação/troca de papel feita pelo save vale no request seguinte em
+qualquer worker. Mudanças que não passam pelo save (update em massa, SQL direto) podem
+levar até JWT_USER_STATE_TTL segundos para valer — janela aceita.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from monitoring import metrics
+
+# claim -> campo do usuário
+USER_CLAIMS = {
+    "role": "role",
+    "is_staff": "is_staff",
+    "is_superuser": "is_superuser",
+    "cliente_id": "cliente_id",
+    "mfa": "is_2fa_enabled",
+    "pv": "principal_version",
+}
+
+
+def stamp_user_claims(token, user):
+    for claim, attr in USER_CLAIMS.items():
+        token[claim] = getattr(user, attr)
+    return token
+
+
+def _state_key(user_id) -> str:
+    return f"user_state:{user_id}"
+
+
+def remember_user_state(user):
+    """Chamado no save do usuário: atualiza o estado no cache compartilhado."""
+    cache.set(_state_key(user.pk), (user.principal_version, user.is_active), _state_ttl())
+
+
+def forget_user_state(user_ids):
+    """Descarta o estado em cache (usuários alterados por .update(), sem instância em mãos)."""
+    cache.delete_many([_state_key(pk) for pk in user_ids])
+
+
+def _state_ttl() -> int:
+    return getattr(settings, "JWT_USER_STATE_TTL", 30)
+
+
+def get_user_state(user_id):
+    """(principal_version, is_active) do usuário ou None se não existir."""
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is not None:
+        metrics.cache_hit("user_state")
+        return state
+    metrics.cache_miss("user_state")
+    row = (
+        get_user_model().objects
+        .filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values_list("principal_version", "is_active")
+        .first()
+    )
+    if row is not None:
+        cache.set(key, tuple(row), _state_ttl())
+    return row
+
+
+def user_from_claims(validated_token):
+    User = get_user_model()
+    values = {attr: validated_token[claim] for claim, attr in USER_CLAIMS.items()}
+    values["id"] = validated_token[api_settings.USER_ID_CLAIM]
+    values["is_active"] = True
+    # from_db com um subconjunto dos campos (na ordem do model): o resto fica adiado
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    user = User.from_db("default", names, [values[n] for n in names])
+    user._from_claims = True
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # tokens emitidos antes das claims (ou revogação por senha ligada): caminho normal
+        if api_settings.CHECK_REVOKE_TOKEN or any(c not in validated_token for c in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        version, is_active = state
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if version != validated_token["pv"]:
+            return super().get_user(validated_token)
+        return user_from_claims(validated_token)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Igual ao do simplejwt, mas regrava as claims do usuário no token renovado."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        stamp_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
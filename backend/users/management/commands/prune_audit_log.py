@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models_audit import UserAuditLog
+
+
+class Command(BaseCommand):
+    help = "Apaga registros de auditoria mais antigos que a retenção, em lotes curtos (sem travar a tabela)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None,
+            help="Retenção em dias. Padrão: settings.AUDIT_RETENTION_DAYS.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Só conta o que seria apagado.")
+
+    def handle(self, *args, **opts):
+        days = opts["days"] if opts["days"] is not None else settings.AUDIT_RETENTION_DAYS
+        limite = timezone.now() - timedelta(days=days)
+        # a varredura por created_at usa o índice BRIN; os deletes vão por id (PK)
+        qs = UserAuditLog.objects.filter(created_at__lt=limite)
+
+        if opts["dry_run"]:
+            self.stdout.write(f"Seriam apagados {qs.count()} registros anteriores a {limite:%Y-%m-%d}.")
+            return
+
+        total = 0
+        while True:
+            ids = list(qs.order_by("id").values_list("id", flat=True)[: opts["batch_size"]])
+            if not ids:
+                break
+            total += UserAuditLog.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Registros de auditoria apagados: {total} (anteriores a {limite:%Y-%m-%d})."))
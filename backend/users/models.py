@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group, Permission
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 import secrets
 
@@ -48,6 +49,13 @@ class CustomUserManager(BaseUserManager):
         return username
 
 
+# campos que compõem o principal em cache (users/principal.py)
+PRINCIPAL_FIELDS = {
+    "role", "cliente", "cliente_id", "gestor_referente", "gestor_referente_id", "formularios_ids",
+    "is_staff", "is_superuser", "is_active", "is_2fa_enabled",
+}
+
+
 class CustomUser(AbstractUser):
     ROLE_CHOICES = [
         ("cliente", "Cliente"),
@@ -117,6 +125,9 @@ class CustomUser(AbstractUser):
         help_text="Códigos de uso único para recuperação (opcional).",
     )
 
+    # Incrementado a cada mudança relevante: invalida o principal em cache
+    principal_version = models.PositiveIntegerField(default=0, editable=False)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["nome"]
 
@@ -137,13 +148,43 @@ class CustomUser(AbstractUser):
             self.is_staff = True
             self.is_superuser = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_cliente_id = instance.__dict__.get("cliente_id")
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.username:
             self.username = CustomUser.objects._generate_unique_username(self.email)
         # aplica a regra sempre antes de persistir
         self.clean()
+
+        update_fields = kwargs.get("update_fields")
+        bump = update_fields is None or bool(PRINCIPAL_FIELDS & set(update_fields))
+        if bump:
+            self.principal_version = (self.principal_version or 0) + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = list({*update_fields, "principal_version"})
         super().save(*args, **kwargs)
 
+        if bump:
+            # a árvore do cliente pai (antigo e novo) também mudou
+            parents = {getattr(self, "_loaded_cliente_id", None), self.cliente_id} - {None}
+            from .authentication import forget_user_state, remember_user_state
+            if parents:
+                CustomUser.objects.filter(id__in=parents).update(principal_version=F("principal_version") + 1)
+                # o token do pai ainda traz a versão antiga: sem isso o estado em cache a aceitaria
+                forget_user_state(parents)
+            self._loaded_cliente_id = self.cliente_id
+            remember_user_state(self)
+
+    def refresh_from_db(self, using=None, fields=None):
+        # usuário montado das claims do JWT: o primeiro campo adiado acessado carrega todos
+        if fields is not None and getattr(self, "_from_claims", False):
+            fields = list({*fields, *self.get_deferred_fields()})
+        return super().refresh_from_db(using=using, fields=fields)
+
     def __str__(self):
         return f"{self.nome} ({self.email})"
 
@@ -156,3 +197,7 @@ class CustomUser(AbstractUser):
             ("create_report", "Pode criar relatórios de segurança"),
             ("delete_report", "Pode excluir relatórios de segurança"),
         ]
+
+
+# registra o model de auditoria no app (ele vive em módulo separado)
+from .models_audit import UserAuditLog  # noqa: E402,F401
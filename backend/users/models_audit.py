@@ -1,6 +1,8 @@
 # users/models_audit.py
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class UserAuditLog(models.Model):
     class Action(models.TextChoices):
@@ -30,12 +32,15 @@ class UserAuditLog(models.Model):
     metadata = models.JSONField(default=dict, blank=True)  # detalhes extras (ids de relatório, antes/depois, etc.)
     ip = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # hora do evento (não do flush do buffer — ver users/audit.py)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         indexes = [
-            models.Index(fields=["action", "created_at"]),
-            models.Index(fields=["target_user", "created_at"]),
+            models.Index(fields=["action", "created_at", "id"]),
+            models.Index(fields=["target_user", "created_at", "id"]),
+            # tabela só recebe inserts em ordem de tempo: BRIN é minúsculo e serve à retenção
+            BrinIndex(fields=["created_at"], name="users_audit_created_brin"),
         ]
         ordering = ["-created_at"]
 
@@ -0,0 +1,9 @@
+# users/permissions.py
+"""Regras de acesso a dados de um cliente (via principal em cache — ver users/principal.py)."""
+from .principal import STAFF_ROLES, get_principal  # noqa: F401
+
+
+def can_access_client(user, cliente_id) -> bool:
+    """Staff/analista/gestor veem tudo; cliente vê o próprio; subcliente vê o do cliente pai."""
+    principal = get_principal(user)
+    return bool(principal and principal.can_access_client(cliente_id))
@@ -0,0 +1,97 @@
+# users/principal.py
+"""
+"Principal" do usuário autenticado: papel, árvore de clientes e formulários permitidos,
+em cache (read-through) por (user id, principal_version).
+
+A versão fica na própria linha do usuário (que a autenticação já carrega) e é
+incrementada em CustomUser.save() quando muda algo relevante — inclusive no cliente pai
+quando um subcliente entra/sai. Uma mudança vira chave nova, então o principal antigo
+nunca é lido de novo; o cache (settings.CACHES) é compartilhado pelos workers.
+
+O limite de atraso fica na versão que chega ao request: com o usuário montado das claims
+do JWT (users/authentication.py) ela vem do token e é conferida contra o estado em cache,
+que pode estar até JWT_USER_STATE_TTL segundos atrasado em relação ao banco (ex.: um
+.update() fora do save()).
+"""
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+from monitoring import metrics
+
+STAFF_ROLES = {"analista", "gestor"}
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    role: str
+    is_staff: bool
+    cliente_id: int | None                 # cliente pai (subcliente)
+    client_ids: frozenset = field(default_factory=frozenset)   # clientes cujos dados pode ver
+    subclient_ids: tuple = ()              # árvore do cliente (informativo: não dá acesso)
+    analyst_ids: tuple = ()                # gestor -> analistas
+    formularios_ids: tuple = ()
+
+    @property
+    def is_staff_like(self) -> bool:
+        return self.is_staff or self.role in STAFF_ROLES
+
+    def can_access_client(self, cliente_id) -> bool:
+        return self.is_staff_like or cliente_id in self.client_ids
+
+    def can_access_form(self, form_id) -> bool:
+        # lista vazia = sem restrição (formularios_ids ainda é opcional)
+        return self.is_staff_like or not self.formularios_ids or form_id in self.formularios_ids
+
+
+def _cache_key(user) -> str:
+    return f"principal:{user.id}:{getattr(user, 'principal_version', 0)}"
+
+
+def build_principal(user) -> Principal:
+    from .models import CustomUser
+
+    role = (user.role or "").lower()
+    subclients = ()
+    analysts = ()
+    if role == "cliente":
+        subclients = tuple(CustomUser.objects.filter(cliente_id=user.id).values_list("id", flat=True))
+    elif role == "gestor":
+        analysts = tuple(CustomUser.objects.filter(gestor_referente_id=user.id).values_list("id", flat=True))
+
+    client_ids = {user.id}
+    if role == "subcliente" and user.cliente_id:
+        client_ids.add(user.cliente_id)
+
+    return Principal(
+        user_id=user.id,
+        role=role,
+        is_staff=bool(user.is_staff),
+        cliente_id=user.cliente_id,
+        client_ids=frozenset(client_ids),
+        subclient_ids=subclients,
+        analyst_ids=analysts,
+        formularios_ids=tuple(user.formularios_ids or ()),
+    )
+
+
+def get_principal(user) -> Principal | None:
+    """Principal do usuário (None se anônimo). Memoizado também no próprio objeto do request."""
+    if not user or not user.is_authenticated:
+        return None
+    cached = getattr(user, "_principal", None)
+    if cached is not None:
+        return cached
+
+    key = _cache_key(user)
+    principal = cache.get(key)
+    if principal is None:
+        metrics.cache_miss("principal")
+        principal = build_principal(user)
+        cache.set(key, principal, getattr(settings, "PRINCIPAL_CACHE_TTL", 300))
+    else:
+        metrics.cache_hit("principal")
+    user._principal = principal
+    return principal
@@ -2,6 +2,12 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from django.contrib.auth.models import update_last_login
+
+from . import audit
+from .authentication import stamp_user_claims
+from .models_audit import UserAuditLog
 
 User = get_user_model()
 
@@ -18,6 +24,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     username = serializers.CharField(required=False)
     otp_code = serializers.CharField(required=False, allow_blank=True)
 
+    @classmethod
+    def get_token(cls, user):
+        # claims usadas por ClaimsJWTAuthentication para dispensar a query do usuário
+        return stamp_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         email = attrs.get("email")
         username = attrs.get("username")
@@ -58,9 +69,19 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             if not valid:
                 raise serializers.ValidationError({"detail": "OTP requerido/ inválido.", "mfa_required": True})
 
-        # Garante o USERNAME_FIELD correto (no seu model é 'email')
-        attrs[self.username_field] = getattr(user, self.username_field)
-        data = super().validate(attrs)
+        # Usuário já carregado e validado acima: emite os tokens direto,
+        # sem o authenticate() do super() (que buscaria o usuário de novo).
+        self.user = user
+        refresh = self.get_token(user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        # bufferizado: gravado depois da resposta (users/audit.py)
+        audit.log(
+            UserAuditLog.Action.LOGIN, actor=user, target_user=user,
+            metadata={"mfa": bool(getattr(user, "is_2fa_enabled", False))},
+            request=self.context.get("request"),
+        )
 
         data["user"] = {
             "id": user.id,
@@ -198,3 +219,12 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
         instance.save()
         return instance
+
+
+# =======================
+# AUDITORIA
+# =======================
+class UserAuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserAuditLog
+        fields = ["id", "created_at", "action", "actor", "target_user", "metadata", "ip", "user_agent"]
@@ -1,3 +1,91 @@
-from django.test import TestCase
+import sqlite3
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from . import throttling
+from .models import CustomUser
+from .models_audit import UserAuditLog
+
+
+class SharedThrottleTests(SimpleTestCase):
+    def setUp(self):
+        throttling.reset()
+        self.addCleanup(throttling.reset)
+
+    def test_limite_na_janela(self):
+        for t in (0, 10, 20):
+            self.assertEqual(throttling.hit("user_1", 3, 60, t), (True, None))
+        permitido, espera = throttling.hit("user_1", 3, 60, 45)
+        self.assertFalse(permitido)
+        self.assertAlmostEqual(espera, 15)
+        # outra chave tem o próprio contador
+        self.assertTrue(throttling.hit("user_2", 3, 60, 45)[0])
+
+    def test_janela_deslizante_pesa_a_anterior(self):
+        for t in (0, 10, 20):
+            throttling.hit("user_1", 3, 60, t)
+        # metade da janela seguinte: 3 * 0.5 + atual, cabem mais 2
+        self.assertTrue(throttling.hit("user_1", 3, 60, 90)[0])
+        self.assertTrue(throttling.hit("user_1", 3, 60, 90)[0])
+        permitido, espera = throttling.hit("user_1", 3, 60, 90)
+        self.assertFalse(permitido)
+        # 3 * (1 - e) + 2 < 3 quando e > 2/3, isto é, 10 s depois
+        self.assertAlmostEqual(espera, 10)
+
+    def test_negadas_nao_contam(self):
+        throttling.hit("user_1", 1, 60, 0)
+        for _ in range(5):
+            self.assertFalse(throttling.hit("user_1", 1, 60, 30)[0])
+        # se as negadas contassem, a janela anterior pesaria 6 * 0.5 e ainda bloquearia
+        self.assertTrue(throttling.hit("user_1", 1, 60, 90)[0])
+
+    def _request(self):
+        return SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=7), META={})
+
+    def test_throttle_do_drf_usa_o_contador_compartilhado(self):
+        primeiro, segundo = throttling.SharedUserRateThrottle(), throttling.SharedUserRateThrottle()
+        primeiro.num_requests = segundo.num_requests = 1
+        self.assertTrue(primeiro.allow_request(self._request(), None))
+        # outra instância (outro worker) vê o mesmo contador
+        self.assertFalse(segundo.allow_request(self._request(), None))
+        self.assertGreater(segundo.wait(), 0)
+
+    def test_falha_no_sqlite_libera(self):
+        throttle = throttling.SharedUserRateThrottle()
+        with mock.patch.object(throttling, "hit", side_effect=sqlite3.OperationalError("database is locked")):
+            with self.assertLogs("users.throttling", "WARNING"):
+                self.assertTrue(throttle.allow_request(self._request(), None))
+
+
+class UserAuditLogViewTests(APITestCase):
+    def setUp(self):
+        self.gestor = CustomUser.objects.create_user(
+            email="gestor@teste.local", password=None, nome="Gestor", role="gestor",
+        )
+        self.cliente = CustomUser.objects.create_user(
+            email="cliente@teste.local", password=None, nome="Cliente", role="cliente",
+        )
+        UserAuditLog.objects.bulk_create([
+            UserAuditLog(action=UserAuditLog.Action.LOGIN, actor=self.cliente, target_user=self.cliente),
+            UserAuditLog(action=UserAuditLog.Action.DEACTIVATE, actor=self.gestor, target_user=self.cliente),
+            UserAuditLog(action=UserAuditLog.Action.LOGIN, actor=self.gestor, target_user=self.gestor),
+        ])
+        self.client.force_authenticate(user=self.gestor)
+
+    def _get(self, **params):
+        return self.client.get(reverse("user-audit"), params)
+
+    def test_filtros(self):
+        resp = self._get(target_user=self.cliente.id)
+        self.assertEqual(len(resp.data["results"]), 2)
+        resp = self._get(actor=self.gestor.id, action="login")
+        self.assertEqual(len(resp.data["results"]), 1)
+
+    def test_filtro_nao_numerico_e_400(self):
+        for params in ({"target_user": "abc"}, {"actor": "1.5"}, {"since": "ontem"}):
+            with self.subTest(params=params):
+                self.assertEqual(self._get(**params).status_code, 400)
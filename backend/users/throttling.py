@@ -0,0 +1,125 @@
+# users/throttling.py
+"""
+Throttles do DRF com estado compartilhado entre os workers do gunicorn.
+
+Sem CACHES configurado, o UserRateThrottle/AnonRateThrottle padrão guarda o histórico
+em LocMem: cada worker tem o próprio contador (limite efetivo x nº de workers) e tudo
+zera no restart. Aqui o contador fica num SQLite local (settings.THROTTLE_DB_PATH),
+mesmo esquema das métricas (monitoring/metrics.py): WAL + transação IMMEDIATE, sem
+servidor extra e bem abaixo de 1 ms por checagem.
+
+Janela deslizante aproximada: contagem = anterior * (1 - fração decorrida) + atual.
+Requisições negadas não contam. Falha no SQLite libera a requisição (fail-open).
+"""
+import logging
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# limpeza das janelas expiradas em lote, a cada N checagens por processo
+PRUNE_EVERY = 1000
+
+_lock = threading.Lock()
+_conn = None
+_conn_pid = None
+_hits_since_prune = 0
+
+
+def _connection():
+    """Conexão por processo (reabre após fork do gunicorn)."""
+    global _conn, _conn_pid
+    pid = os.getpid()
+    if _conn is None or _conn_pid != pid:
+        conn = sqlite3.connect(settings.THROTTLE_DB_PATH, timeout=0.5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS hits ("
+            " key TEXT NOT NULL, window INTEGER NOT NULL, count INTEGER NOT NULL, expires REAL NOT NULL,"
+            " PRIMARY KEY (key, window))"
+        )
+        _conn, _conn_pid = conn, pid
+    return _conn
+
+
+def hit(key, limit, duration, now):
+    """
+    Registra uma requisição se couber no limite.
+    Retorna (permitido, espera_em_segundos).
+    """
+    global _hits_since_prune
+    window = int(now // duration)
+    elapsed = (now - window * duration) / duration
+
+    with _lock:
+        conn = _connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = dict(conn.execute(
+                "SELECT window, count FROM hits WHERE key = ? AND window IN (?, ?)",
+                (key, window - 1, window),
+            ).fetchall())
+            previous, current = rows.get(window - 1, 0), rows.get(window, 0)
+
+            if previous * (1 - elapsed) + current >= limit:
+                conn.execute("COMMIT")
+                if previous and current < limit:
+                    # quando a janela anterior "escorrer" o suficiente
+                    wait = (1 - (limit - current) / previous - elapsed) * duration
+                else:
+                    wait = (1 - elapsed) * duration
+                return False, max(wait, 0.0)
+
+            conn.execute(
+                "INSERT INTO hits (key, window, count, expires) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (key, window) DO UPDATE SET count = count + 1",
+                (key, window, (window + 2) * duration),
+            )
+            _hits_since_prune += 1
+            if _hits_since_prune >= PRUNE_EVERY:
+                conn.execute("DELETE FROM hits WHERE expires < ?", (now,))
+                _hits_since_prune = 0
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return True, None
+
+
+def reset():
+    with _lock:
+        _connection().execute("DELETE FROM hits")
+
+
+class SharedRateThrottleMixin:
+    """Substitui o histórico em cache do SimpleRateThrottle pelo contador compartilhado."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            allowed, self._wait = hit(self.key, self.num_requests, self.duration, self.timer())
+        except sqlite3.Error:
+            logger.warning("throttle: falha ao acessar %s", settings.THROTTLE_DB_PATH, exc_info=True)
+            return True
+        return allowed
+
+    def wait(self):
+        return getattr(self, "_wait", None)
+
+
+class SharedUserRateThrottle(SharedRateThrottleMixin, UserRateThrottle):
+    pass
+
+
+class SharedAnonRateThrottle(SharedRateThrottleMixin, AnonRateThrottle):
+    pass
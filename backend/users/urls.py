@@ -1,12 +1,13 @@
 # users/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MeView, UserViewSet
+from .views import MeView, UserAuditLogView, UserViewSet
 
 router = DefaultRouter()
 router.register("", UserViewSet, basename="user")
 
 urlpatterns = [
     path("me/", MeView.as_view(), name="auth_me"),  # /api/users/me/
+    path("audit/", UserAuditLogView.as_view(), name="user-audit"),  # /api/users/audit/
     path("", include(router.urls)),                 # /api/users/ e /api/users/<id>/
 ]
@@ -1,4 +1,6 @@
 # users/views.py
+from datetime import datetime
+
 from django.contrib.auth import get_user_model
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -7,14 +9,17 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from config.pagination import keyset_page
+
 from .serializers import (
     CustomTokenObtainPairSerializer,
     UserListSerializer,
     UserCreateSerializer,
     UserUpdateSerializer,
+    UserAuditLogSerializer,
 )
+from . import audit
 from .models_audit import UserAuditLog
-from .utils import request_fingerprint
 
 User = get_user_model()
 
@@ -44,14 +49,12 @@ class UserViewSet(viewsets.ModelViewSet):
             user.is_active = new_state
             user.save(update_fields=["is_active"])
 
-            ip, ua = request_fingerprint(request)
-            UserAuditLog.objects.create(
+            audit.log(
+                UserAuditLog.Action.ACTIVATE if new_state else UserAuditLog.Action.DEACTIVATE,
                 actor=request.user,
                 target_user=user,
-                action=UserAuditLog.Action.ACTIVATE if new_state else UserAuditLog.Action.DEACTIVATE,
                 metadata={"from": old_state, "to": new_state},
-                ip=ip,
-                user_agent=ua,
+                request=request,
             )
 
         return Response({"id": user.id, "is_active": user.is_active}, status=status.HTTP_200_OK)
@@ -121,6 +124,7 @@ class LogoutAndBlacklistRefreshTokenForUserView(APIView):
             token.blacklist()
         except Exception:
             return Response({"detail": "Refresh token inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        audit.log(UserAuditLog.Action.LOGOUT, actor=request.user, target_user=request.user, request=request)
         return Response(status=status.HTTP_205_RESET_CONTENT)
 
 
@@ -138,3 +142,39 @@ class MeView(APIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
+
+
+# ========= AUDITORIA =========
+class UserAuditLogView(APIView):
+    """
+    /api/users/audit/?action=login&target_user=<id>&actor=<id>&since=<iso>&cursor=<next_cursor>&limit=50
+
+    Mais recentes primeiro, paginação por keyset em (created_at, id): custo constante por
+    página, usando os índices (action, created_at, id) / (target_user, created_at, id).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    max_limit = 200
+
+    def get(self, request):
+        params = request.query_params
+        qs = UserAuditLog.objects.all()
+        if params.get("action"):
+            qs = qs.filter(action=params["action"])
+        try:
+            if params.get("target_user"):
+                qs = qs.filter(target_user_id=int(params["target_user"]))
+            if params.get("actor"):
+                qs = qs.filter(actor_id=int(params["actor"]))
+            if params.get("since"):
+                qs = qs.filter(created_at__gte=datetime.fromisoformat(params["since"]))
+            page, next_cursor = keyset_page(
+                qs, ("-created_at", "-id"), (datetime.fromisoformat, int),
+                cursor=params.get("cursor"), limit=params.get("limit"), max_limit=self.max_limit,
+            )
+        except (TypeError, ValueError):
+            return Response({"detail": "Parâmetros inválidos (target_user/actor/since/cursor/limit)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": UserAuditLogSerializer(page, many=True).data,
+            "next_cursor": next_cursor,
+        })
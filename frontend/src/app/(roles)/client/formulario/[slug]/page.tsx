@@ -78,6 +78,12 @@ function readAnswerValue(value: any): string {
   try { return JSON.stringify(value); } catch { return String(value); }
 }
 
+/** Nome do arquivo a partir da URL de download (sem a assinatura ?exp=&sig=). */
+function fileNameFromUrl(url: string) {
+  const last = url.split("?")[0].split("/").pop() || url;
+  try { return decodeURIComponent(last); } catch { return last; }
+}
+
 function isImageFilename(name?: string) {
   if (!name) return false;
   const n = name.toLowerCase();
@@ -225,8 +231,8 @@ export default function NistFormPage({
             if (uiq.parts.attachment) {
               const a = byQid.get(uiq.parts.attachment);
               if (a?.attachment) {
-                const name = String(a.attachment).split("/").pop() || String(a.attachment);
-                st.attachmentName = a.attachment as string;
+                const name = fileNameFromUrl(String(a.attachment));
+                st.attachmentName = name;
                 st.attachments = [{ name, url: a.attachment as string, isImage: isImageFilename(name) }];
                 st.ids!.attachment = a.id;
               }
@@ -366,7 +372,7 @@ export default function NistFormPage({
         const updated = await patchAnswerAttachment(answerId!, f);
         // tenta trocar a primeira thumb com mesmo nome pelo retorno oficial
         if (updated?.attachment) {
-          const serverName = String(updated.attachment).split("/").pop() || f.name;
+          const serverName = fileNameFromUrl(String(updated.attachment)) || f.name;
           setAnswers((prev) => {
             const cur = prev[control.id] || {};
             const atts = (cur.attachments || []).map((t) =>